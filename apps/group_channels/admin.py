@@ -14,7 +14,7 @@ class AutoGroupRule(admin.StackedInline):
 """и добавляет в админку возможность работать с правами. В верхнем правом углу кнопка <Права на объект>"""
 @admin.register(Group)
 class GroupAdmin(GuardedModelAdminMixin, admin.ModelAdmin):
-    list_display = ('name', 'is_editorial', 'order', 'owner')
+    list_display = ('name', 'is_editorial', 'order', 'owner', 'member_count')
     list_filter = ('is_editorial',)
     search_fields = ('name', 'description')
     ordering = ('order', 'name')
@@ -107,19 +107,24 @@ class AddChannelForm(forms.ModelForm):
             }
         ),
         required=True,
-        help_text='Удерживайте Ctrl/Cmd, чтобы выбрать несколько',
+        help_text='Найдите каналы по названию, удерживайте Ctrl/Cmd, '
+                  'чтобы выбрать несколько',
     )
 
     class Meta:
         model = Group
         fields = ('channels',)
 
-    def __init__(self, *args, channel_qs=None, **kwargs):
+    def __init__(self, *args, channel_qs=None, with_choices=True, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['channels'].queryset = (
             channel_qs if channel_qs is not None
             else TelegramChannel.objects.all()
         )
+        if not with_choices:
+            # Список каналов не выводится целиком (варианты подгружает
+            # автодополнение), queryset остаётся для проверки значений
+            self.fields['channels'].widget.choices = ()
 
     def clean_channels(self):
         data = self.cleaned_data['channels']
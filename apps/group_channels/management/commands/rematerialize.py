@@ -0,0 +1,56 @@
+"""
+Команда приложения "group_channels".
+Пересобирает каналы материализуемых автоподборок по их правилам.
+
+Пока меняются каналы и правила, подборки синхронизируют сигналы; команда
+заполняет их для данных, сохранённых раньше, или чинит расхождения:
+целевой и текущий составы сравниваются пачками, записывается только разница.
+
+Запуск:
+    uv run python manage.py rematerialize
+    uv run python manage.py rematerialize --group news --dry-run
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.group_channels.materialize import rematerialize
+from apps.group_channels.models import Group
+from apps.group_channels.signals import GROUPS_CACHE_NAMESPACE
+from config.cache import bump_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает каналы и счётчики материализуемых автоподборок "
+        "по их правилам."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--group", action="append", dest="groups", metavar="SLUG",
+            help="Только эта подборка (можно указать несколько раз).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Показать разницу, ничего не сохраняя.",
+        )
+
+    def handle(self, *args, **options):
+        group_ids = None
+        if options["groups"]:
+            group_ids = list(
+                Group.objects.filter(slug__in=options["groups"])
+                .values_list("pk", flat=True)
+            )
+            if len(group_ids) != len(set(options["groups"])):
+                raise CommandError("Часть подборок не найдена.")
+
+        summary = rematerialize(group_ids, dry_run=options["dry_run"])
+        if not options["dry_run"]:
+            bump_version(GROUPS_CACHE_NAMESPACE)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'DRY RUN: ' if options['dry_run'] else ''}"
+            f"подборок: {summary['groups']} | "
+            f"добавлено каналов: {summary['added']} | "
+            f"удалено: {summary['removed']}"
+        ))
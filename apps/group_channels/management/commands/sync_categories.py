@@ -1,11 +1,21 @@
-# config/group_channels/management/commands/sync_categories.py
+# apps/group_channels/management/commands/sync_categories.py
+import json
+
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.db.models import Q
+from django.utils.text import slugify
+from unidecode import unidecode
 
+from apps.group_channels.materialize import rematerialize
 from apps.group_channels.models import Group, AutoGroupRule
+from apps.group_channels.signals import GROUPS_CACHE_NAMESPACE
 from apps.parser.models import TelegramChannel
+from config.cache import bump_version
+
+# Объектов на один INSERT/UPDATE
+BATCH_SIZE = 500
 
 
 def _flatten_choices(choices):
@@ -42,6 +52,11 @@ class Command(BaseCommand):
         parser.add_argument("--start-order", type=int, default=10)
         parser.add_argument("--order-step", type=int, default=10)
         parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Вывести итог одной JSON-строкой.",
+        )
 
     def _resolve_owner(self, owner_id, owner_username, owner_email):
         User = get_user_model()
@@ -68,7 +83,7 @@ class Command(BaseCommand):
     def _load_categories_from_choices(self):
         try:
             # берём choices прямо из формы парсера
-            from config.parser.forms import ChannelParseForm
+            from apps.parser.forms import ChannelParseForm
             field = ChannelParseForm.base_fields["category"]
             raw = list(_flatten_choices(field.choices))
         except Exception as e:
@@ -86,6 +101,7 @@ class Command(BaseCommand):
         raw = (
             TelegramChannel.objects
             .filter(~Q(category__isnull=True) & ~Q(category__exact=""))
+            .order_by("category")
             .values_list("category", flat=True)
             .distinct()
         )
@@ -97,12 +113,111 @@ class Command(BaseCommand):
                 out.append(val)
         return out
 
+    def _plan(self, categories, start_order, order_step):
+        """
+        Разница между категориями и существующими группами/правилами.
+
+        Группы и правила читаются одним запросом каждый, разница
+        считается в памяти.
+        """
+        groups = {
+            name: (pk, slug)
+            for pk, name, slug in Group.objects.values_list(
+                "pk", "name", "slug"
+            )
+        }
+        rules = {
+            group_id: (pk, category)
+            for pk, group_id, category in AutoGroupRule.objects.values_list(
+                "pk", "group_id", "category"
+            )
+        }
+        slugs = {slug for _, slug in groups.values()}
+
+        new_groups, new_rules, changed_rules = [], [], []
+        order_val = start_order
+        for cat in categories:
+            if cat not in groups:
+                new_groups.append(
+                    (cat, self._unique_slug(cat, slugs), order_val)
+                )
+                order_val += order_step
+                continue
+            group_id = groups[cat][0]
+            if group_id not in rules:
+                new_rules.append((group_id, cat))
+            elif rules[group_id][1] != cat:
+                changed_rules.append((rules[group_id][0], cat))
+        return new_groups, new_rules, changed_rules
+
+    @staticmethod
+    def _unique_slug(name, slugs):
+        # bulk_create не вызывает Group.save, slug задаём сами
+        base = slugify(unidecode(name)) or "group"
+        slug, n = base, 2
+        while slug in slugs:
+            slug, n = f"{base}-{n}", n + 1
+        slugs.add(slug)
+        return slug
+
+    def _apply(self, owner, new_groups, new_rules, changed_rules):
+        with transaction.atomic():
+            created = Group.objects.bulk_create(
+                [
+                    Group(
+                        name=name, slug=slug, owner=owner,
+                        is_editorial=False, order=order,
+                    )
+                    for name, slug, order in new_groups
+                ],
+                batch_size=BATCH_SIZE,
+            )
+            if any(group.pk is None for group in created):
+                # Бэкенды, не возвращающие id из bulk_create
+                pks = dict(
+                    Group.objects.filter(
+                        name__in=[group.name for group in created]
+                    ).values_list("name", "pk")
+                )
+                for group in created:
+                    group.pk = pks[group.name]
+
+            AutoGroupRule.objects.bulk_create(
+                [
+                    AutoGroupRule(group_id=group_id, category=cat)
+                    for group_id, cat in new_rules
+                ] + [
+                    AutoGroupRule(group_id=group.pk, category=group.name)
+                    for group in created
+                ],
+                batch_size=BATCH_SIZE,
+            )
+            AutoGroupRule.objects.bulk_update(
+                [
+                    AutoGroupRule(pk=pk, category=cat)
+                    for pk, cat in changed_rules
+                ],
+                ["category"],
+                batch_size=BATCH_SIZE,
+            )
+
+            # Bulk-операции не отправляют сигналы: материализуем
+            # затронутые подборки и сбрасываем кэш главной сами
+            group_ids = [group.pk for group in created]
+            group_ids += [group_id for group_id, _ in new_rules]
+            group_ids += list(
+                AutoGroupRule.objects.filter(
+                    pk__in=[pk for pk, _ in changed_rules]
+                ).values_list("group_id", flat=True)
+            )
+            if group_ids:
+                rematerialize(group_ids)
+        bump_version(GROUPS_CACHE_NAMESPACE)
+
     def handle(self, *args, **options):
         owner = self._resolve_owner(
             options["owner_id"], options["owner_username"], options["owner_email"]
         )
-        start_order = options["start_order"]
-        order_step = options["order_step"]
         dry_run = options["dry_run"]
 
         # источник категорий
@@ -115,41 +230,36 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("Категории не найдены."))
             return
 
-        created_groups = 0
-        updated_rules = 0
-        created_rules = 0
-        order_val = start_order
-
-        with transaction.atomic():
-            for cat in categories:
-                g, g_created = Group.objects.get_or_create(
-                    name=cat,
-                    defaults={
-                        "owner": owner,
-                        "is_editorial": False,
-                        "order": order_val,
-                    },
-                )
-                if g_created:
-                    created_groups += 1
-                    order_val += order_step
-
-                rule, r_created = AutoGroupRule.objects.get_or_create(
-                    group=g, defaults={"category": cat}
-                )
-                if r_created:
-                    created_rules += 1
-                elif rule.category != cat:
-                    rule.category = cat
-                    rule.save(update_fields=["category"])
-                    updated_rules += 1
+        new_groups, new_rules, changed_rules = self._plan(
+            categories, options["start_order"], options["order_step"]
+        )
+        if not dry_run and (new_groups or new_rules or changed_rules):
+            self._apply(owner, new_groups, new_rules, changed_rules)
 
-            if dry_run:
-                raise transaction.TransactionManagementError("DRY RUN: изменения не сохранены.")
+        summary = {
+            "categories": len(categories),
+            "created_groups": len(new_groups),
+            "created_rules": len(new_groups) + len(new_rules),
+            "updated_rules": len(changed_rules),
+            "owner": owner.pk,
+            "dry_run": dry_run,
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(summary))
+            return
 
-        self.stdout.write(self.style.SUCCESS("Синхронизация категорий завершена."))
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING("DRY RUN: изменения не сохранены.")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS("Синхронизация категорий завершена.")
+            )
         self.stdout.write(
-            f"Всего категорий: {len(categories)} | создано групп: {created_groups} | "
-            f"создано правил: {created_rules} | обновлено правил: {updated_rules}"
+            f"Всего категорий: {summary['categories']} | "
+            f"создано групп: {summary['created_groups']} | "
+            f"создано правил: {summary['created_rules']} | "
+            f"обновлено правил: {summary['updated_rules']}"
         )
         self.stdout.write(self.style.SUCCESS(f"Владелец групп: {owner}"))
@@ -0,0 +1,117 @@
+"""
+Материализация автоподборок.
+
+Для правил с `materialize=True` состав подборки хранится в `Group.channels`
+(M2M), а число каналов - в `Group.member_count`, поэтому страницы подборок
+и главная читают готовые данные вместо выборки по категории.
+
+Синхронизация вызывается сигналами (apps.group_channels.signals) для
+изменённых каналов и правил, полная - командой `rematerialize`.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.group_channels.models import AutoGroupRule, Group
+from apps.parser.models import TelegramChannel
+
+Membership = Group.channels.through
+
+
+def recount(group_ids) -> None:
+    """Пересчёт `member_count` подборок по их M2M"""
+    members = (
+        Membership.objects
+        .filter(group_id=OuterRef('pk'))
+        .order_by()
+        .values('group_id')
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    Group.objects.filter(pk__in=group_ids).update(
+        member_count=Coalesce(Subquery(members), 0)
+    )
+
+
+def sync_groups(channel_ids=None, group_ids=None, dry_run=False) -> dict:
+    """
+    Приводит состав материализуемых автоподборок к их правилам.
+
+    Целевой и текущий состав читаются одним запросом каждый, разница
+    применяется `bulk_create` и удалением по подборкам. Ограничения
+    сужают синхронизацию до изменённых каналов или правил.
+
+    Параметры:
+        channel_ids: pk каналов (None - все каналы)
+        group_ids: pk подборок (None - все материализуемые)
+        dry_run: только посчитать разницу
+
+    Возвращает:
+        dict: число подборок (`groups`), добавленных (`added`)
+              и удалённых (`removed`) связей
+    """
+    rules = AutoGroupRule.objects.filter(materialize=True)
+    if group_ids is not None:
+        rules = rules.filter(group_id__in=group_ids)
+    groups_by_category = defaultdict(set)
+    for group_id, category in rules.values_list('group_id', 'category'):
+        groups_by_category[category].add(group_id)
+    group_pks = set().union(*groups_by_category.values())
+
+    channels = TelegramChannel.objects.filter(
+        category__in=list(groups_by_category)
+    )
+    current = Membership.objects.filter(group_id__in=group_pks)
+    if channel_ids is not None:
+        channels = channels.filter(pk__in=channel_ids)
+        current = current.filter(telegramchannel_id__in=channel_ids)
+
+    target = {
+        (group_id, channel_id)
+        for channel_id, category in channels.values_list('pk', 'category')
+        .iterator()
+        for group_id in groups_by_category[category]
+    }
+    current = set(
+        current.values_list('group_id', 'telegramchannel_id').iterator()
+    )
+    added, removed = target - current, current - target
+
+    if not dry_run and (added or removed):
+        removed_by_group = defaultdict(list)
+        for group_id, channel_id in removed:
+            removed_by_group[group_id].append(channel_id)
+
+        with transaction.atomic():
+            Membership.objects.bulk_create(
+                [
+                    Membership(group_id=group_id, telegramchannel_id=channel_id)
+                    for group_id, channel_id in added
+                ],
+                batch_size=500,
+                ignore_conflicts=True,
+            )
+            for group_id, channel_ids in removed_by_group.items():
+                Membership.objects.filter(
+                    group_id=group_id, telegramchannel_id__in=channel_ids
+                ).delete()
+            recount({group_id for group_id, _ in added | removed})
+
+    return {
+        'groups': len(group_pks),
+        'added': len(added),
+        'removed': len(removed),
+    }
+
+
+def rematerialize(group_ids=None, dry_run=False) -> dict:
+    """Полная синхронизация с пересчётом `member_count` всех подборок"""
+    summary = sync_groups(group_ids=group_ids, dry_run=dry_run)
+    if not dry_run:
+        rules = AutoGroupRule.objects.filter(materialize=True)
+        if group_ids is not None:
+            rules = rules.filter(group_id__in=group_ids)
+        recount(rules.values('group_id'))
+    return summary
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group_channels', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Поддерживается apps.group_channels.materialize', verbose_name='Каналов в автоподборке'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+
+def materialize_auto_groups(apps, schema_editor):
+    """
+    Состав правил с materialize=True, созданных до материализации: без него
+    страницы подборок и главная показывают 0 каналов до `rematerialize`
+    """
+    Group = apps.get_model('group_channels', 'Group')
+    AutoGroupRule = apps.get_model('group_channels', 'AutoGroupRule')
+    TelegramChannel = apps.get_model('parser', 'TelegramChannel')
+    Membership = Group.channels.through
+
+    rules = AutoGroupRule.objects.filter(materialize=True)
+    for group_id, category in rules.values_list('group_id', 'category'):
+        target = TelegramChannel.objects.filter(category=category)
+        current = set(
+            Membership.objects.filter(group_id=group_id)
+            .values_list('telegramchannel_id', flat=True)
+        )
+        Membership.objects.bulk_create(
+            [
+                Membership(group_id=group_id, telegramchannel_id=channel_id)
+                for channel_id in target.values_list('pk', flat=True)
+                .iterator()
+                if channel_id not in current
+            ],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        Membership.objects.filter(group_id=group_id).exclude(
+            telegramchannel__category=category
+        ).delete()
+        Group.objects.filter(pk=group_id).update(member_count=target.count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('group_channels', '0002_group_member_count'),
+        ('parser', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            materialize_auto_groups, migrations.RunPython.noop
+        ),
+    ]
@@ -48,6 +48,12 @@ class Group(models.Model):
         blank=True,
         verbose_name='обложка группы',
     )
+    member_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Каналов в автоподборке',
+        help_text='Поддерживается apps.group_channels.materialize',
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Создана',
@@ -0,0 +1,64 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.group_channels.materialize import recount, sync_groups
+from apps.group_channels.models import AutoGroupRule, Group
+from apps.parser.models import TelegramChannel
+from apps.parser.signals import channels_saved
+from config.cache import bump_version
+
+# Пространство кэша подборок на главной (сетка категорий и редакторские)
+GROUPS_CACHE_NAMESPACE = 'group_channels:groups'
+
+
+def invalidate_groups():
+    """Сброс кэша подборок на главной"""
+    bump_version(GROUPS_CACHE_NAMESPACE)
+
+
+# Кэш сбрасывается после материализации, чтобы собираться уже из
+# обновлённых подборок. Каналы влияют на главную только категорией:
+# сохранения без её изменения (в т.ч. каждый flush парсера) кэш не трогают
+@receiver(post_save, sender=TelegramChannel)
+def materialize_channel(sender, instance, update_fields=None, **kwargs):
+    """Канал сохранён - обновляем его автоподборки"""
+    if update_fields is None or 'category' in update_fields:
+        sync_groups(channel_ids=[instance.pk])
+        invalidate_groups()
+
+
+@receiver(channels_saved)
+def materialize_parsed_channels(sender, channel_ids=None,
+                                categories_changed=False, **kwargs):
+    """Парсер сохранил пачку каналов с новыми категориями"""
+    if channel_ids and categories_changed:
+        sync_groups(channel_ids=channel_ids)
+        invalidate_groups()
+
+
+@receiver(post_delete, sender=TelegramChannel)
+def recount_channel_groups(sender, instance, **kwargs):
+    """Связи удалённого канала удалены каскадом - пересчитываем подборки"""
+    recount(
+        AutoGroupRule.objects
+        .filter(materialize=True, category=instance.category)
+        .values('group_id')
+    )
+    invalidate_groups()
+
+
+@receiver(post_save, sender=AutoGroupRule)
+def materialize_rule(sender, instance, **kwargs):
+    """Правило создано или изменено - пересобираем его подборку"""
+    sync_groups(group_ids=[instance.group_id])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=AutoGroupRule)
+@receiver(post_delete, sender=AutoGroupRule)
+@receiver(m2m_changed, sender=Group.channels.through)
+def invalidate_groups_cache(sender, **kwargs):
+    """Подборки, правила или их состав изменились - сбрасываем кэш"""
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalidate_groups()
@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.group_channels.materialize import Membership
+from apps.group_channels.models import AutoGroupRule, Group
+from apps.parser.models import TelegramChannel
+from apps.parser.sink import ChannelSink
+from apps.users.models import User
+
+
+class MaterializeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='x'
+        )
+        cls.news = Group.objects.create(name='Новости', owner=owner)
+        AutoGroupRule.objects.create(group=cls.news, category='news')
+        cls.tech = Group.objects.create(name='Технологии', owner=owner)
+        AutoGroupRule.objects.create(group=cls.tech, category='tech')
+        cls.live = Group.objects.create(name='Без материализации', owner=owner)
+        AutoGroupRule.objects.create(
+            group=cls.live, category='news', materialize=False
+        )
+
+    def members(self, group):
+        group.refresh_from_db()
+        return (
+            set(group.channels.values_list('channel_id', flat=True)),
+            group.member_count,
+        )
+
+    def test_channel_follows_its_category(self):
+        channel = TelegramChannel.objects.create(
+            channel_id=1, title='Канал', category='news'
+        )
+        TelegramChannel.objects.create(channel_id=2, title='Другой')
+        self.assertEqual(self.members(self.news), ({1}, 1))
+        self.assertEqual(self.members(self.live), (set(), 0))
+
+        channel.category = 'tech'
+        channel.save(update_fields=['category'])
+        self.assertEqual(self.members(self.news), (set(), 0))
+        self.assertEqual(self.members(self.tech), ({1}, 1))
+
+        channel.delete()
+        self.assertEqual(self.members(self.tech), (set(), 0))
+
+    def test_parsed_channels(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with ChannelSink() as sink:
+                for i in range(3):
+                    sink.add({
+                        'channel_id': i, 'title': f'Канал {i}',
+                        'category': 'tech',
+                    })
+        self.assertEqual(self.members(self.tech), ({0, 1, 2}, 3))
+
+    def test_rematerialize_repairs_drift(self):
+        for i in range(4):
+            TelegramChannel.objects.create(
+                channel_id=i, title=f'Канал {i}', category='news'
+            )
+        # Изменения в обход сигналов
+        Membership.objects.filter(group=self.news).delete()
+        stray = TelegramChannel.objects.create(channel_id=10, title='Чужой')
+        Membership.objects.create(group=self.news, telegramchannel=stray)
+
+        out = StringIO()
+        call_command('rematerialize', '--dry-run', stdout=out)
+        self.assertIn(
+            'добавлено каналов: 4 | удалено: 1', out.getvalue()
+        )
+        self.assertEqual(self.members(self.news), ({10}, 4))
+
+        call_command('rematerialize', stdout=StringIO())
+        self.assertEqual(self.members(self.news), ({0, 1, 2, 3}, 4))
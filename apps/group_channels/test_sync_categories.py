@@ -0,0 +1,62 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.group_channels.models import AutoGroupRule, Group
+from apps.parser.models import TelegramChannel
+from apps.users.models import User
+
+
+class SyncCategoriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='x'
+        )
+        TelegramChannel.objects.bulk_create(
+            TelegramChannel(
+                channel_id=i, title=f'Канал {i}', category=f'Категория {i % 30}'
+            )
+            for i in range(90)
+        )
+        # Группа без правила и правило с устаревшей категорией
+        Group.objects.create(name='Категория 0', owner=cls.owner)
+        group = Group.objects.create(name='Категория 1', owner=cls.owner)
+        AutoGroupRule.objects.create(group=group, category='old')
+
+    def sync(self, *args):
+        out = StringIO()
+        call_command(
+            'sync_categories', '--source=db', '--json', *args, stdout=out
+        )
+        return json.loads(out.getvalue())
+
+    def test_dry_run(self):
+        # owner (superuser, then any user), categories, groups, rules -
+        # however many categories there are
+        with self.assertNumQueries(5):
+            summary = self.sync('--dry-run')
+        self.assertEqual(summary['created_groups'], 28)
+        self.assertEqual(summary['created_rules'], 29)
+        self.assertEqual(summary['updated_rules'], 1)
+        self.assertEqual(Group.objects.count(), 2)
+
+    def test_sync(self):
+        self.sync()
+        self.assertEqual(AutoGroupRule.objects.count(), 30)
+        self.assertEqual(
+            AutoGroupRule.objects.get(group__name='Категория 1').category,
+            'Категория 1',
+        )
+        group = Group.objects.get(name='Категория 7')
+        self.assertEqual(group.slug, 'kategoriia-7')
+        self.assertEqual(group.member_count, 3)
+
+        summary = self.sync()
+        self.assertEqual(
+            (summary['created_groups'], summary['created_rules'],
+             summary['updated_rules']),
+            (0, 0, 0),
+        )
@@ -0,0 +1,127 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.group_channels.models import AutoGroupRule, Group
+from apps.group_channels.views import GroupDetailView
+from apps.parser.models import TelegramChannel
+from apps.parser.sink import ChannelSink
+from apps.users.models import User
+from config.views import IndexView
+
+
+class ConfigIndexViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='x'
+        )
+        for i in range(40):
+            group = Group.objects.create(
+                name=f'Категория {i}', owner=cls.owner, order=i
+            )
+            AutoGroupRule.objects.create(group=group, category=f'cat_{i}')
+        TelegramChannel.objects.create(
+            channel_id=1, title='Channel', category='cat_0'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **params):
+        request = RequestFactory().get('/', params)
+        request.user = AnonymousUser()
+        request.role = None
+        return IndexView.as_view()(request)
+
+    def test_grid_is_cached_until_groups_change(self):
+        response = self.get()
+        self.assertContains(response, 'Категория 0')
+        self.assertNotContains(response, 'Категория 32')
+
+        with self.assertNumQueries(0):
+            self.get()
+
+        Group.objects.filter(name='Категория 0').first().delete()
+        response = self.get(cats_page=2)
+        self.assertContains(response, 'Категория 33')
+        self.assertNotContains(response, 'Категория 32<')
+
+    def test_parse_without_category_change_keeps_cache(self):
+        def parse(**data):
+            with self.captureOnCommitCallbacks(execute=True):
+                with ChannelSink() as sink:
+                    sink.add({'channel_id': 1, 'title': 'Channel', **data})
+
+        self.get()
+        parse()
+        parse(category='cat_0')
+        with self.assertNumQueries(0):
+            self.get()
+
+        parse(category='cat_1')
+        with CaptureQueriesContext(connection) as queries:
+            self.get()
+        self.assertTrue(queries.captured_queries)
+        self.assertEqual(
+            Group.objects.get(name='Категория 1').member_count, 1
+        )
+
+
+class GroupDetailViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='x'
+        )
+        cls.group = Group.objects.create(name='Моя группа', owner=cls.owner)
+        TelegramChannel.objects.bulk_create(
+            TelegramChannel(
+                channel_id=i, title=f'Канал {i}', username=f'channel_{i}',
+                participants_count=i,
+            )
+            for i in range(1, 201)
+        )
+
+    def get(self, **params):
+        request = RequestFactory().get('/', params)
+        request.user = self.owner
+        request.role = 'User'
+        return GroupDetailView.as_view()(request, slug=self.group.slug)
+
+    def test_query_count_does_not_grow_with_group(self):
+        channels = list(TelegramChannel.objects.order_by('id'))
+        for size in (10, 200):
+            self.group.channels.set(channels[:size])
+            # group, count, page, capabilities of the user
+            with self.assertNumQueries(4):
+                response = self.get()
+            self.assertEqual(response.status_code, 200)
+            # the add form does not list every free channel
+            self.assertNotContains(response, '<option')
+
+        last = TelegramChannel.objects.get(channel_id=50)
+        response = self.get(page=4)
+        self.assertContains(response, f'href="/parser/{last.pk}/"')
+        self.assertContains(response, '4 из 4')
+        self.assertNotContains(response, f'href="/parser/{last.pk + 1}/"')
+
+    def test_autocomplete(self):
+        self.group.channels.add(TelegramChannel.objects.get(channel_id=12))
+        url = reverse(
+            'group_channels:group_channel_autocomplete', args=[self.group.slug]
+        )
+
+        self.assertEqual(self.client.get(url, {'q': 'channel'}).status_code,
+                         403)
+
+        self.client.force_login(self.owner)
+        response = self.client.get(url, {'q': 'channel_12', 'limit': 5})
+        usernames = [row['username'] for row in response.json()['results']]
+        self.assertEqual(
+            usernames, ['channel_129', 'channel_128', 'channel_127',
+                        'channel_126', 'channel_125'],
+        )
@@ -2,6 +2,7 @@ from django.urls import path
 
 from apps.group_channels.views import (
     AddChannelsView,
+    ChannelAutocompleteView,
     CreateGroupView,
     DeleteGroupView,
     GroupDetailView,
@@ -15,5 +16,10 @@ urlpatterns = [
     path('<slug:slug>/update/',        UpdateGroupView.as_view(),  name='group_update'),
     path('<slug:slug>/delete/',        DeleteGroupView.as_view(),  name='group_delete'),
     path('<slug:slug>/add-channels/',  AddChannelsView.as_view(),  name='group_add_channels'),
+    path(
+        '<slug:slug>/channels/',
+        ChannelAutocompleteView.as_view(),
+        name='group_channel_autocomplete',
+    ),
     path('<slug:slug>/',               GroupDetailView.as_view(),  name='group_detail'),
 ]
@@ -1,10 +1,18 @@
 from django.contrib import messages
 from django.contrib.auth.mixins import UserPassesTestMixin
-from django.shortcuts import get_object_or_404, redirect, render
+from django.core.paginator import Paginator
+from django.http import JsonResponse
+from django.shortcuts import (
+    aget_object_or_404,
+    get_object_or_404,
+    redirect,
+    render,
+)
 from django.urls import reverse
 from django.views.generic.base import View
 
 from apps.parser.models import TelegramChannel
+from apps.parser.search import search_channels
 from config.mixins import UserAuthenticationCheckMixin
 
 from apps.group_channels.forms import AddChannelForm, CreateGroupForm, UpdateGroupForm
@@ -57,32 +65,85 @@ class DeleteGroupView(View):
 
 
 class GroupDetailView(View):
+    paginate_by = 50
+    # Поля каналов, которые выводит шаблон
+    channel_fields = ('id', 'username', 'title', 'participants_count')
+
     def get(self, request, *args, **kwargs):
         slug = kwargs['slug']
-        group = get_object_or_404(Group, slug=slug)
+        group = get_object_or_404(
+            Group.objects.select_related('auto_rule'), slug=slug
+        )
 
         channels = group.channels.all()
 
         auto_category = None
         if hasattr(group, 'auto_rule'):
             auto_category = group.auto_rule.category
-            channels = TelegramChannel.objects.filter(category=auto_category)
-
-        is_owner = request.user.is_authenticated and (group.owner == request.user)
+            if not group.auto_rule.materialize:
+                # Материализованные подборки уже содержат свои каналы
+                channels = TelegramChannel.objects.filter(
+                    category=auto_category
+                )
+
+        # Страница каналов вместо всего списка, только нужные поля
+        page = Paginator(
+            channels.only(*self.channel_fields)
+                    .order_by('-participants_count', 'id'),
+            self.paginate_by,
+        ).get_page(request.GET.get('page'))
+
+        is_owner = (
+            request.user.is_authenticated
+            and group.owner_id == request.user.pk
+        )
         add_form = None
         if is_owner and not hasattr(group, 'auto_rule'):
-            free_qs = TelegramChannel.objects.exclude(groups=group)
-            add_form = AddChannelForm(channel_qs=free_qs)
+            # Варианты не выводятся, их подгружает автодополнение
+            add_form = AddChannelForm(with_choices=False)
 
         return render(request, 'group_channels/detail.html', {
             'group': group,
-            'channels': channels,
+            'channels': page.object_list,
+            'page_obj': page,
             'auto_category': auto_category,
             'add_form': add_form,
             'is_owner': is_owner,
         })
 
 
+class ChannelAutocompleteView(View):
+    """
+    Автодополнение каналов, которых ещё нет в группе (JSON).
+
+    Параметры: q - поисковая строка, limit - число вариантов
+    """
+    limit = 20
+    max_limit = 50
+
+    async def get(self, request, slug):
+        user = await request.auser()
+        group = await aget_object_or_404(
+            Group.objects.only('id', 'owner_id'), slug=slug
+        )
+        if not user.is_authenticated or group.owner_id != user.pk:
+            return JsonResponse({'error': 'Доступ запрещен'}, status=403)
+
+        try:
+            limit = int(request.GET.get('limit', self.limit))
+        except ValueError:
+            limit = self.limit
+        limit = max(1, min(limit, self.max_limit))
+
+        channels = search_channels(
+            request.GET.get('q', ''),
+            TelegramChannel.objects.exclude(groups=group),
+        ).values('id', 'title', 'username')[:limit]
+        return JsonResponse({
+            'results': [channel async for channel in channels],
+        })
+
+
 class AddChannelsView(UserAuthenticationCheckMixin, UserPassesTestMixin, View):
     def test_func(self):
         self.group = get_object_or_404(Group, slug=self.kwargs['slug'])
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.homepage.models import HomePageComponent
+from config.cache import bump_version
+
+# Пространство кэша компонентов главной страницы
+HOMEPAGE_CACHE_NAMESPACE = 'homepage:components'
+
+
+@receiver(post_save, sender=HomePageComponent)
+@receiver(post_delete, sender=HomePageComponent)
+def invalidate_homepage_cache(sender, **kwargs):
+    """Компоненты главной изменились - сбрасываем кэш"""
+    bump_version(HOMEPAGE_CACHE_NAMESPACE)
@@ -1,4 +1,6 @@
 import json
+
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from apps.homepage.models import HomePageComponent
@@ -44,3 +46,53 @@ class IndexViewTest(TestCase):
         self.assertEqual(first_component['content'], self.component.content)
         self.assertEqual(first_component['order'], self.component.order)
 
+
+class IndexViewCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.component = HomePageComponent.objects.create(
+            title="Hero",
+            content={"text": "Привет"},
+            component_type='hero',
+            order=1,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **headers):
+        return self.client.get(
+            reverse('main_index'), HTTP_X_INERTIA='true', **headers
+        )
+
+    def test_cached_payload_and_not_modified(self):
+        response = self.get()
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        # the components come from the cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # HTML of the first load is another representation
+        html = self.client.get(
+            reverse('main_index'), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(html.status_code, 200)
+
+    def test_saving_component_invalidates(self):
+        etag = self.get()['ETag']
+        self.component.title = "Новый заголовок"
+        self.component.save()
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        components = response.json()['props']['components']
+        self.assertEqual(components[0]['title'], "Новый заголовок")
+
+        self.component.delete()
+        response = self.get()
+        self.assertEqual(response.json()['props']['components'], [])
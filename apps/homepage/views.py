@@ -1,12 +1,88 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
 from django.views.generic.base import View
 from inertia import render as inertia_render
+from inertia.settings import settings as inertia_settings
+
 from apps.homepage.models import HomePageComponent
-from django.http import HttpRequest, HttpResponse
+from apps.homepage.signals import HOMEPAGE_CACHE_NAMESPACE
+from config.cache import versioned_key
+
+
+def build_payload() -> dict:
+    """Props главной страницы, ETag и время сборки"""
+    # Получаем все активные компоненты, сортируем по порядку
+    components = [
+        {
+            'id': component.id,
+            'type': component.component_type,
+            'title': component.title,
+            'content': component.content,
+            'order': component.order
+        }
+        for component in (
+            HomePageComponent.objects
+            .filter(is_active=True)
+            .order_by('order')
+        )
+    ]
+    serialized = json.dumps(
+        components, cls=DjangoJSONEncoder, sort_keys=True
+    ).encode()
+    return {
+        'components': components,
+        'etag': hashlib.sha1(serialized).hexdigest(),
+        'last_modified': timezone.now().replace(microsecond=0),
+    }
+
+
+def homepage_payload() -> dict:
+    """
+    Данные главной из кэша; ключ содержит версию, которую сбрасывают
+    сигналы apps.homepage.signals
+    """
+    key = versioned_key(HOMEPAGE_CACHE_NAMESPACE, 'payload')
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_payload()
+        cache.set(key, payload, settings.HOMEPAGE_CACHE_TIMEOUT)
+    return payload
+
+
+def homepage_etag(request: HttpRequest, *args, **kwargs) -> str:
+    # HTML первой загрузки и JSON Inertia - разные представления, а в HTML
+    # есть ссылки входа/профиля, поэтому учитываем и пользователя
+    representation = 'inertia' if request.headers.get('X-Inertia') else 'html'
+    user = request.user.pk if request.user.is_authenticated else 'anonymous'
+    return '-'.join([
+        homepage_payload()['etag'],
+        representation,
+        str(user),
+        str(inertia_settings.INERTIA_VERSION),
+    ])
+
+
+def homepage_last_modified(request: HttpRequest, *args, **kwargs):
+    return homepage_payload()['last_modified']
+
 
 class IndexView(View):
     """
     Главная страница сайта.
 
+    Компоненты берутся из кэша (без запросов к БД, пока их не изменят),
+    повторный запрос с If-None-Match/If-Modified-Since получает 304.
+
     Документация компонентов для InertiaJS:
     [
         {
@@ -17,28 +93,12 @@ class IndexView(View):
     ]
     """
 
+    # Браузер хранит ответ у себя, но каждый раз сверяет ETag
+    @method_decorator(cache_control(private=True, no_cache=True))
+    @method_decorator(vary_on_headers('X-Inertia', 'Cookie'))
+    @method_decorator(condition(homepage_etag, homepage_last_modified))
     def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
-        # Получаем все активные компоненты, сортируем по порядку
-        components = (
-            HomePageComponent.objects
-            .filter(is_active=True)
-            .order_by('order')
-        )
-
-        # Формируем props для Inertia
-        page_data = {
-            'components': [
-                {
-                    'id': component.id,
-                    'type': component.component_type,
-                    'title': component.title,
-                    'content': component.content,
-                    'order': component.order
-                }
-                for component in components
-            ],
-        }
+        page_data = {'components': homepage_payload()['components']}
 
         # Возвращаем Inertia Response с шаблоном 'Home' и данными компонентов
         return inertia_render(request, 'Home', props=page_data)
-
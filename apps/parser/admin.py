@@ -1,5 +1,13 @@
 from django.contrib import admin
-from apps.parser.models import TelegramChannel, ChannelStats, ChannelModerator
+from django.db import connection
+from apps.parser.models import (
+    TelegramChannel,
+    ChannelStats,
+    ChannelStatsRollup,
+    ChannelModerator,
+    ChannelRanking,
+)
+from apps.parser.search import search_channels
 from guardian.admin import GuardedModelAdminMixin
 
 
@@ -10,6 +18,12 @@ class TelegramChannelAdmin(GuardedModelAdminMixin, admin.ModelAdmin):
     search_fields = ['title', 'username', 'description']
     readonly_fields = ['channel_id', 'parsed_at', 'creation_date']
     ordering = ['-parsed_at']
+
+    def get_search_results(self, request, queryset, search_term):
+        # На PostgreSQL - полнотекстовый индекс вместо icontains по трём полям
+        if search_term and connection.vendor == 'postgresql':
+            return search_channels(search_term, queryset), False
+        return super().get_search_results(request, queryset, search_term)
     
     fieldsets = (
         ('Основная информация', {
@@ -43,6 +57,27 @@ class ChannelStatsAdmin(GuardedModelAdminMixin, admin.ModelAdmin):
     )
 
 
+@admin.register(ChannelStatsRollup)
+class ChannelStatsRollupAdmin(admin.ModelAdmin):
+    list_display = [
+        'channel', 'period', 'period_start', 'participants_last', 'growth',
+    ]
+    list_filter = ['period', 'period_start']
+    search_fields = ['channel__title', 'channel__username']
+    list_select_related = ['channel']
+    ordering = ['-period_start']
+
+
+@admin.register(ChannelRanking)
+class ChannelRankingAdmin(admin.ModelAdmin):
+    list_display = [
+        'metric', 'category', 'rank', 'previous_rank', 'channel', 'value',
+    ]
+    list_filter = ['metric', 'category']
+    list_select_related = ['channel']
+    ordering = ['metric', 'category', 'rank']
+
+
 class ChannelModeratorInline(admin.TabularInline):
     model = ChannelModerator
     extra = 1
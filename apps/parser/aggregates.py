@@ -0,0 +1,93 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Sum
+from django.db.models.functions import Coalesce
+
+from config.cache import bump_version, versioned_key
+
+CACHE_NAMESPACE = 'parser:aggregates'
+
+TOP_FIELDS = (
+    'id',
+    'title',
+    'username',
+    'category',
+    'participants_count',
+    'average_views',
+    'daily_growth',
+)
+# Top list name -> ordering
+TOP_ORDERINGS = {
+    'participants': '-participants_count',
+    'growth': '-daily_growth',
+    'views': '-average_views',
+}
+
+
+def _rounded(values: dict) -> dict:
+    return {
+        key: round(value, 2) if isinstance(value, float) else value
+        for key, value in values.items()
+    }
+
+
+def channel_aggregates(queryset, top: int = 5) -> dict:
+    """
+    Catalog aggregates computed by the database.
+
+    Parameters:
+        queryset (QuerySet): Filtered TelegramChannel queryset
+        top (int): Size of every top list
+
+    Returns:
+        dict: `totals` (sums and averages), `categories` (per category
+              counts) and `top` (top lists by participants, growth, views)
+    """
+    totals = queryset.aggregate(
+        channels=Count('id'),
+        participants=Coalesce(Sum('participants_count'), 0),
+        growth=Coalesce(Sum('daily_growth'), 0),
+        avg_participants=Avg('participants_count'),
+        avg_views=Avg('average_views'),
+        avg_growth=Avg('daily_growth'),
+    )
+    categories = (
+        queryset.values('category')
+        .annotate(
+            channels=Count('id'),
+            participants=Sum('participants_count'),
+            avg_views=Avg('average_views'),
+        )
+        .order_by('-channels', 'category')
+    )
+    return {
+        'totals': _rounded(totals),
+        'categories': [_rounded(row) for row in categories],
+        'top': {
+            name: list(
+                queryset.order_by(ordering, 'id').values(*TOP_FIELDS)[:top]
+            )
+            for name, ordering in TOP_ORDERINGS.items()
+        },
+    }
+
+
+def cached_channel_aggregates(queryset, filters: dict, top: int = 5) -> dict:
+    """`channel_aggregates` cached per filter combination and top size"""
+    params = urlencode(sorted({**filters, 'top': top}.items()))
+    key = versioned_key(
+        CACHE_NAMESPACE, hashlib.md5(params.encode()).hexdigest()
+    )
+    data = cache.get(key)
+    if data is None:
+        data = channel_aggregates(queryset, top)
+        cache.set(key, data, settings.PARSER_STATS_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_aggregates() -> None:
+    """Drop every cached aggregate, called when channel data changes"""
+    bump_version(CACHE_NAMESPACE)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ParserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.parser'
+
+    def ready(self):
+        from apps.parser import signals  # noqa: F401
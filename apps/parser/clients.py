@@ -0,0 +1,209 @@
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from telethon import TelegramClient
+from telethon.errors import AuthKeyError
+from telethon.sessions import StringSession
+
+from apps.parser.ratelimit import DEFAULT_ACCOUNT
+
+log = logging.getLogger(__name__)
+
+
+class TelegramClientPool:
+    """
+    Per-process pool of connected Telegram clients, one per account.
+
+    A Telethon client is bound to the event loop it was connected on, while
+    Celery tasks and Django views each run their own short-lived loops.
+    The pool therefore owns one long-lived loop in a background thread:
+    clients connect there once (a single MTProto handshake per process) and
+    every parse is submitted to that loop, from sync or async code.
+
+    Features:
+    - Lazy start: nothing connects until the first call, so forked Celery
+      children never inherit a live connection from the parent
+    - Health check: idle clients are pinged before reuse
+    - Reconnect: `AuthKeyError` / `ConnectionError` drop the client and the
+      call is retried once on a fresh connection (`run_all` hands
+      `reconnect` to the sweep, which does the same per channel)
+    - `shutdown()` disconnects everything (wired to Celery worker signals)
+
+    Parameters:
+        client_factory (callable): Builds a client for an account name
+                   (default: `TelegramClient` over the account StringSession)
+    """
+
+    def __init__(self, client_factory=None):
+        self._client_factory = client_factory or self._build_client
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+        self._thread = None
+        self._clients: dict[str, TelegramClient] = {}
+        self._checked: dict[str, float] = {}
+        self._connecting: dict[str, asyncio.Lock] = {}
+
+    @property
+    def accounts(self) -> list[str]:
+        """Names of the Telegram accounts configured for parsing"""
+        return list(settings.TELEGRAM_SESSIONS)
+
+    def _session_string(self, account: str) -> str:
+        session = settings.TELEGRAM_SESSIONS.get(account)
+        if not session:
+            raise ImproperlyConfigured(
+                f'Telegram session of account "{account}" (needed by '
+                'Telethon to parse data from Telegram) is not set. Please run '
+                '`uv run python3 manage.py start_telegram_session`'
+            )
+        return session
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # A forked process must not reuse the loop thread of its parent
+            if self._pid != os.getpid():
+                self._clients = {}
+                self._checked = {}
+                self._connecting = {}
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name='telegram-client-pool',
+                    daemon=True,
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+            return self._loop
+
+    def _build_client(self, account: str) -> TelegramClient:
+        return TelegramClient(
+            StringSession(self._session_string(account)),
+            settings.TELEGRAM_API_ID,
+            settings.TELEGRAM_API_HASH,
+        )
+
+    async def _connect(self, account: str) -> TelegramClient:
+        client = self._client_factory(account)
+        await client.connect()
+        self._clients[account] = client
+        self._checked[account] = time.monotonic()
+        log.info(f"Telegram client connected for account {account}")
+        return client
+
+    async def _drop(self, account: str) -> None:
+        client = self._clients.pop(account, None)
+        self._checked.pop(account, None)
+        if client is not None:
+            try:
+                await client.disconnect()
+            except Exception as e:
+                log.warning(f"Error while disconnecting {account}: {e}")
+
+    async def get_client(
+        self, account: str = DEFAULT_ACCOUNT
+    ) -> TelegramClient:
+        """Return a healthy connected client; must run on the pool loop"""
+        lock = self._connecting.setdefault(account, asyncio.Lock())
+        async with lock:
+            client = self._clients.get(account)
+            if client is None or not client.is_connected():
+                await self._drop(account)
+                return await self._connect(account)
+
+            idle = time.monotonic() - self._checked.get(account, 0)
+            if idle > settings.TELEGRAM_HEALTHCHECK_INTERVAL:
+                try:
+                    await client.get_me()
+                    self._checked[account] = time.monotonic()
+                except (AuthKeyError, ConnectionError, OSError) as e:
+                    log.warning(f"Health check failed for {account}: {e}")
+                    await self._drop(account)
+                    return await self._connect(account)
+            return client
+
+    async def reconnect(self, account: str) -> TelegramClient:
+        """Drop the broken client of an account and connect a fresh one"""
+        await self._drop(account)
+        return await self.get_client(account)
+
+    async def _call(self, func, account, args, kwargs):
+        for attempt in (1, 2):
+            client = await self.get_client(account)
+            try:
+                return await func(*args, client=client, **kwargs)
+            except (AuthKeyError, ConnectionError) as e:
+                log.error(f"Telegram client of {account} failed: {e}")
+                await self._drop(account)
+                if attempt == 2:
+                    raise
+
+    async def _call_all(self, func, args, kwargs):
+        clients = {
+            account: await self.get_client(account)
+            for account in self.accounts
+        }
+        return await func(
+            *args, clients=clients, reconnect=self.reconnect, **kwargs
+        )
+
+    def run_all(self, func, *args, **kwargs):
+        """
+        Run `func(..., clients={account: client}, reconnect=...)` over
+        every account; `reconnect(account)` replaces a broken client.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._call_all(func, args, kwargs), self._get_loop()
+        ).result()
+
+    def submit(self, func, *args, account: str = DEFAULT_ACCOUNT, **kwargs):
+        """Schedule `func(*args, client=client, **kwargs)` on the pool loop"""
+        return asyncio.run_coroutine_threadsafe(
+            self._call(func, account, args, kwargs), self._get_loop()
+        )
+
+    def run(self, func, *args, account: str = DEFAULT_ACCOUNT, **kwargs):
+        """Run `func(..., client=client)` from sync code, return its result"""
+        return self.submit(func, *args, account=account, **kwargs).result()
+
+    async def call(self, func, *args, account: str = DEFAULT_ACCOUNT, **kwargs):
+        """Run `func(..., client=client)` from any event loop"""
+        loop = self._get_loop()
+        if asyncio.get_running_loop() is loop:
+            return await self._call(func, account, args, kwargs)
+        future = self.submit(func, *args, account=account, **kwargs)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, timeout: float = 10) -> None:
+        """Disconnect every client and stop the pool loop"""
+        with self._lock:
+            if self._pid != os.getpid() or self._loop is None:
+                return
+            loop, thread = self._loop, self._thread
+            self._pid = self._loop = self._thread = None
+
+        async def disconnect_all():
+            for account in list(self._clients):
+                await self._drop(account)
+
+        try:
+            asyncio.run_coroutine_threadsafe(
+                disconnect_all(), loop
+            ).result(timeout)
+        except Exception as e:
+            log.warning(f"Telegram clients were not closed cleanly: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+        log.info("Telegram client pool is shut down")
+
+
+client_pool = TelegramClientPool()
+atexit.register(client_pool.shutdown)
@@ -0,0 +1,144 @@
+import hashlib
+import logging
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from apps.parser.aggregates import CACHE_NAMESPACE
+from apps.parser.models import ChannelFacetCount, TelegramChannel
+from config.cache import versioned_key
+
+log = logging.getLogger(__name__)
+
+FACET_FIELDS = ('category', 'country', 'language')
+
+
+def refresh_facet_counts() -> int:
+    """
+    Recount channels per (category, country, language) combination.
+
+    One GROUP BY over the channels, run after parse sweeps instead of on
+    every catalog request. Returns the number of combinations.
+    """
+    rows = list(
+        TelegramChannel.objects.order_by()
+        .values(*FACET_FIELDS)
+        .annotate(channels=Count('id'))
+    )
+    with transaction.atomic():
+        ChannelFacetCount.objects.all().delete()
+        ChannelFacetCount.objects.bulk_create(
+            ChannelFacetCount(**row) for row in rows
+        )
+    log.info(f"Facet counts refreshed: {len(rows)} combinations")
+    return len(rows)
+
+
+def _add_facet_count(facets: dict, delta: int) -> None:
+    rows = ChannelFacetCount.objects.filter(**facets)
+    if not rows.update(channels=F('channels') + delta) and delta > 0:
+        ChannelFacetCount.objects.create(**facets, channels=delta)
+    if delta < 0:
+        rows.filter(channels__lte=0).delete()
+
+
+def shift_facet_count(before: dict | None, after: dict) -> None:
+    """
+    Move one channel between facet combinations.
+
+    Used when a single channel is saved (ParserView) instead of recounting
+    the whole table; sweeps still call `refresh_facet_counts`.
+
+    Parameters:
+        before (dict): Facet values of the channel before saving, None for
+                       a new channel
+        after (dict): Facet values of the saved channel
+    """
+    if before == after:
+        return
+    with transaction.atomic():
+        if before is not None:
+            _add_facet_count(before, -1)
+        _add_facet_count(after, 1)
+
+
+def _facet_lookups(selected: dict[str, list], skip: str | None = None):
+    return {
+        f'{field}__in': values
+        for field, values in selected.items()
+        if values and field != skip
+    }
+
+
+def _counts(rows, field):
+    return [
+        {'value': row[field], 'count': row['count']}
+        for row in rows if row['count']
+    ]
+
+
+def facet_counts(selected: dict[str, list]) -> dict:
+    """
+    Per-facet counts from the `ChannelFacetCount` table.
+
+    Counts of a facet respect the selection of the other facets but not
+    its own, so every value shows how many channels choosing it would
+    give (values of one facet are combined with OR).
+
+    Parameters:
+        selected (dict): Facet field -> selected values
+
+    Returns:
+        dict: `total` of channels matching the selection and, for every
+              facet, a list of `{'value', 'count'}` sorted by count
+    """
+    table = ChannelFacetCount.objects.order_by()
+    facets = {
+        field: _counts(
+            table.filter(**_facet_lookups(selected, skip=field))
+            .values(field)
+            .annotate(count=Sum('channels'))
+            .order_by('-count', field),
+            field,
+        )
+        for field in FACET_FIELDS
+    }
+    facets['total'] = table.filter(
+        **_facet_lookups(selected)
+    ).aggregate(total=Sum('channels'))['total'] or 0
+    return facets
+
+
+def filtered_facet_counts(selected: dict[str, list], ranges: dict) -> dict:
+    """
+    Per-facet counts when participants/views ranges are applied.
+
+    Ranges are not dimensions of the facet table, so the counts are taken
+    from the channels matching the ranges (through the composite indexes)
+    and cached per filter combination until new data is saved.
+    """
+    params = urlencode(sorted({**selected, **ranges}.items()), doseq=True)
+    key = versioned_key(
+        CACHE_NAMESPACE, 'facets', hashlib.md5(params.encode()).hexdigest()
+    )
+    facets = cache.get(key)
+    if facets is not None:
+        return facets
+
+    channels = TelegramChannel.objects.order_by().filter(**ranges)
+    facets = {
+        field: _counts(
+            channels.filter(**_facet_lookups(selected, skip=field))
+            .values(field)
+            .annotate(count=Count('id'))
+            .order_by('-count', field),
+            field,
+        )
+        for field in FACET_FIELDS
+    }
+    facets['total'] = channels.filter(**_facet_lookups(selected)).count()
+    cache.set(key, facets, settings.PARSER_STATS_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,168 @@
+"""
+Custom action for "parser" application.
+Converts the ChannelStats table into a PostgreSQL table partitioned by month
+of `parsed_at` and keeps partitions created ahead of time.
+
+Every parse adds a row per channel, so the table grows without bound.
+With monthly partitions queries over recent stats touch only the recent
+partitions, and old months can be detached or dropped without a long
+DELETE.
+
+How to:
+    uv run python manage.py partition_channel_stats --months-ahead 3
+    uv run python manage.py partition_channel_stats --dry-run
+
+The first run rebuilds the table in one transaction (the table is locked
+while rows are copied); later runs only add the missing future partitions,
+so the command is safe to run monthly from cron. Rows outside of every
+partition land in the default partition.
+
+P.S.:
+    On databases other than PostgreSQL (SQLite in development) the command
+    does nothing
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.parser.models import ChannelStats
+
+
+def month_start(day: date, shift: int = 0) -> date:
+    """First day of the month `shift` months after the month of `day`"""
+    month = day.year * 12 + day.month - 1 + shift
+    return date(month // 12, month % 12 + 1, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Partition ChannelStats by month of parsed_at (PostgreSQL only) "
+        "and create partitions ahead of time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead", type=int, default=3,
+            help="Partitions to keep created after the current month.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Print the SQL without running it.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                f"Partitioning needs PostgreSQL, database is "
+                f"{connection.vendor}: nothing to do."
+            ))
+            return
+
+        self.table = ChannelStats._meta.db_table
+        self.dry_run = options["dry_run"]
+        last = month_start(timezone.now().date(), options["months_ahead"])
+        with transaction.atomic(), connection.cursor() as cursor:
+            self.cursor = cursor
+            if self._is_partitioned():
+                created = self._create_partitions(
+                    month_start(timezone.now().date()), last
+                )
+            else:
+                created = self._partition_table(last)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{self.table}: {created} partition(s) created"
+            + (" (dry run)" if self.dry_run else "")
+        ))
+
+    def _execute(self, sql, params=None):
+        if self.dry_run:
+            self.stdout.write(f"{sql};")
+        else:
+            self.cursor.execute(sql, params)
+
+    def _is_partitioned(self) -> bool:
+        self.cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = %s::regclass",
+            [self.table],
+        )
+        return self.cursor.fetchone() is not None
+
+    def _partition_table(self, last: date) -> int:
+        """Rebuild the table as partitioned up to the month of `last`"""
+        table, old = self.table, f"{self.table}_unpartitioned"
+        self.cursor.execute(f"SELECT MIN(parsed_at) FROM {table}")
+        oldest = self.cursor.fetchone()[0]
+        oldest = oldest.date() if oldest else timezone.now().date()
+
+        # Indexes and foreign keys are replayed on the new table as they are
+        self.cursor.execute(
+            "SELECT indexdef FROM pg_indexes "
+            "WHERE tablename = %s AND indexname != %s",
+            [table, f"{table}_pkey"],
+        )
+        indexes = [row[0] for row in self.cursor.fetchall()]
+        self.cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = self.cursor.fetchall()
+
+        self._execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        self._execute(f"ALTER TABLE {table} RENAME TO {old}")
+        # Without the identity: partitioned tables take a plain sequence
+        self._execute(
+            f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE (parsed_at)"
+        )
+        self._execute(
+            f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"
+        )
+        # Partitions go first: rows in the default one would block them
+        created = self._create_partitions(month_start(oldest), last)
+        self._execute(f"INSERT INTO {table} SELECT * FROM {old}")
+        self._execute(f"DROP TABLE {old}")
+
+        self._execute(
+            f"CREATE SEQUENCE {table}_id_seq OWNED BY {table}.id"
+        )
+        self._execute(
+            f"ALTER TABLE {table} ALTER COLUMN id "
+            f"SET DEFAULT nextval('{table}_id_seq')"
+        )
+        self._execute(
+            f"SELECT setval('{table}_id_seq', "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+        )
+        # The partition key has to be part of the primary key
+        self._execute(
+            f"ALTER TABLE {table} ADD PRIMARY KEY (id, parsed_at)"
+        )
+        for indexdef in indexes:
+            self._execute(indexdef)
+        for name, definition in foreign_keys:
+            self._execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}"
+            )
+        return created
+
+    def _create_partitions(self, first: date, last: date) -> int:
+        """Create monthly partitions from `first` to `last` inclusive"""
+        created = 0
+        month = first
+        while month <= last:
+            following = month_start(month, 1)
+            name = f"{self.table}_{month:%Y_%m}"
+            self.cursor.execute("SELECT to_regclass(%s)", [name])
+            if self.cursor.fetchone()[0] is None:
+                self._execute(
+                    f"CREATE TABLE {name} PARTITION OF {self.table} "
+                    f"FOR VALUES FROM ('{month}') TO ('{following}')"
+                )
+                created += 1
+            month = following
+        return created
@@ -0,0 +1,125 @@
+"""
+Custom action for "parser" application.
+Rebuilds ChannelStatsRollup (day/week/month) from the raw ChannelStats.
+
+The parse pipeline keeps rollups up to date on its own; this command
+backfills them for stats saved before rollups existed, or repairs them.
+Channels are processed in chunks, each chunk in its own transaction, so
+the command can be stopped and restarted with `--from-id`.
+
+Stats older than STATS_FULL_RESOLUTION_DAYS are downsampled by the
+retention task, so only periods starting inside that window are rebuilt;
+older rollups are the accurate ones and stay as they are. `--all`
+rebuilds every period and is only safe before retention has run.
+
+How to:
+    uv run python manage.py rebuild_rollups --chunk 500
+    uv run python manage.py rebuild_rollups --from-id 12000
+    uv run python manage.py rebuild_rollups --all
+"""
+from datetime import datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.parser.models import ChannelStats, ChannelStatsRollup, TelegramChannel
+from apps.parser.rollups import (
+    PERIODS,
+    apply_stat,
+    next_period_start,
+    save_rollups,
+)
+
+
+class Command(BaseCommand):
+    help = "Rebuild channel stats rollups from ChannelStats in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk", type=int, default=500,
+            help="Channels per transaction.",
+        )
+        parser.add_argument(
+            "--from-id", type=int, default=0,
+            help="Start from this channel primary key (resume).",
+        )
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Rebuild periods older than the full resolution window "
+                 "too (overwrites rollups of downsampled stats).",
+        )
+
+    def handle(self, *args, **options):
+        chunk = options["chunk"]
+        last_pk = options["from_id"] - 1
+        channels = rollups = 0
+        first = None
+        if not options["all"]:
+            since = timezone.now() - timedelta(
+                days=settings.STATS_FULL_RESOLUTION_DAYS
+            )
+            # period -> first period start with full resolution stats
+            first = {
+                period: next_period_start(since, period) for period in PERIODS
+            }
+
+        while True:
+            pks = list(
+                TelegramChannel.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:chunk]
+            )
+            if not pks:
+                break
+            rollups += self._rebuild(pks, first)
+            channels += len(pks)
+            last_pk = pks[-1]
+            self.stdout.write(
+                f"{channels} channels done, last id {last_pk}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollups rebuilt: {channels} channels, {rollups} rollups"
+        ))
+
+    def _rebuild(self, pks: list[int], first: dict | None) -> int:
+        built = {}
+        stats = ChannelStats.objects.filter(channel_id__in=pks)
+        rollups = ChannelStatsRollup.objects.filter(channel_id__in=pks)
+        if first is not None:
+            stats = stats.filter(parsed_at__gte=datetime.combine(
+                min(first.values()), time.min, tzinfo=dt_timezone.utc
+            ))
+            rollups = rollups.filter(reduce(or_, (
+                Q(period=period, period_start__gte=start)
+                for period, start in first.items()
+            )))
+        stats = (
+            stats
+            .order_by("parsed_at")
+            .values_list(
+                "channel_id", "participants_count", "daily_growth",
+                "parsed_at",
+            )
+        )
+        for channel_id, participants, growth, parsed_at in stats.iterator(
+            chunk_size=10_000
+        ):
+            apply_stat(built, channel_id, participants, growth, parsed_at)
+        if first is not None:
+            # Weeks and months started before the window are left alone
+            built = {
+                key: rollup for key, rollup in built.items()
+                if key[2] >= first[key[1]]
+            }
+
+        with transaction.atomic():
+            rollups.delete()
+            save_rollups(built.values())
+        return len(built)
@@ -16,6 +16,9 @@ Variables:
     ENV_API_HASH_KEY = Telegram app api_hash key name in .env
     ENV_PHONE_KEY = Telegram account phone key name in .env
     ENV_PASSWORD_KEY = Telegram account password key name in .env
+    DEFAULT_ACCOUNT = account stored under the keys above, every other
+    account gets its own keys with a `_<NAME>` suffix
+    (e.g. TELEGRAM_SESSION_STRING_SECOND, PHONE_SECOND)
 
 P.S.:
     This class can be used at any time and does not require starting up anything
@@ -38,6 +41,14 @@ ENV_API_HASH_KEY = 'TELEGRAM_API_HASH'
 ENV_PASSWORD_KEY = 'TELEGRAM_PASSWORD'
 ENV_PHONE_KEY = 'PHONE'
 ENV_PATH = '/'
+DEFAULT_ACCOUNT = 'default'
+
+
+def account_env_key(key: str, account: str) -> str:
+    """Name of a per-account .env key, e.g. PHONE -> PHONE_SECOND"""
+    if account == DEFAULT_ACCOUNT:
+        return key
+    return f'{key}_{account.upper()}'
 
 
 class Command(BaseCommand):
@@ -66,7 +77,10 @@ class Command(BaseCommand):
     when: use passed data and what data is not passed should be loaded from .env
     4. uv run python manage.py set_telegram_session --api-id 123 --api-hash 123abc --phone +71235456789
     when: use passed data and what data is not passed should be loaded from .env
-    5. uv run python manage.py set_telegram_session chilling
+    5. uv run python manage.py set_telegram_session --account second
+           --phone +71235456780
+    when: register one more Telegram account for parsing (once per account)
+    6. uv run python manage.py set_telegram_session chilling
     when: u r tired and want to receive argparse.ArgumentError
     """
 
@@ -84,6 +98,7 @@ class Command(BaseCommand):
         self.phone: Optional[str] = None
         self.password: Optional[str] = None
         self.env_path: Optional[str] = None
+        self.account: str = DEFAULT_ACCOUNT
 
     # argparse arguments
     def add_arguments(self, parser: CommandParser) -> None:
@@ -96,6 +111,8 @@ class Command(BaseCommand):
         - --api-hash: override TELEGRAM_API_HAS in .env
         - --phone: override PHONE in .env
         - --env-path: override path to .env
+        - --account: name of the Telegram account to register
+          (default: default)
         """
         parser.add_argument(
             '--force',
@@ -138,6 +155,13 @@ class Command(BaseCommand):
             type=str,
             help='Set this string as a path to .env'
         )
+        parser.add_argument(
+            '--account',
+            dest='account',
+            type=str,
+            default=DEFAULT_ACCOUNT,
+            help='Telegram account name, keys in .env get a _<NAME> suffix'
+        )
         # is it needed?
         # return super().add_arguments(parser)
 
@@ -171,6 +195,8 @@ class Command(BaseCommand):
         force, string_session, api_id, api_hash, password, phone, env_path = \
             itemgetter('force', 'string_session', 'api_id', \
                         'api_hash', 'password', 'phone', 'env_path')(options)
+        self.account = (options.get('account') or DEFAULT_ACCOUNT).lower()
+        session_key = account_env_key(ENV_STRING_SESSION_KEY, self.account)
 
         # Set env path
         if env_path:
@@ -188,16 +214,24 @@ class Command(BaseCommand):
         load_dotenv(self.env_path)
 
         # Set inputs
-        self.replace_env_data('string_session', ENV_STRING_SESSION_KEY, string_session, str, force)
+        self.replace_env_data(
+            'string_session', session_key, string_session, str, force
+        )
         self.replace_env_data('api_id', ENV_API_ID_KEY, api_id, int, force)
         self.replace_env_data('api_hash', ENV_API_HASH_KEY, api_hash, str, force)
-        self.replace_env_data('password', ENV_PASSWORD_KEY, password, str, force)
-        self.replace_env_data('phone', ENV_PHONE_KEY, phone, str, force)
+        self.replace_env_data(
+            'password', account_env_key(ENV_PASSWORD_KEY, self.account),
+            password, str, force,
+        )
+        self.replace_env_data(
+            'phone', account_env_key(ENV_PHONE_KEY, self.account),
+            phone, str, force,
+        )
 
         # If user provided a new StringSession via CLI, use it and start TelegramClient
         if string_session:
             self.ensure_required(['api_id', 'api_hash'])
-            self.set_string_session(ENV_STRING_SESSION_KEY)
+            self.set_string_session(session_key)
             asyncio.run(self.start_telegram_session())
             return
 
@@ -210,7 +244,7 @@ class Command(BaseCommand):
         # No StringSession present and is --force if happen here, so get StringSession and start TelegramClient
         self.ensure_required(['api_id', 'api_hash', 'phone'])
         asyncio.run(self.get_string_session())
-        self.set_string_session(ENV_STRING_SESSION_KEY)
+        self.set_string_session(session_key)
         asyncio.run(self.start_telegram_session())
 
     def replace_env_data(
@@ -309,8 +343,12 @@ class Command(BaseCommand):
             await client.connect()
             if not await client.is_user_authorized():
                 # Try to login if we have phone/password (fallback to env for convenience)
-                phone = self.phone or getenv(ENV_PHONE_KEY)
-                password = self.password or getenv(ENV_PASSWORD_KEY)
+                phone = self.phone or getenv(
+                    account_env_key(ENV_PHONE_KEY, self.account)
+                )
+                password = self.password or getenv(
+                    account_env_key(ENV_PASSWORD_KEY, self.account)
+                )
                 try:
                     await client.start(phone=phone, password=password)
                 except ValueError as e:
@@ -323,10 +361,17 @@ class Command(BaseCommand):
                     raise CommandError(f'Wrong password. Please check for typos. Quotation marks \' or \" are not needed.')
                 # Set StrinGseeion
                 self.string_session = client.session.save()
-                set_key(self.env_path, ENV_STRING_SESSION_KEY, self.string_session)
+                set_key(
+                    self.env_path,
+                    account_env_key(ENV_STRING_SESSION_KEY, self.account),
+                    self.string_session,
+                )
                 self.stdout.write('Telegram session authorized and updated in .env.')
             user_ = await client.get_me()
             self.stdout.write(f'Telegram session is active. Logged in as: {getattr(user_, "username", None) or user_.id}')
+            self.stdout.write(
+                f'Account "{self.account}" is registered for parsing.'
+            )
         except Exception as e:
             raise CommandError(f'This is bad: {e}') from e
 
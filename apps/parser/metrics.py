@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import numpy as np
+
+# Post age bins (hours) of the views curve: <1 day, 1-2 days, 2-3 days,
+# 3-7 days, older
+AGE_BINS = np.array([24, 48, 72, 168])
+# TelegramChannel fields written by the metrics stage
+METRIC_FIELDS = ('engagement_rate', 'posts_per_day', 'views_curve')
+
+
+def _timestamp(value) -> float:
+    if not value:
+        return np.nan
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def _post_arrays(batch: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    """Views and publication timestamps as (channels x posts) arrays,
+    padded with NaN"""
+    width = max((len(data.get('last_messages') or []) for data in batch),
+                default=0)
+    views = np.full((len(batch), width), np.nan)
+    dates = np.full((len(batch), width), np.nan)
+    for row, data in enumerate(batch):
+        posts = data.get('last_messages') or []
+        views[row, :len(posts)] = [
+            post.get('post_views') or np.nan for post in posts
+        ]
+        dates[row, :len(posts)] = [
+            _timestamp(post.get('post_date')) for post in posts
+        ]
+    return views, dates
+
+
+def channel_metrics(batch: list[dict], now: datetime) -> list[dict]:
+    """
+    Engagement metrics of a batch of parsed channels, computed with NumPy
+    arrays over the whole batch at once.
+
+    Metrics:
+        engagement_rate: average views / participants
+        posts_per_day: posting frequency over the parsed posts
+        views_curve: average views of posts by age (see `AGE_BINS`)
+                     relative to the average of all parsed posts, None for
+                     ages without posts
+
+    Parameters:
+        batch (list): `tg_parser` results (`participants_count`,
+                      `average_views`, `last_messages` with `post_views`
+                      and `post_date`)
+        now (datetime): Moment the ages of the posts are counted from
+
+    Returns:
+        list: One dict of `METRIC_FIELDS` per channel, in batch order
+    """
+    if not batch:
+        return []
+    participants = np.array(
+        [data.get('participants_count') or 0 for data in batch], dtype=float
+    )
+    average_views = np.array(
+        [data.get('average_views') or 0 for data in batch], dtype=float
+    )
+    views, dates = _post_arrays(batch)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        engagement = np.where(
+            participants > 0, average_views / participants, 0.0
+        )
+
+        # Frequency: intervals between the first and the last parsed post
+        dated = ~np.isnan(dates)
+        posts = dated.sum(axis=1)
+        first = np.where(dated, dates, np.inf).min(axis=1, initial=np.inf)
+        last = np.where(dated, dates, -np.inf).max(axis=1, initial=-np.inf)
+        span_days = (last - first) / 86400
+        per_day = np.where(
+            (posts > 1) & (span_days > 0), (posts - 1) / span_days, 0.0
+        )
+
+        # Views curve: mean views per age bin over the mean of the channel
+        valid = dated & ~np.isnan(views)
+        filled = np.where(valid, views, 0.0)
+        mean = filled.sum(axis=1) / valid.sum(axis=1)
+        bins = np.digitize((now.timestamp() - dates) / 3600, AGE_BINS)
+        curve = np.full((len(batch), len(AGE_BINS) + 1), np.nan)
+        for index in range(len(AGE_BINS) + 1):
+            in_bin = valid & (bins == index)
+            curve[:, index] = (
+                np.where(in_bin, filled, 0.0).sum(axis=1)
+                / in_bin.sum(axis=1) / mean
+            )
+
+    curve = np.round(curve, 3)
+    return [
+        {
+            'engagement_rate': round(float(engagement[row]), 5),
+            'posts_per_day': round(float(per_day[row]), 2),
+            'views_curve': [
+                None if np.isnan(value) else float(value)
+                for value in curve[row]
+            ],
+        }
+        for row in range(len(batch))
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:58
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_last_stats(apps, schema_editor):
+    """Fill the new fields from the latest ChannelStats of every channel"""
+    TelegramChannel = apps.get_model('parser', 'TelegramChannel')
+    ChannelStats = apps.get_model('parser', 'ChannelStats')
+    last_stats = ChannelStats.objects.filter(
+        channel=OuterRef('pk')
+    ).order_by('-parsed_at')
+    TelegramChannel.objects.filter(
+        channelstats__isnull=False
+    ).update(
+        stats_participants_count=Subquery(
+            last_stats.values('participants_count')[:1]
+        ),
+        stats_parsed_at=Subquery(last_stats.values('parsed_at')[:1]),
+        daily_growth=Subquery(last_stats.values('daily_growth')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parser', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telegramchannel',
+            name='daily_growth',
+            field=models.IntegerField(default=0, verbose_name='Прирост за день'),
+        ),
+        migrations.AddField(
+            model_name='telegramchannel',
+            name='stats_parsed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата последней статистики'),
+        ),
+        migrations.AddField(
+            model_name='telegramchannel',
+            name='stats_participants_count',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Подписчиков в последней статистике'),
+        ),
+        migrations.RunPython(copy_last_stats, migrations.RunPython.noop),
+    ]
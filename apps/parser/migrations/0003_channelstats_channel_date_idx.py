@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parser', '0002_channel_last_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='channelstats',
+            index=models.Index(fields=['channel', '-parsed_at'], name='channelstats_channel_date_idx'),
+        ),
+    ]
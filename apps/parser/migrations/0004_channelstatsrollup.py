@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parser', '0003_channelstats_channel_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelStatsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'День'), ('week', 'Неделя'), ('month', 'Месяц')], max_length=5, verbose_name='Период')),
+                ('period_start', models.DateField(verbose_name='Начало периода')),
+                ('participants_min', models.IntegerField(verbose_name='Минимум подписчиков')),
+                ('participants_max', models.IntegerField(verbose_name='Максимум подписчиков')),
+                ('participants_last', models.IntegerField(verbose_name='Подписчиков на конец периода')),
+                ('growth', models.IntegerField(default=0, verbose_name='Прирост за период')),
+                ('last_parsed_at', models.DateTimeField(verbose_name='Дата последней статистики')),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='parser.telegramchannel', verbose_name='Канал')),
+            ],
+            options={
+                'verbose_name': 'Сводка статистики канала',
+                'verbose_name_plural': 'Сводки статистики каналов',
+                'ordering': ['period_start'],
+                'unique_together': {('channel', 'period', 'period_start')},
+            },
+        ),
+    ]
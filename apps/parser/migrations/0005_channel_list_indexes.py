@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parser', '0004_channelstatsrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='telegramchannel',
+            index=models.Index(fields=['participants_count', 'id'], name='channel_participants_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='telegramchannel',
+            index=models.Index(fields=['parsed_at', 'id'], name='channel_parsed_at_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:06
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Russian and English stemming for texts, 'simple' keeps usernames as is
+SEARCH_FUNCTION = """
+CREATE OR REPLACE FUNCTION parser_telegramchannel_search_vector()
+RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.username, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+SEARCH_TRIGGER = """
+CREATE TRIGGER parser_telegramchannel_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, username, description
+ON parser_telegramchannel
+FOR EACH ROW EXECUTE FUNCTION parser_telegramchannel_search_vector()
+"""
+
+
+def create_search(apps, schema_editor):
+    """Trigger, backfill and indexes; PostgreSQL only (SQLite uses icontains)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(SEARCH_FUNCTION)
+    schema_editor.execute(SEARCH_TRIGGER)
+    schema_editor.execute('UPDATE parser_telegramchannel SET title = title')
+    schema_editor.execute(
+        'CREATE INDEX channel_search_vector_idx '
+        'ON parser_telegramchannel USING GIN (search_vector)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX channel_username_trgm_idx '
+        'ON parser_telegramchannel USING GIN (username gin_trgm_ops)'
+    )
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS channel_username_trgm_idx')
+    schema_editor.execute('DROP INDEX IF EXISTS channel_search_vector_idx')
+    schema_editor.execute(
+        'DROP TRIGGER IF EXISTS parser_telegramchannel_search_vector_trigger '
+        'ON parser_telegramchannel'
+    )
+    schema_editor.execute(
+        'DROP FUNCTION IF EXISTS parser_telegramchannel_search_vector()'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parser', '0005_channel_list_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='telegramchannel',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search, drop_search),
+    ]
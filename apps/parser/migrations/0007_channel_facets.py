@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:07
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_facet_counts(apps, schema_editor):
+    TelegramChannel = apps.get_model('parser', 'TelegramChannel')
+    ChannelFacetCount = apps.get_model('parser', 'ChannelFacetCount')
+    ChannelFacetCount.objects.bulk_create(
+        ChannelFacetCount(**row)
+        for row in TelegramChannel.objects.order_by()
+        .values('category', 'country', 'language')
+        .annotate(channels=Count('id'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parser', '0006_channel_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(blank=True, null=True, verbose_name='Категория канала')),
+                ('country', models.CharField(blank=True, null=True, verbose_name='Страна канала')),
+                ('language', models.CharField(blank=True, null=True, verbose_name='Язык канала')),
+                ('channels', models.IntegerField(default=0, verbose_name='Количество каналов')),
+            ],
+            options={
+                'verbose_name': 'Счётчик фасетов каталога',
+                'verbose_name_plural': 'Счётчики фасетов каталога',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='telegramchannel',
+            index=models.Index(fields=['category', 'participants_count', 'id'], name='channel_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='telegramchannel',
+            index=models.Index(fields=['country', 'participants_count', 'id'], name='channel_country_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='telegramchannel',
+            index=models.Index(fields=['language', 'participants_count', 'id'], name='channel_language_idx'),
+        ),
+        migrations.RunPython(fill_facet_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parser', '0007_channel_facets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('participants', 'Подписчики'), ('growth', 'Прирост'), ('views', 'Средние просмотры')], max_length=12, verbose_name='Метрика')),
+                ('category', models.CharField(blank=True, default='', verbose_name='Категория')),
+                ('rank', models.PositiveIntegerField(verbose_name='Место')),
+                ('previous_rank', models.PositiveIntegerField(blank=True, null=True, verbose_name='Место в прошлом рейтинге')),
+                ('value', models.IntegerField(verbose_name='Значение метрики')),
+                ('computed_at', models.DateTimeField(verbose_name='Дата расчёта')),
+                ('channel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='parser.telegramchannel', verbose_name='Канал')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Рейтинги каналов',
+                'unique_together': {('metric', 'category', 'rank')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parser', '0008_channel_ranking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telegramchannel',
+            name='engagement_rate',
+            field=models.FloatField(default=0, verbose_name='Вовлечённость (просмотры / подписчики)'),
+        ),
+        migrations.AddField(
+            model_name='telegramchannel',
+            name='posts_per_day',
+            field=models.FloatField(default=0, verbose_name='Постов в день'),
+        ),
+        migrations.AddField(
+            model_name='telegramchannel',
+            name='views_curve',
+            field=models.JSONField(blank=True, default=list, verbose_name='Просмотры по возрасту постов'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parser', '0009_channel_engagement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telegramchannel',
+            name='last_post_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='ID последнего поста'),
+        ),
+        migrations.AddField(
+            model_name='telegramchannel',
+            name='recent_views',
+            field=models.JSONField(blank=True, default=list, verbose_name='Просмотры последних постов'),
+        ),
+    ]
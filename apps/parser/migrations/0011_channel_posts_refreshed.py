@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parser', '0010_channel_last_post'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telegramchannel',
+            name='posts_refreshed_at',
+            field=models.DateTimeField(
+                blank=True, null=True,
+                verbose_name='Дата полного обновления постов',
+            ),
+        ),
+    ]
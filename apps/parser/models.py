@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from apps.users.models import User
 
@@ -19,10 +20,72 @@ class TelegramChannel(models.Model):
     category = models.CharField(blank=True, null=True, db_index=True, verbose_name='Категория канала')
     country = models.CharField(blank=True, null=True, verbose_name='Страна канала')
     language = models.CharField(blank=True, null=True, verbose_name='Язык канала')
+    # Копия последней записи ChannelStats:
+    # прирост считается без запроса к истории
+    stats_participants_count = models.IntegerField(
+        blank=True, null=True,
+        verbose_name='Подписчиков в последней статистике',
+    )
+    stats_parsed_at = models.DateTimeField(
+        blank=True, null=True,
+        verbose_name='Дата последней статистики',
+    )
+    daily_growth = models.IntegerField(
+        default=0, verbose_name='Прирост за день'
+    )
+    # Метрики вовлечённости, считаются при сохранении (apps.parser.metrics)
+    engagement_rate = models.FloatField(
+        default=0, verbose_name='Вовлечённость (просмотры / подписчики)'
+    )
+    posts_per_day = models.FloatField(default=0, verbose_name='Постов в день')
+    views_curve = models.JSONField(
+        blank=True, default=list,
+        verbose_name='Просмотры по возрасту постов',
+    )
+    last_post_id = models.BigIntegerField(
+        null=True, blank=True, verbose_name='ID последнего поста'
+    )
+    recent_views = models.JSONField(
+        blank=True, default=list,
+        verbose_name='Просмотры последних постов',
+    )
+    posts_refreshed_at = models.DateTimeField(
+        blank=True, null=True,
+        verbose_name='Дата полного обновления постов',
+    )
+    # Заполняется триггером PostgreSQL из title, username и description
+    # (см. apps.parser.search)
+    search_vector = SearchVectorField(
+        blank=True, null=True, editable=False,
+        verbose_name='Поисковый вектор',
+    )
 
     class Meta:
         verbose_name = 'Telegram канал'
         verbose_name_plural = 'Telegram каналы'
+        indexes = [
+            # Ключи курсорной пагинации каталога
+            models.Index(
+                fields=['participants_count', 'id'],
+                name='channel_participants_idx',
+            ),
+            models.Index(
+                fields=['parsed_at', 'id'], name='channel_parsed_at_idx'
+            ),
+            # Фасеты каталога: фильтр по значению + сортировка по подписчикам
+            models.Index(
+                fields=['category', 'participants_count', 'id'],
+                name='channel_category_idx',
+            ),
+            models.Index(
+                fields=['country', 'participants_count', 'id'],
+                name='channel_country_idx',
+            ),
+            models.Index(
+                fields=['language', 'participants_count', 'id'],
+                name='channel_language_idx',
+            ),
+        ]
 
     def last_stat(self):
         """Получение последней статистики канала"""
@@ -86,10 +149,141 @@ class ChannelStats(models.Model):
         verbose_name_plural = "Статистика каналов"
         get_latest_by = 'parsed_at'
         ordering = ['-parsed_at']
+        indexes = [
+            # Статистика всегда читается по каналу от новых к старым
+            models.Index(
+                fields=['channel', '-parsed_at'],
+                name='channelstats_channel_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.channel} - {self.parsed_at}"
 
 
+class ChannelStatsRollup(models.Model):
+    """Сводка статистики канала за день, неделю или месяц"""
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+    PERIOD_CHOICES = [
+        (DAY, 'День'),
+        (WEEK, 'Неделя'),
+        (MONTH, 'Месяц'),
+    ]
+
+    channel = models.ForeignKey(
+        TelegramChannel, on_delete=models.CASCADE,
+        related_name='rollups', verbose_name='Канал',
+    )
+    period = models.CharField(
+        max_length=5, choices=PERIOD_CHOICES, verbose_name='Период'
+    )
+    period_start = models.DateField(verbose_name='Начало периода')
+    participants_min = models.IntegerField(verbose_name='Минимум подписчиков')
+    participants_max = models.IntegerField(verbose_name='Максимум подписчиков')
+    participants_last = models.IntegerField(
+        verbose_name='Подписчиков на конец периода'
+    )
+    growth = models.IntegerField(default=0, verbose_name='Прирост за период')
+    last_parsed_at = models.DateTimeField(
+        verbose_name='Дата последней статистики'
+    )
+
+    class Meta:
+        verbose_name = 'Сводка статистики канала'
+        verbose_name_plural = 'Сводки статистики каналов'
+        unique_together = ['channel', 'period', 'period_start']
+        ordering = ['period_start']
+
+    def __str__(self):
+        return (
+            f"{self.channel} - {self.get_period_display()} "
+            f"{self.period_start}"
+        )
+
+
+class ChannelFacetCount(models.Model):
+    """
+    Число каналов для каждой комбинации фасетов каталога.
+    Пересчитывается после парсинга (apps.parser.facets.refresh_facet_counts),
+    чтобы счётчики фасетов не требовали GROUP BY по всем каналам.
+    """
+    category = models.CharField(
+        blank=True, null=True, verbose_name='Категория канала'
+    )
+    country = models.CharField(
+        blank=True, null=True, verbose_name='Страна канала'
+    )
+    language = models.CharField(
+        blank=True, null=True, verbose_name='Язык канала'
+    )
+    channels = models.IntegerField(
+        default=0, verbose_name='Количество каналов'
+    )
+
+    class Meta:
+        verbose_name = 'Счётчик фасетов каталога'
+        verbose_name_plural = 'Счётчики фасетов каталога'
+
+    def __str__(self):
+        return (
+            f"{self.category} / {self.country} / {self.language}: "
+            f"{self.channels}"
+        )
+
+
+class ChannelRanking(models.Model):
+    """
+    Место канала в рейтинге (общем или по категории) по одной метрике.
+    Пересчитывается после парсинга (apps.parser.rankings.refresh_rankings),
+    чтобы топы читались по индексу страницами.
+    """
+    PARTICIPANTS = 'participants'
+    GROWTH = 'growth'
+    VIEWS = 'views'
+    METRIC_CHOICES = [
+        (PARTICIPANTS, 'Подписчики'),
+        (GROWTH, 'Прирост'),
+        (VIEWS, 'Средние просмотры'),
+    ]
+
+    metric = models.CharField(
+        max_length=12, choices=METRIC_CHOICES, verbose_name='Метрика'
+    )
+    # Пустая строка - общий рейтинг
+    category = models.CharField(
+        blank=True, default='', verbose_name='Категория'
+    )
+    rank = models.PositiveIntegerField(verbose_name='Место')
+    previous_rank = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name='Место в прошлом рейтинге'
+    )
+    channel = models.ForeignKey(
+        TelegramChannel, on_delete=models.CASCADE,
+        related_name='rankings', verbose_name='Канал',
+    )
+    value = models.IntegerField(verbose_name='Значение метрики')
+    computed_at = models.DateTimeField(verbose_name='Дата расчёта')
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Рейтинги каналов'
+        unique_together = ['metric', 'category', 'rank']
+
+    def __str__(self):
+        return (
+            f"{self.get_metric_display()} {self.category or '*'} "
+            f"#{self.rank}: {self.channel_id}"
+        )
+
+    @property
+    def movement(self):
+        """На сколько мест канал поднялся (None - новый в рейтинге)"""
+        if self.previous_rank is None:
+            return None
+        return self.previous_rank - self.rank
+
+
 # Create your models here.
 
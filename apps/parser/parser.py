@@ -1,7 +1,7 @@
 import asyncio
 import logging
 import random
-import time
+from collections.abc import AsyncIterator, Iterable
 
 from telethon import TelegramClient
 from telethon.errors import (
@@ -13,33 +13,69 @@ from telethon.errors import (
 )
 from telethon.tl.functions.channels import GetFullChannelRequest
 
+from apps.parser.ratelimit import AsyncTokenBucket, get_rate_limiter
+
 log = logging.getLogger(__name__)
 
+RETRY_AFTER = "retry_after"
+
+
+def flood_wait_result(
+    error: FloodWaitError, rate_limiter: AsyncTokenBucket
+) -> dict:
+    """Pause the account and describe when the channel can be retried"""
+    # recommended time + random interval
+    seconds = error.seconds + random.uniform(1.0, 2.0)
+    rate_limiter.pause(seconds)
+    return {RETRY_AFTER: seconds}
+
 
-async def tg_parser(url: str, client: TelegramClient, limit: int = 10) -> dict:
+async def tg_parser(
+    url: str,
+    client: TelegramClient,
+    limit: int = 10,
+    rate_limiter: AsyncTokenBucket | None = None,
+    min_id: int | None = None,
+) -> dict:
     """
     Telegram channel parser function. Retrieves channel data including:
     name, ID, description, subscriber count, pinned message, and recent posts.
 
+    With `min_id` (the last post seen by the previous parse) only newer
+    posts are requested, so a quiet channel transfers no message payload;
+    `ChannelSink` merges them into the stored rolling window of posts.
+
     Parameters:
         url (str): URL of the Telegram channel in any valid format
                    (e.g., `https://t.me/example`, `t.me/example`, `@example`, `example`)
         client (TelegramClient): A Telegram client instance from the `telethon` library
         limit (int): Number of messages to parse (default: 10)
+        rate_limiter (AsyncTokenBucket): Anti-flood pacing shared by every
+                   caller using the same account (default: `default` account)
+        min_id (int): Fetch only posts with a greater id (default: fetch
+                   the latest posts)
 
     Returns:
-        data (dict): A dictionary containing the parsed Telegram channel data
+        data (dict): A dictionary containing the parsed Telegram channel data.
+                   On FloodWait it is `{"retry_after": seconds}` only: the
+                   account is paused and the caller decides when to retry.
+
+    Raises:
+        AuthKeyError, ConnectionError: The client is broken; raised for
+                   `TelegramClientPool` to reconnect and retry
 
     Note:
         This function requires a registered Telegram API application to work.
     """
     data = {}
+    channel = None
     full_channel = None
     pinned_messages = None
+    rate_limiter = rate_limiter or get_rate_limiter()
 
     try:
-        # Anti-flood - remove when dedicated number is assigned
-        time.sleep(1)
+        # Anti-flood: wait for a request slot without blocking the event loop
+        await rate_limiter.acquire()
         # Gets channel information
         channel = await client.get_entity(url)
 
@@ -50,29 +86,42 @@ async def tg_parser(url: str, client: TelegramClient, limit: int = 10) -> dict:
         # Channel creation date
         data["creation_date"] = channel.date.isoformat() if channel.date else None
         # Fetches last channel posts
-
-        last_messages = await client.get_messages(channel, limit=limit * 3)
-        # Calculates average views of recent posts
+        await rate_limiter.acquire()
+        if min_id:
+            # Only posts published since the previous parse
+            last_messages = await client.get_messages(
+                channel, limit=limit * 3, min_id=min_id
+            )
+        else:
+            last_messages = await client.get_messages(channel, limit=limit * 3)
+            # Latest posts with current views: the stored window is renewed
+            data["posts_refreshed"] = True
         data["last_messages"] = [
-            {"post_id": post.id, "post_text": post.text, "post_views": post.views}
+            {
+                "post_id": post.id,
+                "post_text": post.text,
+                "post_views": post.views,
+                "post_date": post.date.isoformat() if post.date else None,
+            }
             for post in last_messages[:limit]
         ]
-        total_views = 0
-        total_posts = 0
-
-        for post in last_messages:
-            if post.views:
-                total_views += post.views
-                total_posts += 1
-        average_views = total_views // total_posts
-        data["average_views"] = average_views
+        # Views of every fetched post, merged into the rolling window
+        data["recent_views"] = [
+            {
+                "post_id": post.id,
+                "post_views": post.views,
+                "post_date": post.date.isoformat() if post.date else None,
+            }
+            for post in last_messages
+        ]
+        # Calculates average views of recent posts
+        views = [post.views for post in last_messages if post.views]
+        if views:
+            data["average_views"] = sum(views) // len(views)
 
     except FloodWaitError as e:
         log.error("Anti-flood triggered, waiting required")
-        # wait recommended time + random interval
-
-
-        await asyncio.sleep(e.seconds + random.uniform(1.0, 2.0))
+        return flood_wait_result(e, rate_limiter)
 
     except ChannelInvalidError:
         log.warning(f"This channel is private or unavailable: {url}")
@@ -83,6 +132,11 @@ async def tg_parser(url: str, client: TelegramClient, limit: int = 10) -> dict:
     except AuthKeyError:
 
         log.critical("AUTH SESSION FAILURE")
+        # the client pool drops the client and reconnects
+        raise
+
+    except ConnectionError:
+        raise
 
     except Exception as e:
         log.error(f"ERROR - {e}")
@@ -92,17 +146,20 @@ async def tg_parser(url: str, client: TelegramClient, limit: int = 10) -> dict:
     if channel:
         try:
             # Fetch complete channel information
+            await rate_limiter.acquire()
             full_channel = await client(GetFullChannelRequest(channel))
 
         except FloodWaitError as e:
 
             log.error("Anti-flood triggered, waiting required")
-            # wait recommended time + random interval
-            await asyncio.sleep(e.seconds + random.uniform(1.0, 2.0))
+            return flood_wait_result(e, rate_limiter)
 
         except ForbiddenError:
             log.warning("Failed to access full channel information")
 
+        except (AuthKeyError, ConnectionError):
+            raise
+
         except Exception as e:
             log.error(f"ERROR - {e}")
 
@@ -119,6 +176,7 @@ async def tg_parser(url: str, client: TelegramClient, limit: int = 10) -> dict:
             pinned_message_id = full_channel.full_chat.pinned_msg_id
             # Fetching pinned message
             if pinned_message_id:
+                await rate_limiter.acquire()
                 pinned_messages = await client.get_messages(
                     channel, ids=pinned_message_id
                 )
@@ -133,3 +191,72 @@ async def tg_parser(url: str, client: TelegramClient, limit: int = 10) -> dict:
 
     log.debug(f"Channel successfully parsed: {data}")
     return data
+
+
+async def parse_many(
+    usernames: Iterable[str],
+    client: TelegramClient,
+    concurrency: int = 10,
+    limit: int = 10,
+    rate_limiter: AsyncTokenBucket | None = None,
+) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Parses many channels on one event loop and one Telegram client.
+
+    At most `concurrency` channels are in flight at once; all of them share
+    the account rate limiter, so a FloodWait received by one channel pauses
+    the whole sweep. Results are yielded as soon as each channel is done,
+    not in the order of `usernames`; a channel hit by FloodWait is yielded
+    with its `retry_after` data for the caller to reschedule.
+
+    Parameters:
+        usernames (Iterable[str]): Channels in any `tg_parser` format
+        client (TelegramClient): A connected Telegram client
+        concurrency (int): Maximum channels parsed at once (default: 10)
+        limit (int): Number of messages to parse per channel (default: 10)
+        rate_limiter (AsyncTokenBucket): Anti-flood pacing of the account
+
+    Yields:
+        (username, data): The channel identifier and its `tg_parser` data
+    """
+    rate_limiter = rate_limiter or get_rate_limiter()
+    pending = iter(usernames)
+    results = asyncio.Queue()
+
+    async def worker():
+        # Every worker is one slot of the concurrency bound
+        for username in pending:
+            try:
+                data = await tg_parser(username, client, limit, rate_limiter)
+            except Exception as e:
+                log.error(f"ERROR - {username} - {e}")
+                data = {}
+            await results.put((username, data))
+
+    workers = [worker() for _ in range(max(1, concurrency))]
+    async for item in stream_results(workers, results):
+        yield item
+
+
+async def stream_results(workers, results: asyncio.Queue) -> AsyncIterator:
+    """
+    Runs worker coroutines and yields what they put into `results`
+    as soon as it arrives. Workers are cancelled if the consumer stops early.
+    """
+    tasks = [asyncio.create_task(worker) for worker in workers]
+    done = asyncio.gather(*tasks)
+    try:
+        while not (done.done() and results.empty()):
+            getter = asyncio.ensure_future(results.get())
+            await asyncio.wait(
+                {getter, done}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+        # Surface unexpected worker failures
+        await done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,89 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from apps.parser.aggregates import TOP_ORDERINGS
+from apps.parser.models import ChannelRanking, TelegramChannel
+
+log = logging.getLogger(__name__)
+
+# Metric -> TelegramChannel field, same metrics as the aggregates top lists
+METRIC_FIELDS = {
+    metric: ordering.lstrip('-') for metric, ordering in TOP_ORDERINGS.items()
+}
+GLOBAL = ''
+
+
+def _global_top(field: str, top: int):
+    rows = (
+        TelegramChannel.objects
+        .order_by(F(field).desc(), 'id')
+        .values_list('id', field)[:top]
+    )
+    for rank, (channel_id, value) in enumerate(rows, start=1):
+        yield GLOBAL, rank, channel_id, value
+
+
+def _category_top(field: str, top: int):
+    rows = (
+        TelegramChannel.objects
+        .exclude(category__isnull=True)
+        .exclude(category='')
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=F('category'),
+            order_by=[F(field).desc(), F('id').asc()],
+        ))
+        .filter(position__lte=top)
+        .values_list('category', 'position', 'id', field)
+    )
+    yield from rows
+
+
+def refresh_rankings(top: int | None = None) -> int:
+    """
+    Recompute the global and per-category leaderboards of every metric.
+
+    One query per metric and scope (window function for the categories)
+    plus one read of the previous rankings, so every row keeps the rank
+    the channel had after the previous sweep. Run after parse sweeps.
+
+    Parameters:
+        top (int): Channels per leaderboard (default: RANKING_TOP_N)
+
+    Returns:
+        int: Number of ranking rows written
+    """
+    top = top or settings.RANKING_TOP_N
+    now = timezone.now()
+    previous = {
+        (metric, category, channel_id): rank
+        for metric, category, channel_id, rank in
+        ChannelRanking.objects.values_list(
+            'metric', 'category', 'channel_id', 'rank'
+        ).iterator()
+    }
+
+    rankings = [
+        ChannelRanking(
+            metric=metric,
+            category=category,
+            rank=rank,
+            previous_rank=previous.get((metric, category, channel_id)),
+            channel_id=channel_id,
+            value=value,
+            computed_at=now,
+        )
+        for metric, field in METRIC_FIELDS.items()
+        for scope in (_global_top, _category_top)
+        for category, rank, channel_id, value in scope(field, top)
+    ]
+    with transaction.atomic():
+        ChannelRanking.objects.all().delete()
+        ChannelRanking.objects.bulk_create(rankings, batch_size=500)
+    log.info(f"Rankings refreshed: {len(rankings)} rows")
+    return len(rankings)
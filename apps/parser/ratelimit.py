@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+DEFAULT_ACCOUNT = 'default'
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket for pacing Telegram API requests without blocking the loop.
+
+    Every request takes one token; tokens refill at `rate` per second up to
+    `capacity`. A caller that finds the bucket empty reserves the next free
+    slot and awaits it with `asyncio.sleep`, so concurrent parsers overlap
+    their network waits while the overall request rate stays bounded.
+
+    The bookkeeping never awaits while holding state, so one bucket can be
+    shared by coroutines of different event loops and threads. The state is
+    kept in process memory: every process (a Celery prefork child, a web
+    worker) has its own bucket, and a FloodWait pause is not seen by the
+    other processes. `get_rate_limiter` therefore gives each process only
+    its share of the account budget.
+
+    Parameters:
+        rate (float): Tokens added per second
+        capacity (int): Maximum burst size (default: `rate` rounded up)
+        clock (callable): Monotonic time source, replaceable in tests
+    """
+
+    def __init__(self, rate: float, capacity: int | None = None,
+                 clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError('Rate limiter rate must be positive')
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate + 0.999))
+        self._clock = clock
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(
+                self.capacity, self._tokens + elapsed * self.rate
+            )
+            self._updated = now
+
+    def reserve(self, tokens: int = 1) -> float:
+        """Take tokens and return how long the caller has to wait for them"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            # Tokens may go negative: that debt is the queue of waiters
+            self._tokens -= tokens
+            # Refill time lies in the future while the account is held
+            delay = max(0.0, self._updated - now)
+            if self._tokens < 0:
+                delay += -self._tokens / self.rate
+            return delay
+
+    async def acquire(self, tokens: int = 1) -> None:
+        """Wait until the request is allowed to go out"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def held_for(self) -> float:
+        """Seconds left until the account may send requests again"""
+        return max(0.0, self._updated - self._clock())
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stop every caller of the account for `seconds` (FloodWait).
+
+        The pause applies to all coroutines sharing this bucket, not only to
+        the one that received the FloodWait; nobody waits here.
+        """
+        with self._lock:
+            until = self._clock() + seconds
+            if until > self._updated:
+                # Nothing refills until the pause is over
+                self._tokens = min(self._tokens, 0.0)
+                self._updated = until
+        log.warning(f"Telegram account paused for {seconds:.0f} s")
+
+    async def hold(self, seconds: float) -> None:
+        """Pause the account and wait until the pause is over"""
+        self.pause(seconds)
+        await asyncio.sleep(self.held_for())
+
+
+_limiters: dict[str, AsyncTokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(account: str = DEFAULT_ACCOUNT) -> AsyncTokenBucket:
+    """
+    Return the process-wide rate limiter of a Telegram account.
+
+    The limit is per process: `TELEGRAM_REQUESTS_PER_SECOND` and
+    `TELEGRAM_REQUESTS_BURST` are divided by `CELERY_WORKER_CONCURRENCY`,
+    so all worker children together stay within the account budget.
+    """
+    processes = max(1, settings.CELERY_WORKER_CONCURRENCY)
+    with _limiters_lock:
+        limiter = _limiters.get(account)
+        if limiter is None:
+            limiter = AsyncTokenBucket(
+                settings.TELEGRAM_REQUESTS_PER_SECOND / processes,
+                max(1, settings.TELEGRAM_REQUESTS_BURST // processes),
+            )
+            _limiters[account] = limiter
+            log.debug(f"Rate limiter created for account {account}")
+        return limiter
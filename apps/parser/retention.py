@@ -0,0 +1,116 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from apps.parser.models import ChannelStats, ChannelStatsRollup, TelegramChannel
+from apps.parser.rollups import period_start
+
+log = logging.getLogger(__name__)
+
+
+def average_row_size() -> float | None:
+    """Bytes per ChannelStats row with indexes, None when unknown"""
+    table = ChannelStats._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT pg_total_relation_size(oid)::float "
+                    "/ GREATEST(reltuples, 1) FROM pg_class "
+                    "WHERE oid = %s::regclass",
+                    [table],
+                )
+                return cursor.fetchone()[0]
+            if connection.vendor == 'sqlite':
+                cursor.execute(
+                    "SELECT SUM(pgsize) FROM dbstat "
+                    "WHERE name = %s OR tbl_name = %s",
+                    [table, table],
+                )
+                size = cursor.fetchone()[0]
+                rows = ChannelStats.objects.count()
+                return size / rows if size and rows else None
+    except DatabaseError as e:
+        log.warning(f"Table size of {table} is not available: {e}")
+    return None
+
+
+def redundant_stats(channel_ids: list[int], full_since: datetime,
+                    daily_since: datetime) -> list[int]:
+    """
+    Ids of the stats records to drop for the given channels.
+
+    Records newer than `full_since` are all kept. Older ones keep the
+    latest record of every day, and records older than `daily_since` the
+    latest record of every week; the latest record of a day carries the
+    growth of that day, longer periods live in the rollups.
+    """
+    rows = (
+        ChannelStats.objects.filter(
+            channel_id__in=channel_ids, parsed_at__lt=full_since
+        )
+        .order_by('channel_id', 'parsed_at')
+        .values_list('pk', 'channel_id', 'parsed_at')
+    )
+    latest = {}
+    redundant = []
+    for pk, channel_id, parsed_at in rows.iterator(chunk_size=10_000):
+        period = (
+            ChannelStatsRollup.WEEK if parsed_at < daily_since
+            else ChannelStatsRollup.DAY
+        )
+        bucket = (channel_id, period, period_start(parsed_at, period))
+        if bucket in latest:
+            # Rows are ordered by date: the previous one is not the latest
+            redundant.append(latest[bucket])
+        latest[bucket] = pk
+    return redundant
+
+
+def downsample_stats(now: datetime | None = None,
+                     channel_chunk: int = 500) -> dict:
+    """
+    Downsample old ChannelStats and delete the redundant records.
+
+    Channels are scanned in chunks and records are deleted by at most
+    STATS_RETENTION_BATCH_SIZE ids per statement, each statement in its
+    own transaction, so locks are short and the job can be interrupted.
+
+    Parameters:
+        now (datetime): Reference time (default: now)
+        channel_chunk (int): Channels scanned at once
+
+    Returns:
+        dict: `removed` rows and estimated `bytes` reclaimed (None when the
+              database cannot tell the table size)
+    """
+    now = now or timezone.now()
+    full_since = now - timedelta(days=settings.STATS_FULL_RESOLUTION_DAYS)
+    daily_since = now - timedelta(days=settings.STATS_DAILY_RESOLUTION_DAYS)
+    batch_size = settings.STATS_RETENTION_BATCH_SIZE
+
+    row_size = average_row_size()
+    removed = 0
+    last_pk = 0
+    while True:
+        channel_ids = list(
+            TelegramChannel.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:channel_chunk]
+        )
+        if not channel_ids:
+            break
+        last_pk = channel_ids[-1]
+
+        redundant = redundant_stats(channel_ids, full_since, daily_since)
+        for start in range(0, len(redundant), batch_size):
+            deleted, _ = ChannelStats.objects.filter(
+                pk__in=redundant[start:start + batch_size]
+            ).delete()
+            removed += deleted
+
+    reclaimed = int(removed * row_size) if row_size else None
+    return {'removed': removed, 'bytes': reclaimed}
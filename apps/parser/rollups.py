@@ -0,0 +1,155 @@
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+from apps.parser.models import ChannelStats, ChannelStatsRollup
+
+PERIODS = (
+    ChannelStatsRollup.DAY,
+    ChannelStatsRollup.WEEK,
+    ChannelStatsRollup.MONTH,
+)
+UPDATE_FIELDS = (
+    'participants_min',
+    'participants_max',
+    'participants_last',
+    'growth',
+    'last_parsed_at',
+)
+
+RollupKey = tuple[int, str, date]
+
+
+def period_start(moment: datetime, period: str) -> date:
+    """First day of the period containing `moment` (weeks start on Monday)"""
+    day = moment.date()
+    if period == ChannelStatsRollup.WEEK:
+        return day - timedelta(days=day.weekday())
+    if period == ChannelStatsRollup.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def next_period_start(moment: datetime, period: str) -> date:
+    """First day of the first period starting at or after `moment`"""
+    start = period_start(moment, period)
+    if datetime.combine(start, time.min, tzinfo=moment.tzinfo) >= moment:
+        return start
+    if period == ChannelStatsRollup.WEEK:
+        return start + timedelta(weeks=1)
+    if period == ChannelStatsRollup.MONTH:
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def apply_stat(
+    rollups: dict[RollupKey, ChannelStatsRollup],
+    channel_id: int,
+    participants: int,
+    growth: int,
+    parsed_at: datetime,
+) -> None:
+    """
+    Fold one stats record into the rollups of its day, week and month.
+
+    `daily_growth` of a record is the growth of its whole day (records of
+    the same day repeat it), so a day keeps the growth of its latest record
+    and weeks and months sum the growth of their days.
+
+    Parameters:
+        rollups (dict): (channel_id, period, period_start) -> rollup,
+                        updated in place; missing rollups are created
+        channel_id (int): Primary key of the channel
+        participants (int): Participants count of the record
+        growth (int): Daily growth of the record
+        parsed_at (datetime): Date of the record
+    """
+    day = rollups.get(
+        (channel_id, ChannelStatsRollup.DAY,
+         period_start(parsed_at, ChannelStatsRollup.DAY))
+    )
+    if day is not None and day.last_parsed_at > parsed_at:
+        # An older record of an already rolled up day changes nothing
+        # but the bounds
+        growth_delta = 0
+    else:
+        growth_delta = growth - (day.growth if day is not None else 0)
+
+    for period in PERIODS:
+        key = (channel_id, period, period_start(parsed_at, period))
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollups[key] = ChannelStatsRollup(
+                channel_id=channel_id,
+                period=period,
+                period_start=key[2],
+                participants_min=participants,
+                participants_max=participants,
+                participants_last=participants,
+                growth=growth,
+                last_parsed_at=parsed_at,
+            )
+            continue
+        rollup.participants_min = min(rollup.participants_min, participants)
+        rollup.participants_max = max(rollup.participants_max, participants)
+        rollup.growth += growth_delta
+        if parsed_at >= rollup.last_parsed_at:
+            rollup.participants_last = participants
+            rollup.last_parsed_at = parsed_at
+
+
+def save_rollups(rollups: Iterable[ChannelStatsRollup]) -> None:
+    """Upsert rollups on (channel, period, period_start)"""
+    ChannelStatsRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=['channel', 'period', 'period_start'],
+        update_fields=UPDATE_FIELDS,
+    )
+
+
+def update_rollups(stats: Iterable[ChannelStats]) -> None:
+    """
+    Add freshly saved stats to the rollups: one read and one upsert.
+
+    Parameters:
+        stats (Iterable[ChannelStats]): New stats records
+    """
+    stats = list(stats)
+    if not stats:
+        return
+    keys = {
+        (period, period_start(stat.parsed_at, period))
+        for stat in stats
+        for period in PERIODS
+    }
+    existing = ChannelStatsRollup.objects.filter(
+        reduce(or_, (
+            Q(period=period, period_start=start) for period, start in keys
+        )),
+        channel_id__in={stat.channel_id for stat in stats},
+    )
+    rollups = {
+        (rollup.channel_id, rollup.period, rollup.period_start): rollup
+        for rollup in existing
+    }
+    for stat in stats:
+        apply_stat(rollups, stat.channel_id, stat.participants_count,
+                   stat.daily_growth, stat.parsed_at)
+    save_rollups(rollups.values())
+
+
+def range_rollups(channel, start: date, end: date,
+                  period: str = ChannelStatsRollup.DAY):
+    """Rollups of a channel whose period starts within [start, end]"""
+    return ChannelStatsRollup.objects.filter(
+        channel=channel,
+        period=period,
+        period_start__gte=period_start(
+            datetime.combine(start, datetime.min.time()), period
+        ),
+        period_start__lte=end,
+    )
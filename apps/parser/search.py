@@ -0,0 +1,60 @@
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Coalesce
+
+from apps.parser.models import TelegramChannel
+
+# Text search configurations of the `search_vector` trigger
+SEARCH_CONFIGS = ('russian', 'english', 'simple')
+NO_RANK = Value(0.0, output_field=FloatField())
+
+
+def search_channels(query: str, queryset=None):
+    """
+    Channels matching `query`, best matches first.
+
+    On PostgreSQL the `search_vector` column (kept by a trigger, GIN
+    indexed) is matched with Russian, English and plain configurations,
+    and usernames are matched by trigram similarity, so `durov` finds
+    `durov_russia`. The rank combines both scores.
+
+    Other databases (SQLite in development) fall back to `icontains`
+    ordered by participants.
+
+    Parameters:
+        query (str): User input, websearch syntax on PostgreSQL
+        queryset (QuerySet): Channels to search in (default: all)
+
+    Returns:
+        QuerySet: Channels annotated with `rank`
+    """
+    queryset = TelegramChannel.objects.all() if queryset is None else queryset
+    query = query.strip()
+    if not query:
+        return queryset.none().annotate(rank=NO_RANK)
+
+    if connection.vendor != 'postgresql':
+        return queryset.filter(
+            Q(title__icontains=query)
+            | Q(username__icontains=query)
+            | Q(description__icontains=query)
+        ).annotate(rank=NO_RANK).order_by('-participants_count', 'id')
+
+    search_query = SearchQuery(query, config='russian', search_type='websearch')
+    for config in SEARCH_CONFIGS[1:]:
+        search_query |= SearchQuery(
+            query, config=config, search_type='websearch'
+        )
+    username = query.lstrip('@')
+    return queryset.filter(
+        Q(search_vector=search_query) | Q(username__trigram_similar=username)
+    ).annotate(
+        # no username means no similarity, not an unknown rank
+        rank=Coalesce(SearchRank(F('search_vector'), search_query), 0.0)
+        + Coalesce(TrigramSimilarity('username', username), 0.0),
+    ).order_by('-rank', '-participants_count', 'id')
@@ -0,0 +1,243 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+
+from django.conf import settings
+from telethon import TelegramClient
+from telethon.errors import AuthKeyError
+
+from apps.parser.parser import RETRY_AFTER, stream_results, tg_parser
+from apps.parser.ratelimit import get_rate_limiter
+
+log = logging.getLogger(__name__)
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """
+    Consistent hashing of channels over Telegram accounts.
+
+    Every account owns `replicas` points on the ring and a channel belongs to
+    the first point after its hash, so adding or removing an account only
+    moves the channels of that account.
+
+    Parameters:
+        accounts (Iterable[str]): Account names
+        replicas (int): Virtual points per account (default: 100)
+    """
+
+    def __init__(self, accounts: Iterable[str], replicas: int = 100):
+        points = sorted(
+            (_hash(f'{account}:{replica}'), account)
+            for account in accounts
+            for replica in range(replicas)
+        )
+        if not points:
+            raise ValueError('Hash ring needs at least one account')
+        self._hashes = [point for point, _ in points]
+        self._accounts = [account for _, account in points]
+
+    def get(self, channel_id: int | str,
+            exclude: Iterable[str] = ()) -> str | None:
+        """Account owning the channel, skipping accounts in `exclude`"""
+        exclude = set(exclude)
+        start = bisect.bisect(self._hashes, _hash(str(channel_id)))
+        for i in range(len(self._accounts)):
+            account = self._accounts[(start + i) % len(self._accounts)]
+            if account not in exclude:
+                return account
+        return None
+
+
+def route_channel(channel_id: int | str,
+                  accounts: Iterable[str]) -> tuple[str | None, float]:
+    """
+    Account to parse one channel with outside a sweep.
+
+    `channel_id` may also be the username or link a channel is parsed by
+    before its id is known (the manual parse form).
+
+    The channel goes to its owner on the ring, as in `parse_sharded`, or
+    to the next account not in FloodWait.
+
+    Returns:
+        (account, retry_after): The account and 0, or None and the seconds
+                                until the first account is free again
+    """
+    accounts = list(accounts)
+    held = {
+        account: get_rate_limiter(account).held_for() for account in accounts
+    }
+    account = HashRing(accounts).get(
+        channel_id, exclude=[name for name, left in held.items() if left]
+    )
+    if account is None:
+        return None, min(held.values())
+    return account, 0.0
+
+
+async def parse_sharded(
+    channels: dict[int, str],
+    clients: dict[str, TelegramClient],
+    concurrency: int = 10,
+    limit: int = 10,
+    min_ids: dict[int, int] | None = None,
+    reconnect: Callable[[str], Awaitable[TelegramClient]] | None = None,
+) -> AsyncIterator[tuple[int, dict]]:
+    """
+    Parses channels with several Telegram accounts at once.
+
+    Channels are sharded over accounts with `HashRing`; every account runs
+    `concurrency` workers with its own rate limiter, so throughput grows with
+    the number of accounts. An account paused by FloodWait for longer than
+    `PARSER_DRAIN_AFTER` seconds hands its queue over to the other accounts,
+    and idle workers steal from the longest queue of an active account.
+    A channel hit by FloodWait goes back to a queue; only when every account
+    is paused for long it is yielded with `retry_after` data.
+    A channel hit by `AuthKeyError` / `ConnectionError` is retried once on
+    a fresh client from `reconnect`, or by another account when the
+    reconnect fails.
+
+    Parameters:
+        channels (dict): Channel id -> username
+        clients (dict): Account name -> connected Telegram client
+        concurrency (int): Channels in flight per account (default: 10)
+        limit (int): Number of messages to parse per channel (default: 10)
+        min_ids (dict): Channel id -> last post seen, only newer posts
+                        are fetched (see `tg_parser`)
+        reconnect (callable): Account name -> fresh connected client, e.g.
+                        `TelegramClientPool.reconnect` (default: no retry)
+
+    Yields:
+        (channel_id, data): The channel id and its `tg_parser` data
+    """
+    min_ids = min_ids or {}
+    ring = HashRing(clients)
+    limiters = {account: get_rate_limiter(account) for account in clients}
+    queues = {account: deque() for account in clients}
+    for channel_id, username in channels.items():
+        queues[ring.get(channel_id)].append((channel_id, username))
+
+    results = asyncio.Queue()
+    changed = asyncio.Condition()
+    remaining = len(channels)
+    # Channels already retried after a broken connection
+    retried = set()
+
+    def is_held(account):
+        return limiters[account].held_for() > settings.PARSER_DRAIN_AFTER
+
+    def drain(account):
+        """Move the queue of a paused account to accounts still working"""
+        held = [name for name in clients if is_held(name)]
+        queue = queues[account]
+        kept = deque()
+        while queue:
+            channel_id, username = queue.popleft()
+            target = ring.get(channel_id, exclude=held)
+            (queues[target] if target else kept).append((channel_id, username))
+        queue.extend(kept)
+        return len(kept) == 0
+
+    def steal(account):
+        donors = [
+            name for name in clients
+            if name != account and queues[name] and not is_held(name)
+        ]
+        if not donors:
+            return None
+        donor = max(donors, key=lambda name: len(queues[name]))
+        return queues[donor].pop()
+
+    async def replace_client(account, broken):
+        """Reconnect an account once, even if all its workers failed"""
+        if clients[account] is broken:
+            clients[account] = await reconnect(account)
+            log.warning(f"Account {account} reconnected during sweep")
+
+    async def worker(account):
+        nonlocal remaining
+        while remaining:
+            if is_held(account) and queues[account]:
+                if drain(account):
+                    log.warning(f"Account {account} is in FloodWait, drained")
+                else:
+                    # Every account is paused: hand channels back to caller
+                    retry_after = limiters[account].held_for()
+                    while queues[account]:
+                        channel_id, _ = queues[account].popleft()
+                        remaining -= 1
+                        await results.put(
+                            (channel_id, {RETRY_AFTER: retry_after})
+                        )
+                async with changed:
+                    changed.notify_all()
+                continue
+
+            if queues[account]:
+                item = queues[account].popleft()
+            elif not is_held(account):
+                item = steal(account)
+            else:
+                item = None
+
+            if item is None:
+                # Nothing to do until another worker finishes or drains
+                async with changed:
+                    await changed.wait()
+                continue
+
+            channel_id, username = item
+            client = clients[account]
+            try:
+                data = await tg_parser(
+                    username, client, limit, limiters[account],
+                    min_id=min_ids.get(channel_id),
+                )
+            except (AuthKeyError, ConnectionError) as e:
+                log.error(f"Telegram client of {account} failed: {e}")
+                data = {}
+                if reconnect is not None and channel_id not in retried:
+                    retried.add(channel_id)
+                    target = account
+                    try:
+                        await replace_client(account, client)
+                    except (AuthKeyError, ConnectionError, OSError) as e:
+                        log.error(f"Account {account} did not reconnect: {e}")
+                        held = [name for name in clients if is_held(name)]
+                        target = ring.get(channel_id, exclude=[account, *held])
+                    if target:
+                        queues[target].appendleft(item)
+                        async with changed:
+                            changed.notify_all()
+                        continue
+            except Exception as e:
+                log.error(f"ERROR - {username} - {e}")
+                data = {}
+            if RETRY_AFTER in data:
+                held = [name for name in clients if is_held(name)]
+                target = ring.get(channel_id, exclude=held)
+                if target:
+                    # Another account (or this one after a short pause)
+                    queues[target].append(item)
+                    async with changed:
+                        changed.notify_all()
+                    continue
+            remaining -= 1
+            await results.put((channel_id, data))
+            async with changed:
+                changed.notify_all()
+
+    workers = [
+        worker(account)
+        for account in clients
+        for _ in range(max(1, concurrency))
+    ]
+    async for item in stream_results(workers, results):
+        yield item
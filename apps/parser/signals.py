@@ -0,0 +1,14 @@
+from django.dispatch import Signal, receiver
+
+from apps.parser.aggregates import invalidate_aggregates
+
+# Sent after a batch of channels (with their stats) is committed by the
+# sink, with `channel_ids` (primary keys) of the batch and
+# `categories_changed` (a channel got a new category or a new channel has
+# one); bulk upserts do not send post_save, listen to this instead
+channels_saved = Signal()
+
+
+@receiver(channels_saved)
+def drop_cached_aggregates(sender, **kwargs):
+    invalidate_aggregates()
@@ -0,0 +1,338 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils import timezone
+
+from apps.parser.metrics import METRIC_FIELDS, channel_metrics
+from apps.parser.models import ChannelStats, TelegramChannel
+from apps.parser.rollups import update_rollups
+from apps.parser.signals import channels_saved
+
+log = logging.getLogger(__name__)
+
+# Fields every parse refreshes
+CHANNEL_FIELDS = (
+    'title',
+    'username',
+    'description',
+    'participants_count',
+    'pinned_messages',
+    'last_messages',
+    'average_views',
+    'last_post_id',
+    'recent_views',
+    'posts_refreshed_at',
+)
+# Copy of the latest ChannelStats row, written with every stats insert
+STATS_FIELDS = (
+    'parsed_at',
+    'stats_participants_count',
+    'stats_parsed_at',
+    'daily_growth',
+)
+# Fields set by hand (ParserView form); updated only when given
+OPTIONAL_FIELDS = ('language', 'country', 'category')
+
+
+def daily_growth(current_count, current_date, last_count, last_date,
+                 last_growth):
+    """Participants growth against the previous stats record"""
+    if last_date is None:
+        return 0
+    if last_date.date() != current_date.date():
+        return current_count - last_count
+    return last_growth
+
+
+def _count(value) -> int:
+    """Non-negative integer of a count field; `tg_parser` puts text such as
+    "Нет участников" there when Telegram returns nothing"""
+    if isinstance(value, str):
+        value = value.strip()
+        return int(value) if value.isdigit() else 0
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return max(int(value), 0)
+    return 0
+
+
+def clean(data: dict) -> dict:
+    """
+    Copy of `tg_parser` data fit for saving.
+
+    Counts are coerced to integers; data without a channel id or a title
+    cannot be saved and raises ValueError.
+    """
+    try:
+        channel_id = int(data['channel_id'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Bad channel id: {data.get('channel_id')!r}")
+    if not data.get('title'):
+        raise ValueError(f"Channel {channel_id} has no title")
+    data = {
+        **data,
+        'channel_id': channel_id,
+        'participants_count': _count(data.get('participants_count')),
+    }
+    if 'average_views' in data:
+        data['average_views'] = _count(data['average_views'])
+    return data
+
+
+def _newest(*posts: list[dict], size: int) -> list[dict]:
+    """Up to `size` newest posts, later lists win for the same `post_id`"""
+    by_id = {}
+    for chunk in posts:
+        for post in chunk or []:
+            by_id[post['post_id']] = post
+    return sorted(by_id.values(), key=lambda post: post['post_id'],
+                  reverse=True)[:size]
+
+
+def posts_min_id(last_post_id: int | None, posts_refreshed_at,
+                 now=None) -> int | None:
+    """
+    `min_id` for the next parse of a channel: only new posts are fetched
+    while the stored ones were fully fetched within
+    PARSER_POSTS_REFRESH_DAYS, otherwise None to renew their views.
+    """
+    now = now or timezone.now()
+    if not last_post_id or posts_refreshed_at is None:
+        return None
+    age = now - posts_refreshed_at
+    if age > timedelta(days=settings.PARSER_POSTS_REFRESH_DAYS):
+        return None
+    return last_post_id
+
+
+def merge_posts(data: dict, last: dict) -> dict:
+    """
+    Merge newly fetched posts into the stored rolling window.
+
+    `tg_parser` called with `min_id` returns only posts published since the
+    previous parse, so they are combined with the stored `last_messages`
+    and `recent_views` of the channel. Views of older posts in the window
+    stay as they were last fetched until the next full fetch (see
+    `posts_min_id`).
+
+    Parameters:
+        data (dict): `tg_parser` result
+        last (dict): Stored `last_post_id`, `last_messages` and
+                     `recent_views` of the channel (empty if new)
+
+    Returns:
+        dict: `last_messages`, `recent_views`, `average_views` and
+              `last_post_id` to save
+    """
+    new_messages = data.get('last_messages') or []
+    old_messages = last.get('last_messages') or []
+    new_views = data.get('recent_views')
+    if new_views is None:
+        new_views = [
+            {key: post.get(key) for key in ('post_id', 'post_views',
+                                            'post_date')}
+            for post in new_messages
+        ]
+
+    window = _newest(last.get('recent_views'), new_views,
+                     size=settings.PARSER_RECENT_POSTS)
+    views = [post['post_views'] for post in window if post.get('post_views')]
+    return {
+        'last_messages': _newest(
+            old_messages, new_messages,
+            size=max(len(new_messages), len(old_messages)),
+        ),
+        'recent_views': window,
+        'average_views': (
+            sum(views) // len(views) if views
+            else data.get('average_views', 0)
+        ),
+        'last_post_id': max(
+            [post['post_id'] for post in window]
+            + [last.get('last_post_id') or 0]
+        ) or None,
+    }
+
+
+class ChannelSink:
+    """
+    Batching writer for parsed channel data.
+
+    Parsed results are buffered and flushed every `batch_size` items or
+    `flush_interval` seconds, whichever comes first. A flush is one
+    transaction of a fixed number of queries however large the batch is:
+    - one read of the previous stats, kept on `TelegramChannel`
+      (`stats_participants_count`, `stats_parsed_at`, `daily_growth`),
+      and of the stored posts new ones are merged into (`merge_posts`)
+    - upsert of the channels (`bulk_create` with `update_conflicts`)
+      together with the new copy of their stats and the engagement
+      metrics of the batch (`apps.parser.metrics`)
+    - `bulk_create` of the new `ChannelStats` rows
+    - read and upsert of their day/week/month rollups
+
+    Use it as a context manager so the tail of the buffer is flushed:
+
+        with ChannelSink() as sink:
+            for data in results:
+                sink.add(data)
+
+    Parameters:
+        batch_size (int): Items per flush (default: PARSER_SINK_BATCH_SIZE)
+        flush_interval (float): Max seconds an item waits in the buffer
+                       (default: PARSER_SINK_FLUSH_INTERVAL)
+    """
+
+    def __init__(self, batch_size: int | None = None,
+                 flush_interval: float | None = None):
+        self.batch_size = batch_size or settings.PARSER_SINK_BATCH_SIZE
+        self.flush_interval = (
+            flush_interval or settings.PARSER_SINK_FLUSH_INTERVAL
+        )
+        self.saved = 0
+        self.failed = 0
+        self._buffer: dict[int, dict] = {}
+        self._started = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def add(self, data: dict) -> None:
+        """Buffer `tg_parser` data, flushing when the batch is due"""
+        try:
+            data = clean(data)
+        except ValueError as e:
+            # A bad row is counted and dropped, the batch goes on
+            self.failed += 1
+            log.error(f"Channel data rejected - {e}")
+            return
+        if not self._buffer:
+            self._started = time.monotonic()
+        # The latest result of a channel wins within one batch
+        self._buffer[data['channel_id']] = data
+        if (
+            len(self._buffer) >= self.batch_size
+            or time.monotonic() - self._started >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> int:
+        """Write the buffered channels and their stats, return rows saved"""
+        if not self._buffer:
+            return 0
+        batch, self._buffer = list(self._buffer.values()), {}
+        try:
+            with transaction.atomic():
+                pks, categories_changed = self._save(batch)
+                transaction.on_commit(
+                    lambda: channels_saved.send(
+                        sender=ChannelSink, channel_ids=pks,
+                        categories_changed=categories_changed,
+                    )
+                )
+        except (DatabaseError, IntegrityError) as e:
+            self.failed += len(batch)
+            log.error(f"Database error while saving {len(batch)} channels"
+                      f" - {e}")
+            return 0
+        except Exception as e:
+            # Lose this batch, not the whole sweep
+            self.failed += len(batch)
+            log.error(f"Failed to save {len(batch)} channels - {e}",
+                      exc_info=True)
+            return 0
+        self.saved += len(batch)
+        log.info(f"Saved batch of {len(batch)} channels")
+        return len(batch)
+
+    def _save(self, batch: list[dict]) -> tuple[list[int], bool]:
+        now = timezone.now()
+        optional = [
+            field for field in OPTIONAL_FIELDS
+            if all(field in data for data in batch)
+        ]
+        # Latest stats are denormalized on the channel: one indexed read
+        previous = {
+            row['channel_id']: row
+            for row in TelegramChannel.objects.filter(
+                channel_id__in=[data['channel_id'] for data in batch]
+            ).values('channel_id', 'stats_participants_count',
+                     'stats_parsed_at', 'daily_growth', 'last_post_id',
+                     'last_messages', 'recent_views', 'posts_refreshed_at',
+                     'category')
+        }
+        # Groups on the homepage depend on categories only
+        categories_changed = 'category' in optional and any(
+            previous.get(data['channel_id'], {}).get('category')
+            != data['category']
+            for data in batch
+        )
+        # Only new posts are fetched: merge them into the stored window
+        batch = [
+            {**data, **merge_posts(data, previous.get(data['channel_id'], {}))}
+            for data in batch
+        ]
+
+        # Engagement metrics of the whole batch in one vectorized pass
+        metrics = channel_metrics(batch, now)
+
+        channels = []
+        for data, engagement in zip(batch, metrics):
+            count = data.get('participants_count', 0)
+            last = previous.get(data['channel_id'], {})
+            channels.append(TelegramChannel(
+                channel_id=data['channel_id'],
+                title=data['title'],
+                username=data.get('username'),
+                description=data.get('description', 'Нет описания'),
+                participants_count=count,
+                pinned_messages=data.get('pinned_messages', []),
+                last_messages=data['last_messages'],
+                average_views=data['average_views'],
+                last_post_id=data['last_post_id'],
+                recent_views=data['recent_views'],
+                posts_refreshed_at=(
+                    now if data.get('posts_refreshed')
+                    else last.get('posts_refreshed_at')
+                ),
+                parsed_at=now,
+                stats_participants_count=count,
+                stats_parsed_at=now,
+                daily_growth=daily_growth(
+                    count, now, last.get('stats_participants_count'),
+                    last.get('stats_parsed_at'), last.get('daily_growth'),
+                ),
+                **engagement,
+                **{field: data[field] for field in optional},
+            ))
+        TelegramChannel.objects.bulk_create(
+            channels,
+            update_conflicts=True,
+            unique_fields=['channel_id'],
+            update_fields=[
+                *CHANNEL_FIELDS, *STATS_FIELDS, *METRIC_FIELDS, *optional,
+            ],
+        )
+        if any(channel.pk is None for channel in channels):
+            # Backends that do not return ids of upserted rows
+            pks = dict(TelegramChannel.objects.filter(
+                channel_id__in=[channel.channel_id for channel in channels]
+            ).values_list('channel_id', 'pk'))
+            for channel in channels:
+                channel.pk = pks[channel.channel_id]
+
+        stats = ChannelStats.objects.bulk_create([
+            ChannelStats(
+                channel_id=channel.pk,
+                participants_count=channel.stats_participants_count,
+                daily_growth=channel.daily_growth,
+                parsed_at=now,
+            )
+            for channel in channels
+        ])
+        update_rollups(stats)
+        return [channel.pk for channel in channels], categories_changed
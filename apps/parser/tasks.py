@@ -1,24 +1,35 @@
-import asyncio
 import logging
-import random
 import time
 
 from asgiref.sync import sync_to_async
 from celery import shared_task
+from celery.signals import worker_process_shutdown, worker_shutdown
 from django.conf import settings
-from django.db import DatabaseError, IntegrityError
+from django.db import DatabaseError
 from django.utils import timezone
-from telethon import TelegramClient
-from telethon.sessions import StringSession
 
-from apps.parser.models import ChannelStats, TelegramChannel
-from apps.parser.parser import tg_parser
+from apps.parser.clients import client_pool
+from apps.parser.facets import refresh_facet_counts
+from apps.parser.models import TelegramChannel
+from apps.parser.parser import RETRY_AFTER, tg_parser
+from apps.parser.rankings import refresh_rankings
+from apps.parser.ratelimit import get_rate_limiter
+from apps.parser.retention import downsample_stats
+from apps.parser.sharding import parse_sharded, route_channel
+from apps.parser.sink import ChannelSink, posts_min_id
 
 log = logging.getLogger(__name__)
 
 
-@shared_task
-def parse_channel(channel_id):
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_telegram_clients(**kwargs):
+    """Disconnect pooled Telegram clients when a Celery worker stops"""
+    client_pool.shutdown()
+
+
+@shared_task(bind=True, max_retries=None)
+def parse_channel(self, channel_id):
     """Celery task for channel parse"""
     try:
         channel = TelegramChannel.objects.get(channel_id=channel_id)
@@ -30,83 +41,142 @@ def parse_channel(channel_id):
                   f'{channel_id} - {e}')
         return
 
-    async def run_parser(channel_obj):
-        """Secondary func for async parsing"""
-        async with TelegramClient(
-            StringSession(settings.TELEGRAM_SESSION_STRING),
-            settings.TELEGRAM_API_ID,
-            settings.TELEGRAM_API_HASH,
-        ) as client:
-            try:
-                # make connection with Telegram
-                await client.connect()
-                data = await tg_parser(channel_obj.username, client)
-                # using sync_to_async to avoid Django ORM errors (cause ORM is sync)
-                await sync_to_async(save_channel_data)(channel_obj, data)
-                await sync_to_async(save_channel_stats)(channel_obj, data)
-            except (DatabaseError, IntegrityError) as e:
-                log.error(f'Database safe error for {channel_obj.username} - {e}')
-            except Exception as e:
-                log.error(f'Unexpected error: - {e}', exc_info=True)
+    if not client_pool.accounts:
+        log.error("No Telegram accounts are configured")
+        return
+    # a held account would make the worker sleep until its pause is over
+    account, held = route_channel(channel_id, client_pool.accounts)
+    if account is None:
+        log.warning(
+            f"Channel {channel.username} postponed "
+            f"for {held:.0f} s (every account on hold)"
+        )
+        raise self.retry(countdown=held)
 
     try:
-        asyncio.run(run_parser(channel))
+        # connected client of this worker process, no handshake per channel
+        data = client_pool.run(
+            tg_parser, channel.username, account=account,
+            rate_limiter=get_rate_limiter(account),
+            min_id=posts_min_id(
+                channel.last_post_id, channel.posts_refreshed_at
+            ),
+        )
     except ConnectionError as e:
         log.error(f"Connection failed for {channel_id}: {e}")
+        return
+    except Exception as e:
+        log.error(f'Unexpected error: - {e}', exc_info=True)
+        return
 
+    if RETRY_AFTER in data:
+        # FloodWait: free the worker slot and come back when allowed
+        log.warning(
+            f"Channel {channel.username} postponed "
+            f"for {data[RETRY_AFTER]:.0f} s (FloodWait)"
+        )
+        raise self.retry(countdown=data[RETRY_AFTER])
+    if not data.get("title"):
+        log.warning(f"Channel {channel.username} was not parsed, skipping")
+        return
 
-def save_channel_data(channel, data):
-    """Save channels data"""
-    channel.title = data["title"]
-    channel.description = data.get("description", "Нет описания")
-    channel.participants_count = data.get("participants_count", 0)
-    channel.pinned_messages = data.get("pinned_messages", [])
-    channel.last_messages = data.get("last_messages", [])
-    channel.average_views = data.get("average_views", 0)
-    channel.parsed_at = timezone.now()
-    channel.save()
-    log.info(f"Data from channel {channel.title} successfully saved")
+    with ChannelSink() as sink:
+        sink.add({**data, "channel_id": channel.channel_id})
 
 
-def save_channel_stats(channel, data):
-    """Save channel stats"""
-    last_stats = (
-        ChannelStats.objects.filter(channel=channel).order_by("-parsed_at").first()
-    )
-    current_date = timezone.now()
-    current_count = data.get("participants_count", 0)
-
-    # daily growth for participants
-    if last_stats and last_stats.parsed_at.date() != current_date.date():
-        daily_growth = current_count - last_stats.participants_count
-    else:
-        daily_growth = last_stats.daily_growth if last_stats else 0
-
-    ChannelStats.objects.create(
-        channel=channel,
-        participants_count=current_count,
-        daily_growth=daily_growth,
-        parsed_at=current_date,
+@shared_task
+def parse_all_channels():
+    """Task for Celery: parse all channels from database in one sweep"""
+    rows = list(
+        TelegramChannel.objects.exclude(username__isnull=True)
+        .exclude(username__in=["", "-"])
+        .values_list(
+            "channel_id", "username", "last_post_id", "posts_refreshed_at"
+        )
     )
+    channels = {channel_id: username for channel_id, username, *_ in rows}
+    # High-water marks: only posts newer than these are fetched, except
+    # for channels due a full fetch
+    now = timezone.now()
+    min_ids = {
+        channel_id: min_id
+        for channel_id, _, last_post_id, refreshed_at in rows
+        if (min_id := posts_min_id(last_post_id, refreshed_at, now))
+    }
+    if not channels:
+        log.warning("There are no channels")
+        return
+
+    async def run_sweep(clients, reconnect):
+        """Secondary func: parse channels concurrently, sharded by account"""
+        nonlocal postponed
+        try:
+            async for channel_id, data in parse_sharded(
+                channels, clients, concurrency=settings.PARSER_CONCURRENCY,
+                min_ids=min_ids, reconnect=reconnect,
+            ):
+                if RETRY_AFTER in data:
+                    # Every account is in FloodWait: leave it to a delayed task
+                    parse_channel.apply_async(
+                        (channel_id,), countdown=data[RETRY_AFTER]
+                    )
+                    postponed += 1
+                    continue
+                if not data.get("title"):
+                    log.warning(
+                        f"Channel {channels[channel_id]} was not parsed, "
+                        f"skipping"
+                    )
+                    continue
+                # Buffered; the sink writes a whole batch in a few queries
+                await sync_to_async(sink.add)(
+                    {**data, "channel_id": channel_id}
+                )
+        finally:
+            await sync_to_async(sink.flush)()
+
+    started = time.monotonic()
+    postponed = 0
+    sink = ChannelSink()
+    try:
+        client_pool.run_all(run_sweep)
+    except ConnectionError as e:
+        # Batches saved so far are kept, as below
+        log.error(f"Connection failed during sweep: {e}")
+    except Exception as e:
+        # Batches saved so far are kept: refresh the derived tables anyway
+        log.error(f"Sweep stopped - {e}", exc_info=True)
+    try:
+        refresh_facet_counts()
+    except DatabaseError as e:
+        log.error(f"Facet counts were not refreshed - {e}")
+    try:
+        refresh_rankings()
+    except DatabaseError as e:
+        log.error(f"Rankings were not refreshed - {e}")
     log.info(
-        f"Stats for channel {channel.title} saved: participants={current_count}, growth={daily_growth}"
+        f"Sweep finished: {sink.saved}/{len(channels)} channels saved with "
+        f"{len(client_pool.accounts)} accounts "
+        f"in {time.monotonic() - started:.1f} s, {postponed} postponed, "
+        f"{sink.failed} failed to save"
     )
 
 
 @shared_task
-def parse_all_channels():
-    """Task for Celery: parse all channels from database"""
-    channels = TelegramChannel.objects.all()
-    if not channels:
-        log.warning("There are no channels")
+def downsample_channel_stats():
+    """Task for Celery: thin out old ChannelStats, see `downsample_stats`"""
+    started = time.monotonic()
+    try:
+        report = downsample_stats()
+    except DatabaseError as e:
+        log.error(f"Stats downsampling failed - {e}")
         return
-
-    for channel in channels:
-        # start task for parsing
-        parse_channel.delay(channel.channel_id)
-        # add pause between parsing, 15s + random value
-        pause = 15 + random.uniform(0, 5)
-        log.info(
-            f"Started task for channel {channel.channel_id}, next one in {pause:.2f} s"
-        )
-        time.sleep(pause)
+    reclaimed = (
+        f"~{report['bytes'] / 1024 ** 2:.1f} MB"
+        if report['bytes'] is not None else "unknown size"
+    )
+    log.info(
+        f"Stats downsampled: {report['removed']} rows removed, "
+        f"{reclaimed} reclaimed in {time.monotonic() - started:.1f} s"
+    )
+    return report
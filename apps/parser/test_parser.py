@@ -0,0 +1,555 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from io import StringIO
+
+from celery.exceptions import Retry
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from telethon.errors import FloodWaitError
+
+from apps.parser.clients import TelegramClientPool
+from apps.parser.metrics import channel_metrics
+from apps.parser.models import (
+    ChannelStats,
+    ChannelStatsRollup,
+    TelegramChannel,
+)
+from apps.parser.parser import RETRY_AFTER, parse_many, tg_parser
+from apps.parser.ratelimit import (
+    AsyncTokenBucket,
+    _limiters,
+    get_rate_limiter,
+)
+from apps.parser.retention import downsample_stats
+from apps.parser.rollups import apply_stat, update_rollups
+from apps.parser.sharding import HashRing, parse_sharded, route_channel
+from apps.parser.sink import ChannelSink, posts_min_id
+from apps.parser.tasks import parse_channel
+from tests.fakes import FakeTelegramClient
+
+
+class AsyncTokenBucketTest(SimpleTestCase):
+    def test_burst_then_paced(self):
+        now = [0.0]
+        bucket = AsyncTokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        # Bucket is empty: every next caller queues half a second later
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+
+        now[0] = 10.0
+        self.assertEqual(bucket.reserve(), 0)
+
+    @override_settings(TELEGRAM_REQUESTS_PER_SECOND=8,
+                       TELEGRAM_REQUESTS_BURST=8, CELERY_WORKER_CONCURRENCY=4)
+    def test_budget_split_between_workers(self):
+        self.addCleanup(_limiters.pop, 'split', None)
+        limiter = get_rate_limiter('split')
+        # every worker child holds a quarter of the account budget
+        self.assertEqual((limiter.rate, limiter.capacity), (2, 2))
+
+
+class TgParserTest(SimpleTestCase):
+    def test_channels_overlap_on_one_loop(self):
+        client = FakeTelegramClient(latency=0.1)
+        limiter = AsyncTokenBucket(rate=1000, capacity=1000)
+
+        async def parse_all():
+            return await asyncio.gather(*(
+                tg_parser(f'channel_{i}', client, rate_limiter=limiter)
+                for i in range(10)
+            ))
+
+        started = time.perf_counter()
+        results = asyncio.run(parse_all())
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual(results[0]['title'], 'Channel channel_0')
+        self.assertEqual(results[0]['participants_count'], 5000)
+        self.assertGreater(client.max_in_flight, 1)
+        # 4 round trips per channel; sequential parsing would take 4 s
+        self.assertLess(elapsed, 1.5)
+
+    def test_flood_wait_returns_retry_after(self):
+        class FloodingClient(FakeTelegramClient):
+            async def __call__(self, request):
+                raise FloodWaitError(request=request, capture=120)
+
+        limiter = AsyncTokenBucket(rate=1000, capacity=1000)
+        data = asyncio.run(tg_parser(
+            'channel', FloodingClient(latency=0), rate_limiter=limiter
+        ))
+
+        self.assertEqual(set(data), {RETRY_AFTER})
+        self.assertGreaterEqual(data[RETRY_AFTER], 120)
+        # The whole account is paused, nobody slept inside tg_parser
+        self.assertGreater(limiter.held_for(), 100)
+
+    def test_min_id_fetches_only_new_posts(self):
+        client = FakeTelegramClient(latency=0, posts=30)
+        limiter = AsyncTokenBucket(rate=1000, capacity=1000)
+
+        data = asyncio.run(tg_parser(
+            'channel', client, rate_limiter=limiter, min_id=27
+        ))
+        self.assertEqual(
+            [post['post_id'] for post in data['recent_views']], [30, 29, 28]
+        )
+        self.assertEqual(data['average_views'], 990)
+
+        # Nothing new: no posts and no average to overwrite the stored one
+        quiet = asyncio.run(tg_parser(
+            'channel', client, rate_limiter=limiter, min_id=30
+        ))
+        self.assertEqual(quiet['last_messages'], [])
+        self.assertEqual(quiet['recent_views'], [])
+        self.assertNotIn('average_views', quiet)
+        self.assertNotIn('posts_refreshed', quiet)
+
+        full = asyncio.run(tg_parser('channel', client, rate_limiter=limiter))
+        self.assertTrue(full['posts_refreshed'])
+
+
+class ParseManyTest(SimpleTestCase):
+    def test_bounded_and_streamed(self):
+        client = FakeTelegramClient(latency=0.01)
+        limiter = AsyncTokenBucket(rate=1000, capacity=1000)
+        usernames = [f'channel_{i}' for i in range(20)]
+
+        async def collect():
+            return [
+                item async for item in parse_many(
+                    usernames, client, concurrency=3, rate_limiter=limiter
+                )
+            ]
+
+        results = asyncio.run(collect())
+
+        self.assertCountEqual([username for username, _ in results], usernames)
+        self.assertTrue(all(data['title'] for _, data in results))
+        self.assertLessEqual(client.max_in_flight, 3)
+
+
+class TelegramClientPoolTest(SimpleTestCase):
+    def test_client_connects_once_per_process(self):
+        client = FakeTelegramClient(latency=0.01)
+        pool = TelegramClientPool(client_factory=lambda account: client)
+        limiter = AsyncTokenBucket(rate=1000, capacity=1000)
+        try:
+            for username in ('first', 'second', 'third'):
+                data = pool.run(tg_parser, username, rate_limiter=limiter)
+                self.assertEqual(data['username'], username)
+
+            async def from_other_loop():
+                return await pool.call(tg_parser, 'fourth',
+                                       rate_limiter=limiter)
+
+            self.assertEqual(asyncio.run(from_other_loop())['title'],
+                             'Channel fourth')
+            self.assertEqual(client.connects, 1)
+        finally:
+            pool.shutdown()
+        self.assertFalse(client.connected)
+
+    def test_broken_client_is_rebuilt(self):
+        class BrokenClient(FakeTelegramClient):
+            async def get_entity(self, url):
+                raise ConnectionError('Connection to Telegram failed')
+
+        broken, healthy = BrokenClient(latency=0), FakeTelegramClient(latency=0)
+        clients = iter([broken, healthy])
+        pool = TelegramClientPool(client_factory=lambda account: next(clients))
+        limiter = AsyncTokenBucket(rate=1000, capacity=1000)
+        try:
+            data = pool.run(tg_parser, 'channel', rate_limiter=limiter)
+        finally:
+            pool.shutdown()
+
+        # the real tg_parser let the error through: dropped and reconnected
+        self.assertEqual(data['title'], 'Channel channel')
+        self.assertEqual((broken.connects, healthy.connects), (1, 1))
+        self.assertFalse(broken.connected)
+
+
+@override_settings(TELEGRAM_REQUESTS_PER_SECOND=1000,
+                   TELEGRAM_REQUESTS_BURST=1000, PARSER_DRAIN_AFTER=5)
+class ParseShardedTest(SimpleTestCase):
+    def test_ring_is_stable(self):
+        ring = HashRing(['one', 'two', 'three'])
+        owners = {channel_id: ring.get(channel_id) for channel_id in range(300)}
+
+        self.assertEqual(set(owners.values()), {'one', 'two', 'three'})
+        # Removing an account only moves the channels it owned
+        smaller = HashRing(['one', 'two'])
+        for channel_id, owner in owners.items():
+            if owner != 'three':
+                self.assertEqual(smaller.get(channel_id), owner)
+
+    def test_account_in_flood_wait_is_drained(self):
+        clients = {
+            'shard_active': FakeTelegramClient(latency=0.01),
+            'shard_flood': FakeTelegramClient(latency=0.01),
+        }
+        channels = {i: f'channel_{i}' for i in range(20)}
+
+        async def collect():
+            asyncio.ensure_future(get_rate_limiter('shard_flood').hold(60))
+            return [
+                item async for item in parse_sharded(
+                    channels, clients, concurrency=2
+                )
+            ]
+
+        results = asyncio.run(collect())
+
+        self.assertCountEqual([pk for pk, _ in results], channels)
+        self.assertEqual(clients['shard_flood'].calls, 0)
+
+    def test_dropped_connection_is_reconnected(self):
+        class DroppingClient(FakeTelegramClient):
+            async def get_entity(self, url):
+                if not self.calls:
+                    self.calls += 1
+                    raise ConnectionError('Connection to Telegram lost')
+                return await super().get_entity(url)
+
+        broken = DroppingClient(latency=0.01)
+        fresh = FakeTelegramClient(latency=0.01)
+        clients = {'shard_drop': broken, 'shard_ok': FakeTelegramClient(0.01)}
+        channels = {i: f'channel_{i}' for i in range(20)}
+
+        async def reconnect(account):
+            self.assertEqual(account, 'shard_drop')
+            await fresh.connect()
+            return fresh
+
+        async def collect():
+            return [
+                item async for item in parse_sharded(
+                    channels, clients, concurrency=2, reconnect=reconnect
+                )
+            ]
+
+        results = dict(asyncio.run(collect()))
+
+        self.assertCountEqual(results, channels)
+        self.assertTrue(all(data.get('title') for data in results.values()))
+        # One reconnect for both workers; the queue went on on `fresh`
+        self.assertEqual(fresh.connects, 1)
+        self.assertGreater(fresh.calls, 0)
+
+
+@override_settings(TELEGRAM_SESSIONS={'task_one': 'x', 'task_two': 'y'})
+class ParseChannelTaskTest(TestCase):
+    def setUp(self):
+        # fresh process-wide limiters for the accounts
+        for account in ('task_one', 'task_two'):
+            self.addCleanup(_limiters.pop, account, None)
+            _limiters.pop(account, None)
+
+    def test_held_accounts_retry_without_waiting(self):
+        TelegramChannel.objects.create(
+            channel_id=1, title='Title', username='channel'
+        )
+        get_rate_limiter('task_one').pause(3600)
+        get_rate_limiter('task_two').pause(60)
+
+        started = time.monotonic()
+        with self.assertRaises(Retry):
+            parse_channel(1)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_route_skips_held_owner(self):
+        accounts = ['task_one', 'task_two']
+        owner = HashRing(accounts).get(1)
+        self.assertEqual(route_channel(1, accounts), (owner, 0.0))
+
+        get_rate_limiter(owner).pause(60)
+        other, = set(accounts) - {owner}
+        self.assertEqual(route_channel(1, accounts), (other, 0.0))
+
+        get_rate_limiter(other).pause(30)
+        account, retry_after = route_channel(1, accounts)
+        self.assertIsNone(account)
+        self.assertAlmostEqual(retry_after, 30, delta=1)
+
+
+class ChannelSinkTest(TestCase):
+    @staticmethod
+    def parsed(channel_id, participants):
+        return {
+            'channel_id': channel_id,
+            'title': f'Channel {channel_id}',
+            'username': f'channel_{channel_id}',
+            'description': '',
+            'participants_count': participants,
+            'pinned_messages': [],
+            'last_messages': [],
+            'average_views': 10,
+        }
+
+    def test_batch_costs_constant_queries(self):
+        TelegramChannel.objects.create(channel_id=1, title='Old title')
+
+        # 3 batches: 2 full, the tail flushed on exit; each batch is
+        # previous stats read + upsert + stats insert + rollups read and
+        # upsert, inside a savepoint
+        with self.assertNumQueries(3 * 7):
+            with ChannelSink(batch_size=30, flush_interval=60) as sink:
+                for channel_id in range(1, 81):
+                    sink.add(self.parsed(channel_id, 1000))
+
+        self.assertEqual(sink.saved, 80)
+        self.assertEqual(TelegramChannel.objects.count(), 80)
+        self.assertEqual(ChannelStats.objects.count(), 80)
+        self.assertEqual(
+            TelegramChannel.objects.get(channel_id=1).title, 'Channel 1'
+        )
+
+    def test_growth_from_previous_day(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        channel = TelegramChannel.objects.create(
+            channel_id=1, title='Title',
+            stats_participants_count=900, stats_parsed_at=yesterday,
+        )
+
+        with self.assertNumQueries(7):
+            with ChannelSink() as sink:
+                sink.add(self.parsed(1, 1000))
+
+        channel.refresh_from_db()
+        self.assertEqual(channel.daily_growth, 100)
+        self.assertEqual(channel.stats_participants_count, 1000)
+        self.assertEqual(channel.channelstats_set.get().daily_growth, 100)
+
+    def test_bad_rows_are_counted_not_fatal(self):
+        empty = self.parsed(1, 'Нет участников')
+        untitled = {**self.parsed(2, 1000), 'title': ''}
+        no_id = self.parsed(3, 1000)
+        del no_id['channel_id']
+
+        with ChannelSink() as sink:
+            for data in (empty, untitled, no_id, self.parsed(4, '1500')):
+                sink.add(data)
+
+        self.assertEqual((sink.saved, sink.failed), (2, 2))
+        self.assertEqual(
+            dict(TelegramChannel.objects.values_list(
+                'channel_id', 'participants_count'
+            )),
+            {1: 0, 4: 1500},
+        )
+
+    @override_settings(PARSER_RECENT_POSTS=4)
+    def test_new_posts_merged_into_window(self):
+        def post(post_id, views):
+            return {'post_id': post_id, 'post_text': f'Post {post_id}',
+                    'post_views': views, 'post_date': None}
+
+        first = self.parsed(1, 1000)
+        first['last_messages'] = [post(3, 300), post(2, 200), post(1, 100)]
+        second = self.parsed(1, 1000)
+        # Fetched with min_id=3: one new post
+        second['last_messages'] = [post(4, 400)]
+        quiet = self.parsed(1, 1000)
+        del quiet['average_views']
+
+        for data in (first, second, quiet):
+            with self.assertNumQueries(7):
+                with ChannelSink() as sink:
+                    sink.add(data)
+
+        channel = TelegramChannel.objects.get(channel_id=1)
+        self.assertEqual(channel.last_post_id, 4)
+        self.assertEqual(
+            [item['post_id'] for item in channel.last_messages], [4, 3, 2]
+        )
+        self.assertEqual(
+            [item['post_id'] for item in channel.recent_views], [4, 3, 2, 1]
+        )
+        self.assertEqual(channel.average_views, 250)
+
+    @override_settings(PARSER_POSTS_REFRESH_DAYS=7)
+    def test_full_fetch_is_due_after_refresh_days(self):
+        now = timezone.now()
+        self.assertIsNone(posts_min_id(None, None, now))
+        self.assertIsNone(posts_min_id(40, None, now))
+        self.assertEqual(posts_min_id(40, now - timedelta(days=6), now), 40)
+        self.assertIsNone(posts_min_id(40, now - timedelta(days=8), now))
+
+        full = {**self.parsed(1, 1000), 'posts_refreshed': True}
+        with ChannelSink() as sink:
+            sink.add(full)
+        refreshed_at = TelegramChannel.objects.get().posts_refreshed_at
+        self.assertIsNotNone(refreshed_at)
+
+        # an incremental parse keeps the date of the last full fetch
+        with ChannelSink() as sink:
+            sink.add(self.parsed(1, 1000))
+        self.assertEqual(
+            TelegramChannel.objects.get().posts_refreshed_at, refreshed_at
+        )
+
+
+class ChannelMetricsTest(SimpleTestCase):
+    def test_batch_metrics(self):
+        now = datetime(2025, 3, 10, 12, tzinfo=dt_timezone.utc)
+        # 10 posts 6 hours apart, views grow with the age of the post
+        posts = [
+            {
+                'post_views': 100 + i * 10,
+                'post_date': (now - timedelta(hours=6 * i + 1)).isoformat(),
+            }
+            for i in range(10)
+        ]
+
+        metrics = channel_metrics([
+            {'participants_count': 1000, 'average_views': 250,
+             'last_messages': posts},
+            {'participants_count': 0, 'average_views': 0,
+             'last_messages': []},
+        ], now)
+
+        self.assertEqual(metrics[0]['engagement_rate'], 0.25)
+        self.assertEqual(metrics[0]['posts_per_day'], 4.0)
+        # <1 day: 115 views, 1-2 days: 155, 2-3 days: 185, of 145 average
+        self.assertEqual(
+            metrics[0]['views_curve'], [0.793, 1.069, 1.276, None, None]
+        )
+        self.assertEqual(
+            metrics[1],
+            {'engagement_rate': 0.0, 'posts_per_day': 0.0,
+             'views_curve': [None] * 5},
+        )
+
+
+class RollupTest(TestCase):
+    def test_incremental_matches_rebuild(self):
+        channel = TelegramChannel.objects.create(channel_id=1, title='Title')
+        monday = datetime(2025, 1, 6, 10, tzinfo=dt_timezone.utc)
+        # (days after monday, hours, participants, daily growth)
+        records = [(0, 0, 100, 0), (0, 5, 110, 0), (1, 0, 130, 30),
+                   (1, 3, 125, 25), (7, 0, 140, 15)]
+        for days, hours, participants, growth in records:
+            stat = ChannelStats.objects.create(
+                channel=channel, participants_count=participants,
+                daily_growth=growth,
+            )
+            stat.parsed_at = monday + timedelta(days=days, hours=hours)
+            stat.save(update_fields=['parsed_at'])
+            update_rollups([stat])
+
+        week = ChannelStatsRollup.objects.get(
+            channel=channel, period=ChannelStatsRollup.WEEK,
+            period_start=monday.date(),
+        )
+        self.assertEqual(
+            (week.participants_min, week.participants_max,
+             week.participants_last, week.growth),
+            (100, 130, 125, 25),
+        )
+        month = ChannelStatsRollup.objects.get(
+            channel=channel, period=ChannelStatsRollup.MONTH,
+        )
+        self.assertEqual((month.participants_last, month.growth), (140, 40))
+
+        incremental = set(ChannelStatsRollup.objects.values_list(
+            'period', 'period_start', 'participants_min', 'participants_max',
+            'participants_last', 'growth',
+        ))
+        call_command('rebuild_rollups', all=True, stdout=StringIO())
+        rebuilt = set(ChannelStatsRollup.objects.values_list(
+            'period', 'period_start', 'participants_min', 'participants_max',
+            'participants_last', 'growth',
+        ))
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(len(rebuilt), 3 + 2 + 1)
+
+    @override_settings(STATS_FULL_RESOLUTION_DAYS=30)
+    def test_rebuild_keeps_downsampled_periods(self):
+        channel = TelegramChannel.objects.create(channel_id=1, title='Title')
+        now = timezone.now()
+        for days in (100, 2):
+            stat = ChannelStats.objects.create(
+                channel=channel, participants_count=days, daily_growth=1,
+            )
+            ChannelStats.objects.filter(pk=stat.pk).update(
+                parsed_at=now - timedelta(days=days)
+            )
+        old_day = (now - timedelta(days=100)).date()
+        # the rollup built before the day was downsampled
+        ChannelStatsRollup.objects.create(
+            channel=channel, period=ChannelStatsRollup.DAY,
+            period_start=old_day, participants_min=50,
+            participants_max=150, participants_last=100, growth=7,
+            last_parsed_at=now - timedelta(days=100),
+        )
+
+        call_command('rebuild_rollups', stdout=StringIO())
+
+        old = ChannelStatsRollup.objects.get(
+            period=ChannelStatsRollup.DAY, period_start=old_day
+        )
+        self.assertEqual((old.participants_min, old.growth), (50, 7))
+        self.assertTrue(ChannelStatsRollup.objects.filter(
+            period=ChannelStatsRollup.DAY,
+            period_start=(now - timedelta(days=2)).date(),
+        ).exists())
+        self.assertEqual(ChannelStatsRollup.objects.filter(
+            period_start__lte=old_day
+        ).count(), 1)
+
+    def test_older_record_keeps_day_growth(self):
+        rollups = {}
+        later = datetime(2025, 1, 6, 12, tzinfo=dt_timezone.utc)
+        apply_stat(rollups, 1, 120, 20, later)
+        apply_stat(rollups, 1, 90, 5, later - timedelta(hours=6))
+
+        day = rollups[(1, ChannelStatsRollup.DAY, later.date())]
+        self.assertEqual((day.participants_min, day.participants_last,
+                          day.growth), (90, 120, 20))
+
+
+@override_settings(STATS_FULL_RESOLUTION_DAYS=30,
+                   STATS_DAILY_RESOLUTION_DAYS=180,
+                   STATS_RETENTION_BATCH_SIZE=2)
+class DownsampleStatsTest(TestCase):
+    def test_keeps_latest_per_day_then_per_week(self):
+        channel = TelegramChannel.objects.create(channel_id=1, title='Title')
+        # a Monday, so is the day 30 weeks before
+        now = datetime(2025, 6, 30, 12, tzinfo=dt_timezone.utc)
+        monday = now - timedelta(weeks=30)
+        moments = {
+            # full resolution: everything stays
+            'recent': [now - timedelta(days=1, hours=h) for h in (1, 2)],
+            # daily resolution: the last record of the day stays
+            'daily': [now - timedelta(days=40, hours=h) for h in (1, 2, 3)],
+            # weekly resolution: the last record of the week stays
+            'weekly': [monday + timedelta(days=d) for d in range(5)],
+        }
+        ids = {}
+        for name, dates in moments.items():
+            ids[name] = []
+            for moment in dates:
+                stat = ChannelStats.objects.create(
+                    channel=channel, participants_count=100
+                )
+                ChannelStats.objects.filter(pk=stat.pk).update(
+                    parsed_at=moment
+                )
+                ids[name].append(stat.pk)
+
+        report = downsample_stats(now=now)
+
+        self.assertEqual(report['removed'], 6)
+        self.assertCountEqual(
+            ChannelStats.objects.values_list('pk', flat=True),
+            [*ids['recent'], ids['daily'][0], ids['weekly'][-1]],
+        )
+        self.assertEqual(downsample_stats(now=now)['removed'], 0)
@@ -0,0 +1,294 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.parser.facets import (
+    FACET_FIELDS,
+    refresh_facet_counts,
+    shift_facet_count,
+)
+from apps.parser.models import ChannelFacetCount, TelegramChannel
+from apps.parser.rankings import refresh_rankings
+from apps.parser.sink import ChannelSink
+from config.pagination import encode_cursor
+
+
+class ParserListViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TelegramChannel.objects.bulk_create(
+            TelegramChannel(
+                channel_id=i,
+                title=f'Channel {i}',
+                # equal counts: the id has to break ties between pages
+                participants_count=1000 * (i // 2),
+                category='news' if i % 3 else 'tech',
+                last_messages=[{'text': 'x' * 1000}] * 10,
+            )
+            for i in range(7)
+        )
+
+    def get_page(self, **params):
+        response = self.client.get(
+            reverse('parser:list'), params, HTTP_X_INERTIA='true'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['props']
+
+    def test_cursor_walks_whole_catalog(self):
+        seen = []
+        cursor = ''
+        while True:
+            # one query for the page
+            with self.assertNumQueries(1):
+                props = self.get_page(limit=3, cursor=cursor)
+            seen.extend(props['channels'])
+            cursor = props['nextCursor']
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len({channel['id'] for channel in seen}), 7)
+        counts = [channel['participants_count'] for channel in seen]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertNotIn('last_messages', seen[0])
+
+    def test_filter_and_sort(self):
+        props = self.get_page(category='tech', sort='parsed')
+
+        self.assertEqual(
+            {channel['category'] for channel in props['channels']}, {'tech'}
+        )
+        self.assertEqual(props['sort'], 'parsed')
+
+    def test_cursor_keeps_microseconds(self):
+        base = datetime(2025, 3, 10, 12, tzinfo=timezone.utc)
+        for channel in TelegramChannel.objects.all():
+            # sub-millisecond steps, two channels on every timestamp
+            TelegramChannel.objects.filter(pk=channel.pk).update(
+                parsed_at=base + timedelta(microseconds=100 * (channel.pk // 2))
+            )
+
+        for sort in ('parsed', '-parsed'):
+            seen = []
+            cursor = ''
+            # 4 pages; a cursor repeating page 1 must not loop forever
+            for _ in range(5):
+                props = self.get_page(sort=sort, limit=2, cursor=cursor)
+                seen.extend(channel['id'] for channel in props['channels'])
+                cursor = props['nextCursor']
+                if not cursor:
+                    break
+            self.assertEqual(len(seen), 7, sort)
+            self.assertEqual(len(set(seen)), 7, sort)
+
+    def test_bad_cursor_is_rejected(self):
+        for values in (['x', 1], [None, 1], [1, 2], [[], 1]):
+            cursor = encode_cursor(values)
+            response = self.client.get(
+                reverse('parser:list'), {'sort': 'parsed', 'cursor': cursor},
+                HTTP_X_INERTIA='true',
+            )
+            self.assertEqual(response.status_code, 400, values)
+
+    def test_unknown_sort_is_rejected(self):
+        response = self.client.get(
+            reverse('parser:list'), {'sort': 'title'}, HTTP_X_INERTIA='true'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class ParserAggregatesViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TelegramChannel.objects.bulk_create(
+            TelegramChannel(
+                channel_id=i,
+                title=f'Channel {i}',
+                participants_count=100 * i,
+                average_views=10,
+                category='news' if i < 3 else 'tech',
+            )
+            for i in range(1, 6)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_aggregates(self, **params):
+        response = self.client.get(reverse('parser:aggregates'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_aggregates_are_computed_and_cached(self):
+        data = self.get_aggregates(top=2)
+
+        self.assertEqual(data['totals']['channels'], 5)
+        self.assertEqual(data['totals']['participants'], 1500)
+        self.assertEqual(data['totals']['avg_participants'], 300)
+        self.assertEqual(
+            [(row['category'], row['channels']) for row in data['categories']],
+            [('tech', 3), ('news', 2)],
+        )
+        self.assertEqual(
+            [row['participants_count'] for row in data['top']['participants']],
+            [500, 400],
+        )
+
+        # aggregates come from the cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_aggregates(top=2), data)
+
+    def test_filters_and_invalidation(self):
+        self.assertEqual(
+            self.get_aggregates(category='news')['totals']['channels'], 2
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with ChannelSink() as sink:
+                sink.add({'channel_id': 100, 'title': 'New',
+                          'participants_count': 50, 'category': 'news'})
+
+        self.assertEqual(
+            self.get_aggregates(category='news')['totals']['channels'], 3
+        )
+
+
+class ParserSearchViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TelegramChannel.objects.create(
+            channel_id=1, title='Новости IT', username='it_news',
+            participants_count=10,
+        )
+        TelegramChannel.objects.create(
+            channel_id=2, title='Crypto', username='crypto',
+            description='Новости блокчейна', participants_count=20,
+        )
+        TelegramChannel.objects.create(
+            channel_id=3, title='Cats', username='cats', participants_count=30,
+        )
+
+    def search(self, **params):
+        response = self.client.get(reverse('parser:search'), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['channel_id'] for row in response.json()['results']]
+
+    def test_search_matches_title_username_and_description(self):
+        self.assertCountEqual(self.search(q='Новости'), [1, 2])
+        self.assertEqual(self.search(q='cats'), [3])
+        self.assertEqual(self.search(q='  '), [])
+
+
+class ParserCatalogViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rows = [
+            ('news', 'ru', 'ru', 100), ('news', 'ru', 'ru', 200),
+            ('news', 'kz', 'ru', 300), ('tech', 'ru', 'en', 400),
+            ('tech', 'us', 'en', 500),
+        ]
+        TelegramChannel.objects.bulk_create(
+            TelegramChannel(
+                channel_id=i, title=f'Channel {i}', category=category,
+                country=country, language=language, participants_count=count,
+            )
+            for i, (category, country, language, count) in enumerate(rows)
+        )
+        refresh_facet_counts()
+
+    def setUp(self):
+        cache.clear()
+
+    def get_catalog(self, **params):
+        response = self.client.get(reverse('parser:catalog'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    @staticmethod
+    def counts(data, facet):
+        return {row['value']: row['count'] for row in data['facets'][facet]}
+
+    def test_facet_counts_from_table(self):
+        # the page, 3 facets and the total from the table
+        with self.assertNumQueries(1 + 4):
+            data = self.get_catalog(category='news')
+
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(len(data['results']), 3)
+        # own facet ignores its selection, the others respect it
+        self.assertEqual(self.counts(data, 'category'), {'news': 3, 'tech': 2})
+        self.assertEqual(self.counts(data, 'country'), {'ru': 2, 'kz': 1})
+
+    def test_multiple_values_and_ranges(self):
+        data = self.get_catalog(country=['ru', 'us'], min_participants=150)
+
+        self.assertEqual(
+            [row['participants_count'] for row in data['results']],
+            [500, 400, 200],
+        )
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(self.counts(data, 'language'), {'en': 2, 'ru': 1})
+
+    def test_shift_matches_recount(self):
+        def table():
+            return set(ChannelFacetCount.objects.values_list(
+                *FACET_FIELDS, 'channels'
+            ))
+
+        moved = {'category': 'tech', 'country': 'us', 'language': 'en'}
+        TelegramChannel.objects.filter(channel_id=0).update(**moved)
+        shift_facet_count(
+            {'category': 'news', 'country': 'ru', 'language': 'ru'}, moved
+        )
+        new = {'category': 'cats', 'country': None, 'language': None}
+        TelegramChannel.objects.create(channel_id=10, title='Cats', **new)
+        shift_facet_count(None, new)
+        shifted = table()
+
+        refresh_facet_counts()
+        self.assertEqual(shifted, table())
+
+
+class ParserRankingViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TelegramChannel.objects.bulk_create(
+            TelegramChannel(
+                channel_id=i,
+                title=f'Channel {i}',
+                username=f'channel_{i}',
+                category='news' if i % 2 else 'tech',
+                participants_count=i * 100,
+            )
+            for i in range(1, 11)
+        )
+
+    def get(self, **params):
+        return self.client.get(reverse('parser:rankings'), params).json()
+
+    def test_pages_and_movement(self):
+        self.assertEqual(refresh_rankings(top=3), 3 * (3 + 3 + 3))
+
+        data = self.get(category='news', limit=2)
+        self.assertEqual(
+            [row['username'] for row in data['results']],
+            ['channel_9', 'channel_7'],
+        )
+        self.assertIsNone(data['results'][0]['movement'])
+        with self.assertNumQueries(1):
+            data = self.get(category='news', limit=2, after=data['next'])
+        self.assertEqual(data['results'][0]['rank'], 3)
+        self.assertIsNone(data['next'])
+
+        TelegramChannel.objects.filter(channel_id=1).update(
+            participants_count=950
+        )
+        refresh_rankings(top=3)
+        top = self.get(limit=3)['results']
+        self.assertEqual(
+            [(row['username'], row['movement']) for row in top],
+            [('channel_10', 0), ('channel_1', None), ('channel_9', -1)],
+        )
@@ -7,5 +7,9 @@ app_name = 'parser'
 urlpatterns = [
     path('', views.ParserView.as_view(), name='parser'),
     path('list', views.ParserListView.as_view(), name='list'),
+    path('catalog', views.ParserCatalogView.as_view(), name='catalog'),
+    path('aggregates', views.ParserAggregatesView.as_view(), name='aggregates'),
+    path('search', views.ParserSearchView.as_view(), name='search'),
+    path('rankings', views.ParserRankingView.as_view(), name='rankings'),
     path('<int:pk>/', views.ParserDetailView.as_view(), name='detail'),
 ]
\ No newline at end of file
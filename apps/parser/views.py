@@ -1,24 +1,37 @@
 import logging
+from datetime import timedelta
 
 from asgiref.sync import async_to_sync
-from django.conf import settings
 from django.contrib import messages
-from django.core.exceptions import ImproperlyConfigured
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import BadRequest, ObjectDoesNotExist
+from django.db.models import Sum
 
+from django.http import JsonResponse
 from django.urls import reverse_lazy
 from django.utils import timezone
-from django.views.generic import DetailView, FormView, ListView
-from telethon import TelegramClient
-from telethon.sessions import StringSession
+from django.views.generic import DetailView, FormView, ListView, View
 
+from apps.parser.aggregates import cached_channel_aggregates
+from apps.parser.clients import client_pool
+from apps.parser.facets import (
+    FACET_FIELDS,
+    facet_counts,
+    filtered_facet_counts,
+    shift_facet_count,
+)
 from apps.parser.forms import ChannelParseForm
-from apps.parser.models import ChannelStats, TelegramChannel
-from apps.parser.parser import tg_parser
+from apps.parser.models import ChannelRanking, TelegramChannel
+from apps.parser.parser import RETRY_AFTER, tg_parser
+from apps.parser.ratelimit import DEFAULT_ACCOUNT, get_rate_limiter
+from apps.parser.rollups import range_rollups
+from apps.parser.search import search_channels
+from apps.parser.sharding import route_channel
+from apps.parser.sink import ChannelSink
 
 from inertia import render as inertia_render
 
 from config.mixins import UserAuthenticationCheckMixin
+from config.pagination import keyset_page
 
 log = logging.getLogger(__name__)
 
@@ -28,85 +41,18 @@ class ParserView(UserAuthenticationCheckMixin, FormView):
     template_name = 'parser/parse_channel.html'
     success_url = reverse_lazy("parser:list")
 
-    def get_telegram_client(self):
-        """Get Telegram client for parser work"""
-        if not settings.TELEGRAM_SESSION_STRING:
-            raise ImproperlyConfigured(
-                'TELEGRAM_SESSION_STRING\
-                    (needed by Telethon to parse data from Telegram)\
-                        is not set. Please run\
-                            `uv run python3 manage.py set_sessions_string`'
-            )
-        return TelegramClient(
-            StringSession(settings.TELEGRAM_SESSION_STRING),
-            settings.TELEGRAM_API_ID,
-            settings.TELEGRAM_API_HASH,
-        )
-
-    async def async_tg_parser(self, url, limit=10):
-        """Parser wrapper"""
-        client = self.get_telegram_client()
-        await client.connect()
-        try:
-            return await tg_parser(url, client, limit)
-        finally:
-            await client.disconnect()
-    
-
-    def save_channel(self, data, request=None):
-        """Create or update channel"""
-        channel, created = TelegramChannel.objects.update_or_create(
-            channel_id=data["channel_id"],
-            defaults={
-                'title': data['title'],
-                'username': data['username'],
-                'description': data['description'],
-                'participants_count': data['participants_count'],
-                'pinned_messages': data['pinned_messages'],
-                'last_messages': data['last_messages'],
-                'average_views': data['average_views'],
-                'language': data['language'],
-                'country': data['country'],
-                'category': data['category'],
-            }
-        )
-
-        if created:
-            log.info(f"New channel created: {channel.title}")
-        else:
-            log.info(f"Channel updated: {channel.title}")
-
-        return channel, created
-            
-    def save_stats(self, channel, data):
-        """Create stats record with growth calculation"""
-        last_stats = (
-            ChannelStats.objects.filter(channel=channel).order_by("-parsed_at").first()
-        )
-        current_date = timezone.now()
-        current_count = data["participants_count"]
-
-        if last_stats and last_stats.parsed_at.date() != current_date.date():
-            daily_growth = current_count - last_stats.participants_count
-        else:
-            daily_growth = last_stats.daily_growth if last_stats else 0
-
-        # Create new statistics
-        ChannelStats.objects.create(
-            channel=channel,
-            participants_count=current_count,
-            daily_growth=daily_growth,
-            parsed_at=current_date,
+    async def async_tg_parser(self, url, limit=10, account=DEFAULT_ACCOUNT):
+        """Parser wrapper: reuses the connected client of this process"""
+        return await client_pool.call(
+            tg_parser, url, limit, account=account,
+            rate_limiter=get_rate_limiter(account),
         )
 
-        # Update parsing date for Telegram channel
-        channel.parsed_at = current_date
-
-        channel.save(update_fields=["parsed_at"])
-        log.info(
-            f"For channel: {channel.title} parsed stat; "
-            f"- participants: {current_count} growth: {daily_growth}"
-        )
+    def flood_wait(self, form, seconds):
+        form.add_error(None, (
+            f'Telegram ограничил запросы, повторите через {seconds:.0f} с'
+        ))
+        return self.form_invalid(form)
 
     def form_valid(self, form):
         """ Обработка формы """
@@ -117,10 +63,19 @@ class ParserView(UserAuthenticationCheckMixin, FormView):
         category = form.cleaned_data['category']
         log.info(f'Начинаем обработку данных для канала; '
                  f'- {identifier} лимит - {limit}')
+        # Every account in FloodWait: answer now instead of holding the
+        # request. With no account configured the pool explains the setup
+        account, held = route_channel(
+            identifier, client_pool.accounts or [DEFAULT_ACCOUNT]
+        )
+        if account is None:
+            return self.flood_wait(form, held)
         try:
             # Start async parsing function
             async_parser = async_to_sync(self.async_tg_parser)
-            parsed_data = async_parser(identifier, limit)
+            parsed_data = async_parser(identifier, limit, account)
+            if RETRY_AFTER in parsed_data:
+                return self.flood_wait(form, parsed_data[RETRY_AFTER])
             parsed_data.update({'language': language,
                                 'country': country,
                                 'category': category})
@@ -128,15 +83,26 @@ class ParserView(UserAuthenticationCheckMixin, FormView):
             log.info(f'Парсинг завершен для канала;'
                      f'- {parsed_data['title']} ({parsed_data['channel_id']}')
 
-            # Saving data
-            channel, created = self.save_channel(parsed_data)
-            self.save_stats(channel, parsed_data)
+            # Saving data: same upsert path as the Celery sweep
+            before = TelegramChannel.objects.filter(
+                channel_id=parsed_data['channel_id']
+            ).values(*FACET_FIELDS).first()
+            created = before is None
+            with ChannelSink(batch_size=1) as sink:
+                sink.add(parsed_data)
+            if sink.failed:
+                form.add_error(None, 'Не удалось сохранить канал')
+                return self.form_invalid(form)
+            # the form sets category, country and language
+            shift_facet_count(
+                before, {field: parsed_data[field] for field in FACET_FIELDS}
+            )
 
             # Generating user message
             message = (
-                f"New channel created: {channel.title}"
+                f"New channel created: {parsed_data['title']}"
                 if created
-                else f"Channel updated: {channel.title}"
+                else f"Channel updated: {parsed_data['title']}"
             )
             messages.success(self.request, message)
 
@@ -147,26 +113,280 @@ class ParserView(UserAuthenticationCheckMixin, FormView):
             return self.form_invalid(form)
 
 
-class ParserListView(ListView):
+class ChannelFilterMixin:
+    """
+    Catalog filters from query parameters, shared by the catalog views.
+
+    Facets (`category`, `country`, `language`) take one or more values
+    (`?country=ru&country=kz`); ranges take integers.
+    """
+    filter_fields = FACET_FIELDS
+    range_params = {
+        'min_participants': 'participants_count__gte',
+        'max_participants': 'participants_count__lte',
+        'min_views': 'average_views__gte',
+        'max_views': 'average_views__lte',
+    }
+
+    def get_facet_filters(self):
+        """Facet field -> selected values"""
+        return {
+            field: values
+            for field in self.filter_fields
+            if (values := [v for v in self.request.GET.getlist(field) if v])
+        }
+
+    def get_range_filters(self):
+        return {
+            lookup: int(self.request.GET[param])
+            for param, lookup in self.range_params.items()
+            if self.request.GET.get(param, '').isdigit()
+        }
+
+    def get_filters(self):
+        return {
+            **{
+                f'{field}__in': values
+                for field, values in self.get_facet_filters().items()
+            },
+            **self.get_range_filters(),
+        }
+
+
+class ParserListView(ChannelFilterMixin, ListView):
+    """
+    Channel catalog page.
+
+    Only the list columns of one page are sent to the frontend; pages are
+    addressed by a keyset cursor, so the payload and the query cost do not
+    grow with the catalog.
+
+    Query parameters:
+        sort: `participants` (default) or `parsed`, `-` prefix for
+              descending order (default: `-participants`)
+        cursor: `nextCursor` of the previous page
+        limit: Page size, up to `max_limit`
+        category, country, language: Facet values, may be repeated
+        min_participants, max_participants, min_views, max_views: Ranges
+    """
     model = TelegramChannel
     token = 'TEMP_TOKEN'
+    paginate_by = 50
+    max_limit = 100
+    # sort parameter -> keyset of the ordering (last field is unique)
+    sort_keys = {
+        'participants': ('participants_count', 'id'),
+        'parsed': ('parsed_at', 'id'),
+    }
+    list_fields = (
+        'id',
+        'channel_id',
+        'title',
+        'username',
+        'participants_count',
+        'average_views',
+        'daily_growth',
+        'category',
+        'country',
+        'language',
+        'parsed_at',
+    )
+
+    def get_queryset(self):
+        return TelegramChannel.objects.filter(
+            **self.get_filters()
+        ).values(*self.list_fields)
+
+    def get_sort(self):
+        sort = self.request.GET.get('sort', '-participants')
+        descending = sort.startswith('-')
+        if sort.lstrip('-') not in self.sort_keys:
+            raise BadRequest(f'Неизвестная сортировка: {sort}')
+        return sort, self.sort_keys[sort.lstrip('-')], descending
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.GET.get('limit', self.paginate_by))
+        except ValueError:
+            raise BadRequest('limit должен быть числом')
+        return max(1, min(limit, self.max_limit))
 
     def get(self, request, *args, **kwargs):
-        channels = self.get_queryset()
-    
+        sort, fields, descending = self.get_sort()
+        channels, next_cursor = keyset_page(
+            self.get_queryset(),
+            fields,
+            cursor=request.GET.get('cursor'),
+            limit=self.get_limit(),
+            descending=descending,
+        )
+
         return inertia_render(
             request,
             'ChannelAnalytics',
             props={
                 "channels": channels,
-                "csrfToken": self.token,   
+                "nextCursor": next_cursor,
+                "sort": sort,
+                "filters": {
+                    **self.get_facet_filters(),
+                    **{
+                        param: request.GET[param]
+                        for param in self.range_params if param in request.GET
+                    },
+                },
+                "csrfToken": self.token,
             }
         )
 
 
+class ParserCatalogView(ParserListView):
+    """
+    Faceted catalog as JSON: one page of channels plus facet counts.
+
+    Takes the parameters of `ParserListView`. Facet counts come from the
+    `ChannelFacetCount` table refreshed after parse sweeps; with a range
+    filter they are counted over the matching channels and cached.
+    """
+
+    def get(self, request, *args, **kwargs):
+        sort, fields, descending = self.get_sort()
+        channels, next_cursor = keyset_page(
+            self.get_queryset(),
+            fields,
+            cursor=request.GET.get('cursor'),
+            limit=self.get_limit(),
+            descending=descending,
+        )
+        selected = self.get_facet_filters()
+        ranges = self.get_range_filters()
+        facets = (
+            filtered_facet_counts(selected, ranges) if ranges
+            else facet_counts(selected)
+        )
+        return JsonResponse({
+            'results': channels,
+            'nextCursor': next_cursor,
+            'total': facets.pop('total'),
+            'facets': facets,
+        })
+
+
+class ParserAggregatesView(ChannelFilterMixin, View):
+    """
+    Catalog aggregates as JSON: totals, averages, categories, top lists.
+
+    Computed in SQL and cached per filter combination until the next
+    channel data is saved. Accepts the filters of `ParserListView` and
+    `top` (top lists size, up to `max_top`).
+    """
+    default_top = 5
+    max_top = 20
+
+    def get(self, request, *args, **kwargs):
+        try:
+            top = int(request.GET.get('top', self.default_top))
+        except ValueError:
+            raise BadRequest('top должен быть числом')
+        top = max(1, min(top, self.max_top))
+        filters = self.get_filters()
+        data = cached_channel_aggregates(
+            TelegramChannel.objects.filter(**filters), filters, top
+        )
+        return JsonResponse(data)
+
+
+class ParserSearchView(ChannelFilterMixin, View):
+    """
+    Ranked channel search as JSON (`q`, `limit` and the list filters).
+
+    Uses the full-text and trigram indexes on PostgreSQL, see
+    `search_channels`.
+    """
+    default_limit = 20
+    max_limit = 50
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = int(request.GET.get('limit', self.default_limit))
+        except ValueError:
+            raise BadRequest('limit должен быть числом')
+        limit = max(1, min(limit, self.max_limit))
+        channels = search_channels(
+            request.GET.get('q', ''),
+            TelegramChannel.objects.filter(**self.get_filters()),
+        ).values(*ParserListView.list_fields, 'rank')[:limit]
+        return JsonResponse({'results': list(channels)})
+
+
+class ParserRankingView(View):
+    """
+    Precomputed leaderboard as JSON, see `refresh_rankings`.
+
+    Parameters: `metric` (participants, growth, views), `category` (global
+    leaderboard when empty), `after` (rank the page starts after, from
+    `next`) and `limit`. A page is read by the (metric, category, rank)
+    index, its cost does not depend on the page position.
+    """
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request, *args, **kwargs):
+        metric = request.GET.get('metric', ChannelRanking.PARTICIPANTS)
+        if metric not in dict(ChannelRanking.METRIC_CHOICES):
+            raise BadRequest('Неизвестная метрика')
+        try:
+            after = int(request.GET.get('after', 0))
+            limit = int(request.GET.get('limit', self.default_limit))
+        except ValueError:
+            raise BadRequest('after и limit должны быть числами')
+        limit = max(1, min(limit, self.max_limit))
+
+        rows = list(
+            ChannelRanking.objects
+            .filter(
+                metric=metric,
+                category=request.GET.get('category', ''),
+                rank__gt=after,
+            )
+            .select_related('channel')
+            .only(
+                'rank', 'previous_rank', 'value', 'computed_at',
+                'channel__id', 'channel__title', 'channel__username',
+            )
+            .order_by('rank')[:limit + 1]
+        )
+        page = rows[:limit]
+        return JsonResponse({
+            'results': [
+                {
+                    'rank': row.rank,
+                    'previous_rank': row.previous_rank,
+                    'movement': row.movement,
+                    'value': row.value,
+                    'id': row.channel.id,
+                    'title': row.channel.title,
+                    'username': row.channel.username,
+                }
+                for row in page
+            ],
+            'computedAt': page[0].computed_at if page else None,
+            'next': page[-1].rank if len(rows) > limit else None,
+        })
+
+
 class ParserDetailView(DetailView):
     model = TelegramChannel
     template_name = 'parser/channel_detail.html'
     context_object_name = "channel"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # 30 daily rollups instead of every stats record of the month
+        today = timezone.now().date()
+        context['growth_30_days'] = range_rollups(
+            self.object, today - timedelta(days=29), today
+        ).aggregate(growth=Sum('growth'))['growth'] or 0
+        return context
+
 # Create your views here.
\ No newline at end of file
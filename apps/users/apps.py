@@ -7,6 +7,8 @@ class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
     def ready(self):
+        from apps.users import role_registry  # noqa: F401
+
         @receiver(social_account_added)
         def handle_yandex_login(sender, request, sociallogin, **kwargs):
             if sociallogin.account.provider == 'yandex':
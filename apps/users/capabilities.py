@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+
+from django.db.models import Exists, OuterRef
+
+from apps.parser.models import ChannelModerator
+from apps.users.models import PartnerProfile, User
+
+
+@dataclass(frozen=True)
+class Capabilities:
+    """Снимок прав пользователя на время одного запроса"""
+    is_authenticated: bool = False
+    is_partner: bool = False
+    is_channel_moderator: bool = False
+
+    @property
+    def role(self) -> str:
+        """Код роли: guest, partner, channel_moderator или user"""
+        if not self.is_authenticated:
+            return 'guest'
+        if self.is_partner:
+            return 'partner'
+        if self.is_channel_moderator:
+            return 'channel_moderator'
+        return 'user'
+
+
+def user_capabilities(user) -> Capabilities:
+    """
+    Права пользователя одним запросом к БД (для гостя - без запросов).
+
+    Заменяет `User.is_partner` и `User.is_channel_moderator`, каждое из
+    которых обращается к БД отдельно.
+    """
+    if not user.is_authenticated:
+        return Capabilities()
+    flags = (
+        User.objects
+        .filter(pk=user.pk)
+        .values(
+            is_partner=Exists(PartnerProfile.objects.filter(
+                user=OuterRef('pk'), status='active'
+            )),
+            is_channel_moderator=Exists(ChannelModerator.objects.filter(
+                user=OuterRef('pk')
+            )),
+        )
+        .first()
+    ) or {}
+    return Capabilities(is_authenticated=True, **flags)
+
+
+def get_capabilities(request) -> Capabilities:
+    """
+    request.capabilities, выставленные RoleMiddleware; без middleware
+    (например, в тестах) снимок вычисляется и сохраняется в запросе.
+    """
+    if not hasattr(request, 'capabilities'):
+        request.capabilities = user_capabilities(request.user)
+    return request.capabilities
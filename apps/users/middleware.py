@@ -1,8 +1,7 @@
-from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
 
-from apps.users.roles import Role
-
-User = get_user_model()
+from apps.users.capabilities import user_capabilities
+from apps.users.role_registry import role_name
 
 
 class RoleMiddleware:
@@ -10,19 +9,13 @@ class RoleMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-    
-        # Получаем роль пользователя, если она известна
-        user_role = getattr(request.user, 'role', None)
-        role_obj = Role.objects.filter(code=user_role).first()
-        
-        # Если роль пользователя не найдена, ставим гостевую роль
-        final_role = role_obj.name if role_obj else 'Guest'
-    
-        # Ставим роль в запрос
-        request.role = final_role
-        response = self.get_response(request)
-        
-        # !!!!!! Для деплоя эту отдалдку удалить!!!!!!! 
-        print(f"Middleware: Current role of the user is '{request.role}'")
-        
-        return response
\ No newline at end of file
+        # Роль и права вычисляются при первом обращении (роль - из
+        # справочника процесса, права - одним запросом), запросы без
+        # проверок ничего не стоят
+        request.role = SimpleLazyObject(
+            lambda: role_name(getattr(request.user, 'role', None))
+        )
+        request.capabilities = SimpleLazyObject(
+            lambda: user_capabilities(request.user)
+        )
+        return self.get_response(request)
@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.users.roles import Role
+from config.cache import bump_version, get_version
+
+# Пространство кэша, версия которого сообщает всем процессам,
+# что справочник ролей изменился
+ROLES_CACHE_NAMESPACE = 'users:roles'
+GUEST_ROLE = 'Guest'
+
+# Справочник ролей процесса: код -> название
+_registry = {'version': None, 'names': {}, 'loaded': 0.0}
+
+
+def role_names() -> dict[str, str]:
+    """
+    Справочник ролей (код -> название).
+
+    Загружается из БД один раз на процесс и перечитывается, когда версия
+    в общем кэше изменилась, т.е. после сохранения или удаления Role, и не
+    реже раза в ROLES_REGISTRY_TIMEOUT секунд: с кэшем в памяти процесса
+    версию, изменённую другим процессом, не видно.
+    """
+    version = get_version(ROLES_CACHE_NAMESPACE)
+    now = time.monotonic()
+    if (
+        _registry['version'] != version
+        or now - _registry['loaded'] > settings.ROLES_REGISTRY_TIMEOUT
+    ):
+        _registry['names'] = dict(Role.objects.values_list('code', 'name'))
+        _registry['version'] = version
+        _registry['loaded'] = now
+    return _registry['names']
+
+
+def role_name(code: str | None) -> str:
+    """Название роли по коду, гостевая роль для неизвестного кода"""
+    return role_names().get(code, GUEST_ROLE)
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def invalidate_roles(sender, **kwargs):
+    """Роли изменились - процессы перечитают справочник"""
+    bump_version(ROLES_CACHE_NAMESPACE)
@@ -0,0 +1,70 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.views.generic import View
+
+from apps.parser.models import ChannelModerator, TelegramChannel
+from apps.users.models import PartnerProfile, User
+from config.context_processors import user_role
+from config.decorators import get_user_role, partner_required
+from config.mixins import (
+    ChannelModeratorRequiredMixin,
+    UserAuthenticationCheckMixin,
+    anonymous_user_pk,
+)
+
+
+class CapabilitiesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='partner', email='partner@example.com', password='x'
+        )
+        PartnerProfile.objects.create(user=cls.user, status='active')
+        channel = TelegramChannel.objects.create(
+            channel_id=1, title='Канал', username='channel'
+        )
+        ChannelModerator.objects.create(user=cls.user, channel=channel)
+
+    def request(self, user):
+        request = RequestFactory().get('/')
+        request.user = User.objects.get(pk=user.pk)
+        request.role = 'channel_moderator'
+        return request
+
+    def test_one_query_for_every_check(self):
+        request = self.request(self.user)
+        view = partner_required(lambda request: HttpResponse())
+        mixin = ChannelModeratorRequiredMixin()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_role(request), 'partner')
+            self.assertTrue(user_role(request)['is_partner'])
+            self.assertEqual(view(request).status_code, 200)
+            self.assertTrue(mixin._test_role(request))
+
+    def test_plain_user(self):
+        user = User.objects.create_user(
+            username='user', email='user@example.com', password='x'
+        )
+        request = self.request(user)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_role(request), 'user')
+            self.assertFalse(request.capabilities.is_channel_moderator)
+
+
+class AuthenticationCheckTest(TestCase):
+    def test_no_queries_after_first_dispatch(self):
+        class ProfileView(UserAuthenticationCheckMixin, View):
+            def get(self, request):
+                return HttpResponse()
+
+        user = User.objects.create_user(
+            username='user', email='user@example.com', password='x'
+        )
+        request = RequestFactory().get('/')
+        request.user = user
+        anonymous_user_pk()
+
+        with self.assertNumQueries(0):
+            response = ProfileView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from apps.users.middleware import RoleMiddleware
+from apps.users.models import User
+from apps.users.roles import Role
+
+
+class RoleMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Role.objects.create(code='partner', name='Partner')
+        cls.user = User.objects.create_user(
+            username='partner',
+            email='partner@example.com',
+            password='secret',
+            role='partner',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.middleware = RoleMiddleware(lambda request: HttpResponse())
+
+    def request(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        self.middleware(request)
+        return request
+
+    def test_role_is_lazy(self):
+        with self.assertNumQueries(0):
+            self.request(self.user)
+
+    def test_roles_loaded_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.request(self.user).role, 'Partner')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.request(self.user).role, 'Partner')
+
+        self.user.role = 'unknown'
+        with self.assertNumQueries(0):
+            self.assertEqual(self.request(self.user).role, 'Guest')
+
+    def test_role_change_reloads(self):
+        self.assertEqual(self.request(self.user).role, 'Partner')
+        self.role.name = 'Партнёр'
+        self.role.save()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.request(self.user).role, 'Партнёр')
+
+    def test_registry_expires(self):
+        self.assertEqual(self.request(self.user).role, 'Partner')
+        # changed by another process: no version bump in this cache
+        Role.objects.filter(pk=self.role.pk).update(name='Партнёр')
+
+        self.assertEqual(self.request(self.user).role, 'Partner')
+        with self.settings(ROLES_REGISTRY_TIMEOUT=0):
+            self.assertEqual(self.request(self.user).role, 'Партнёр')
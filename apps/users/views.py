@@ -109,7 +109,7 @@ class UserCabinetView(UserAuthenticationCheckMixin, View):
                 'new_features': True,
             },
             'usage_stats': usage_stats,
-            'user_role': request.role,  # Используем атрибут из middleware
+            'user_role': str(request.role),  # Используем атрибут из middleware
         }
     def get(self, request, *args, **kwargs):
         user = request.user
@@ -0,0 +1,38 @@
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(namespace: str) -> str:
+    return f'{namespace}:version'
+
+
+def _new_version() -> int:
+    # Время, а не 1: версия, потерянная при вытеснении из кэша,
+    # не совпадёт ни с одной из прежних
+    return time.time_ns() // 1000
+
+
+def get_version(namespace: str) -> int:
+    """Текущая версия пространства ключей кэша"""
+    return cache.get_or_set(_version_key(namespace), _new_version, None)
+
+
+def bump_version(namespace: str) -> None:
+    """
+    Инвалидация всех ключей пространства разом: ключи включают версию,
+    поэтому после увеличения версии старые записи больше не читаются
+    и просто истекают по таймауту.
+    """
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        # Версии ещё нет (или её вытеснили из кэша)
+        cache.set(_version_key(namespace), _new_version(), None)
+
+
+def versioned_key(namespace: str, *parts) -> str:
+    """Ключ кэша с текущей версией пространства"""
+    return ':'.join(
+        [namespace, str(get_version(namespace)), *map(str, parts)]
+    )
@@ -1,5 +1,7 @@
 from django.conf import settings
 
+from apps.users.capabilities import get_capabilities
+
 
 def user_role(request):
     """
@@ -10,19 +12,17 @@ def user_role(request):
     - is_partner: булево значение (только для авторизованных)
     """
     role = getattr(request, 'role', None)
+    capabilities = get_capabilities(request)
 
     if role is None:
-        # Если роль еще не определена, вычисляем ее
-        if not request.user.is_authenticated:
-            role = 'guest'
-        else:
-            role = 'partner' if getattr(request.user, 'is_partner', False) else 'user'
+        # Если роль еще не определена, берем ее из снимка прав
+        role = capabilities.role
         request.role = role  # Кэшируем роль в запросе
 
     context = {
         'user_role': role,
-        'is_authenticated': request.user.is_authenticated,
-        'is_partner': role == 'partner',
+        'is_authenticated': capabilities.is_authenticated,
+        'is_partner': capabilities.is_partner,
     }
 
     # Добавляем отладочную информацию в режиме разработки
@@ -3,6 +3,8 @@ from django.http import HttpResponseForbidden, HttpResponseRedirect
 from django.urls import reverse
 from django.contrib import messages
 
+from apps.users.capabilities import get_capabilities
+
 
 def role_required(allowed_roles, login_url=None, message=None):
     """
@@ -33,14 +35,8 @@ def role_required(allowed_roles, login_url=None, message=None):
 
 
 def get_user_role(request):
-    """Динамически определяем роль пользователя"""
-    if not request.user.is_authenticated:
-        return 'guest'
-    if hasattr(request.user, 'is_partner') and request.user.is_partner:
-        return 'partner'
-    if hasattr(request.user, 'is_channel_moderator') and request.user.is_channel_moderator:
-        return 'channel_moderator'
-    return 'user'
+    """Динамически определяем роль пользователя по снимку прав запроса"""
+    return get_capabilities(request).role
 
 
 def handle_access_denied(request, current_role, allowed_roles, login_url=None, message=None):
@@ -113,7 +109,7 @@ def partner_required(view_func=None, login_url=None, message=None):
                 return HttpResponseRedirect(login_url or reverse('login'))
 
             # Затем проверяем партнерский статус
-            if not getattr(request.user, 'is_partner', False):
+            if not get_capabilities(request).is_partner:
                 messages.error(request, message or "Доступ только для партнеров")
                 return HttpResponseForbidden("Доступ только для партнеров")
 
@@ -141,7 +137,7 @@ def channel_moderator_required(view_func=None, login_url=None, message=None):
                 return HttpResponseRedirect(login_url or reverse('login'))
 
             # Затем проверяем статус модератора канала
-            if not getattr(request.user, 'is_channel_moderator', False):
+            if not get_capabilities(request).is_channel_moderator:
                 messages.error(request, message or "Доступ только для модераторов каналов")
                 return HttpResponseForbidden("Доступ только для модераторов каналов")
 
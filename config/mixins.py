@@ -1,3 +1,5 @@
+from functools import cache
+
 from django.views.generic import View
 from django.shortcuts import reverse, redirect
 from django.contrib.messages import add_message
@@ -6,6 +8,18 @@ from guardian.utils import get_anonymous_user
 from django.core.exceptions import PermissionDenied, ImproperlyConfigured
 from django.contrib.auth.mixins import AccessMixin
 
+from apps.users.capabilities import get_capabilities
+
+
+@cache
+def anonymous_user_pk():
+    """
+    pk специального анонимного пользователя Guardian, запрашивается
+    один раз на процесс
+    """
+    return get_anonymous_user().pk
+
+
 class CheckingUserRolesMixin:
     """
     Миксин для проверки статуса пользователя (анонимный / авторизованный)
@@ -13,15 +27,13 @@ class CheckingUserRolesMixin:
     со временем избавиться от избыточной проверки на ананимность, но только после долгого тестирования миделвары)
     """
     def is_anonymous(self):
-        # Получаем специальный анонимный экземпляр Guardian
-        anonymous_guardian_user = get_anonymous_user()
-        
         # Пользователь из текущего запроса
         user = self.request.user
 
-        # Проверяем равенство текущего пользователя специальному анонимному экземпляру
-        # или, что пользователь не прошёл аутентификацию
-        if user == anonymous_guardian_user or not user.is_authenticated:
+        # Проверяем, что пользователь не прошёл аутентификацию
+        # или является специальным анонимным экземпляром Guardian
+        # (сравниваем по pk, без запроса к БД)
+        if not user.is_authenticated or user.pk == anonymous_user_pk():
             return True
         else:
             return False
@@ -98,8 +110,7 @@ class PartnerRequiredMixin(RoleRequiredMixin):
         """Дополнительная проверка активного статуса партнера"""
         return (
                 super()._test_role(request) and
-                hasattr(request.user, 'is_partner') and
-                request.user.is_partner
+                get_capabilities(request).is_partner
         )
 
 
@@ -112,8 +123,7 @@ class ChannelModeratorRequiredMixin(RoleRequiredMixin):
         """Дополнительная проверка статуса модератора канала"""
         return (
                 super()._test_role(request) and
-                hasattr(request.user, 'is_channel_moderator') and
-                request.user.is_channel_moderator
+                get_capabilities(request).is_channel_moderator
         )
 
 
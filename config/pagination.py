@@ -0,0 +1,100 @@
+import base64
+import datetime
+import json
+
+from django.core.exceptions import (
+    BadRequest,
+    FieldDoesNotExist,
+    ValidationError,
+)
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder обрезает время до миллисекунд; в курсоре оно нужно
+    полностью, иначе сравнение с ключом строки уводит с нужной страницы
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values) -> str:
+    """Курсор - значения ключа сортировки последней строки в base64"""
+    raw = json.dumps(list(values), cls=CursorEncoder)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise BadRequest(f'Некорректный курсор: {e}')
+    if not isinstance(values, list):
+        raise BadRequest('Некорректный курсор')
+    return values
+
+
+def _restore(model, field, value):
+    """Значение курсора в тип поля ключа (даты лежат строками ISO 8601)"""
+    if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+        raise BadRequest('Некорректный курсор')
+    try:
+        model_field = model._meta.get_field(field)
+    except FieldDoesNotExist:
+        return value
+    try:
+        value = model_field.to_python(value)
+    except (ValidationError, TypeError, ValueError):
+        raise BadRequest('Некорректный курсор')
+    if value is None:
+        raise BadRequest('Некорректный курсор')
+    return value
+
+
+def keyset_page(queryset, fields, cursor=None, limit=50, descending=True):
+    """
+    Keyset (курсорная) пагинация.
+
+    Вместо OFFSET следующая страница начинается строго после ключа последней
+    строки предыдущей, поэтому стоимость запроса не зависит от номера
+    страницы. Последнее поле ключа должно быть уникальным (обычно `id`),
+    а для ключа нужен индекс.
+
+    Возвращает список строк и курсор следующей страницы (None на последней).
+    """
+    order = [f'-{field}' if descending else field for field in fields]
+    queryset = queryset.order_by(*order)
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(fields):
+            raise BadRequest('Курсор не подходит к сортировке')
+        values = [
+            _restore(queryset.model, field, value)
+            for field, value in zip(fields, values)
+        ]
+        lookup = 'lt' if descending else 'gt'
+        # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y)
+        condition = Q()
+        for i, field in enumerate(fields):
+            step = Q(**{f'{field}__{lookup}': values[i]})
+            for prev, value in zip(fields[:i], values[:i]):
+                step &= Q(**{prev: value})
+            condition |= step
+        queryset = queryset.filter(condition)
+
+    rows = list(queryset[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    get = last.get if isinstance(last, dict) else (
+        lambda field: getattr(last, field)
+    )
+    return rows, encode_cursor(get(field) for field in fields)
@@ -29,6 +29,56 @@ TELEGRAM_API_ID = os.getenv('TELEGRAM_API_ID')
 TELEGRAM_API_HASH = os.getenv('TELEGRAM_API_HASH')
 TELEGRAM_SESSION_STRING = os.getenv('TELEGRAM_SESSION_STRING')
 
+# Telegram accounts used by the parser: account name -> StringSession.
+# TELEGRAM_SESSION_STRING is the `default` account, every
+# TELEGRAM_SESSION_STRING_<NAME> adds account `<name>`
+# (see `manage.py start_telegram_session --account <name>`)
+TELEGRAM_SESSIONS = {
+    key.removeprefix('TELEGRAM_SESSION_STRING_').lower(): value
+    for key, value in sorted(os.environ.items())
+    if key.startswith('TELEGRAM_SESSION_STRING_') and value
+}
+if TELEGRAM_SESSION_STRING:
+    TELEGRAM_SESSIONS['default'] = TELEGRAM_SESSION_STRING
+
+# Anti-flood pacing: Telegram API requests per second and burst per account.
+# Rate limiters live in process memory, so this budget is split evenly
+# between the CELERY_WORKER_CONCURRENCY worker processes (see
+# apps.parser.ratelimit.get_rate_limiter)
+TELEGRAM_REQUESTS_PER_SECOND = float(os.getenv('TELEGRAM_REQUESTS_PER_SECOND', '3'))
+TELEGRAM_REQUESTS_BURST = int(os.getenv('TELEGRAM_REQUESTS_BURST', '5'))
+# Idle pooled Telegram clients are pinged before reuse after this many seconds
+TELEGRAM_HEALTHCHECK_INTERVAL = int(os.getenv('TELEGRAM_HEALTHCHECK_INTERVAL', '60'))
+# How many channels one sweep parses at once per account
+PARSER_CONCURRENCY = int(os.getenv('PARSER_CONCURRENCY', '20'))
+# Account in FloodWait longer than this (seconds) hands its channels to others
+PARSER_DRAIN_AFTER = int(os.getenv('PARSER_DRAIN_AFTER', '30'))
+# Parsed channels are written in batches of this size...
+PARSER_SINK_BATCH_SIZE = int(os.getenv('PARSER_SINK_BATCH_SIZE', '500'))
+# ...or after this many seconds, whichever comes first
+PARSER_SINK_FLUSH_INTERVAL = float(
+    os.getenv('PARSER_SINK_FLUSH_INTERVAL', '5')
+)
+# Posts kept in the rolling window average views are computed over
+PARSER_RECENT_POSTS = int(os.getenv('PARSER_RECENT_POSTS', '30'))
+# Sweeps fetch only new posts; every this many days all recent posts are
+# fetched again so their views do not go stale
+PARSER_POSTS_REFRESH_DAYS = int(os.getenv('PARSER_POSTS_REFRESH_DAYS', '7'))
+# ChannelStats younger than this (days) keep every record...
+STATS_FULL_RESOLUTION_DAYS = int(
+    os.getenv('STATS_FULL_RESOLUTION_DAYS', '30')
+)
+# ...then one record per day up to this age, one per week after it
+STATS_DAILY_RESOLUTION_DAYS = int(
+    os.getenv('STATS_DAILY_RESOLUTION_DAYS', '180')
+)
+# Rows deleted per statement by the downsampling job
+STATS_RETENTION_BATCH_SIZE = int(
+    os.getenv('STATS_RETENTION_BATCH_SIZE', '5000')
+)
+# Channels kept in every leaderboard (global and per category)
+RANKING_TOP_N = int(os.getenv('RANKING_TOP_N', '100'))
+
 # Telegram settings check
 # SESSIONS_STRING is not necessary, because working with sole db can be too
 if not TELEGRAM_API_ID or not TELEGRAM_API_HASH:
@@ -44,15 +94,58 @@ CELERY_ACCEPT_CONTENT = ["json"]  # tasks data format
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "Europe/Moscow"  # project timezone
+# Worker child processes (`celery worker --concurrency`); every child gets
+# its own share of TELEGRAM_REQUESTS_PER_SECOND
+CELERY_WORKER_CONCURRENCY = int(os.getenv('CELERY_WORKER_CONCURRENCY', '4'))
 
 # Celery dict with schedule
 CELERY_BEAT_SCHEDULE = {
     "parse-all-channels-every-day-12-30": {
-        "task": "config.parser.tasks.parse_all_channels",  # path to task
+        "task": "apps.parser.tasks.parse_all_channels",  # path to task
         "schedule": crontab(hour=11, minute=40),
     },
+    "downsample-channel-stats-every-night": {
+        "task": "apps.parser.tasks.downsample_channel_stats",
+        "schedule": crontab(hour=3, minute=15),
+    },
 }
 
+# Cache: Redis when CACHE_URL is set (e.g. redis://localhost:6379/1),
+# per-process memory otherwise. Invalidation (versions of the cache
+# namespaces) must reach every gunicorn and Celery process, so production
+# requires the shared cache
+if os.getenv('PROD') == 't' and not os.getenv('CACHE_URL'):
+    raise ImproperlyConfigured(
+        "Нет общего кэша. Установи CACHE_URL (например, "
+        "redis://localhost:6379/1)"
+    )
+if os.getenv('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# Seconds the channel aggregates stay cached (new data invalidates them)
+PARSER_STATS_CACHE_TIMEOUT = int(
+    os.getenv('PARSER_STATS_CACHE_TIMEOUT', '600')
+)
+
+# Seconds the homepage group grid stays cached (signals invalidate it)
+GROUPS_CACHE_TIMEOUT = int(os.getenv('GROUPS_CACHE_TIMEOUT', '3600'))
+
+# Seconds the homepage components stay cached (signals invalidate them)
+HOMEPAGE_CACHE_TIMEOUT = int(os.getenv('HOMEPAGE_CACHE_TIMEOUT', '86400'))
+
+# Seconds a process trusts its role registry without rereading it
+ROLES_REGISTRY_TIMEOUT = int(os.getenv('ROLES_REGISTRY_TIMEOUT', '300'))
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
@@ -74,6 +167,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'guardian',
     
     'inertia',
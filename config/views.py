@@ -1,45 +1,60 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import render
 from django.views.generic.base import View
 from apps.group_channels.models import Group
+from apps.group_channels.signals import GROUPS_CACHE_NAMESPACE
 from django.db.models import Count
 from apps.parser.models import TelegramChannel
+from config.cache import versioned_key
 from math import ceil
 
 class IndexView(View):
-    CATS_COLUMNS = 4 
+    CATS_COLUMNS = 4
     ROWS_PER_COL = 8
 
+    def cached(self, name, build):
+        """
+        Данные главной из кэша; ключ содержит версию, которую сбрасывают
+        сигналы apps.group_channels.signals
+        """
+        key = versioned_key(GROUPS_CACHE_NAMESPACE, 'index', name)
+        data = cache.get(key)
+        if data is None:
+            data = build()
+            cache.set(key, data, settings.GROUPS_CACHE_TIMEOUT)
+        return data
 
-    def get(self, request, *args, **kwargs):
-        editorial = (
-            Group.objects
-                 .filter(is_editorial=True)
-                 .annotate(ch_count=Count('channels'))
-        )
-
-        auto_qs = (
+    def auto_groups(self):
+        return (
             Group.objects
                  .filter(auto_rule__isnull=False)
-                 .select_related('auto_rule')
                  .order_by('order', 'name')
         )
-        auto_groups = list(auto_qs)
-
-        page_size = self.CATS_COLUMNS * self.ROWS_PER_COL
-        total = len(auto_groups)
-        total_pages = max(1, ceil(total / page_size))
 
-        try:
-            page = int(request.GET.get('cats_page', '1'))
-        except ValueError:
-            page = 1
-        page = max(1, min(page, total_pages))
+    def get_editorial(self):
+        return list(
+            Group.objects
+                 .filter(is_editorial=True)
+                 .annotate(ch_count=Count('channels'))
+                 .values('name', 'slug', 'ch_count')
+        )
 
+    def get_categories_page(self, page, page_size):
+        # LIMIT/OFFSET в БД вместо нарезки полного списка в Python
         start = (page - 1) * page_size
-        end = start + page_size
-        page_groups = auto_groups[start:end]
+        page_groups = list(
+            self.auto_groups()
+                .values('name', 'slug', 'auto_rule__category',
+                        'auto_rule__materialize', 'member_count')
+                [start:start + page_size]
+        )
 
-        categories = [g.auto_rule.category for g in page_groups]
+        # У материализованных подборок число каналов уже посчитано
+        categories = [
+            g['auto_rule__category'] for g in page_groups
+            if not g['auto_rule__materialize']
+        ]
         if categories:
             counts_qs = (
                 TelegramChannel.objects
@@ -52,16 +67,37 @@ class IndexView(View):
             counts_map = {}
 
         for g in page_groups:
-            g.cat_count = counts_map.get(g.auto_rule.category, 0)
+            if g['auto_rule__materialize']:
+                g['cat_count'] = g['member_count']
+            else:
+                g['cat_count'] = counts_map.get(g['auto_rule__category'], 0)
 
         cols = []
         for i in range(self.CATS_COLUMNS):
             start_i = i * self.ROWS_PER_COL
             end_i = start_i + self.ROWS_PER_COL
             cols.append(page_groups[start_i:end_i])
-        
+        return cols
+
+    def get(self, request, *args, **kwargs):
+        page_size = self.CATS_COLUMNS * self.ROWS_PER_COL
+        total = self.cached('total', lambda: self.auto_groups().count())
+        total_pages = max(1, ceil(total / page_size))
+
+        try:
+            page = int(request.GET.get('cats_page', '1'))
+        except ValueError:
+            page = 1
+        page = max(1, min(page, total_pages))
+
+        cols = self.cached(
+            f'page:{page}',
+            lambda: self.get_categories_page(page, page_size),
+        )
+        editorial = self.cached('editorial', self.get_editorial)
+
         role = request.role
-        
+
         context = {
             'editorial_groups': editorial,
             'categories_cols': cols,
@@ -73,5 +109,4 @@ class IndexView(View):
             'cats_next_page': page + 1,
             'user_role': role
         }
-        print(role)
         return render(request, 'index.html', context)
@@ -0,0 +1,299 @@
+"""
+Benchmarks for the hot paths of the project.
+
+How to:
+    uv run python -m tests.benchmarks parser --channels 50 --latency 0.2
+
+Every benchmark prints its timings to stdout; nothing is asserted here,
+correctness lives in the test suite.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import timedelta
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.contrib.messages.storage.cookie import CookieStorage  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from django.views.generic import View  # noqa: E402
+from guardian.utils import get_anonymous_user  # noqa: E402
+
+from apps.parser.metrics import channel_metrics  # noqa: E402
+from apps.parser.models import ChannelStats, TelegramChannel  # noqa: E402
+from apps.parser.parser import parse_many, tg_parser  # noqa: E402
+from apps.parser.ratelimit import AsyncTokenBucket, _limiters  # noqa: E402
+from apps.parser.sharding import parse_sharded  # noqa: E402
+from apps.users.models import User  # noqa: E402
+from config.mixins import UserAuthenticationCheckMixin  # noqa: E402
+from tests.fakes import FakeTelegramClient  # noqa: E402
+
+
+def bench_parser(channels: int = 50, latency: float = 0.2,
+                 rate: float = 30.0, concurrency: int = 20) -> None:
+    """N channels parsed on one event loop against a fake TelegramClient.
+
+    Compares channels parsed one after another with channels parsed
+    concurrently (unbounded `gather` and bounded `parse_many`); all runs
+    share the same token bucket pacing.
+    """
+    usernames = [f'channel_{i}' for i in range(channels)]
+
+    async def sequential():
+        client = FakeTelegramClient(latency=latency)
+        limiter = AsyncTokenBucket(rate)
+        for username in usernames:
+            await tg_parser(username, client, rate_limiter=limiter)
+        return client
+
+    async def concurrent():
+        client = FakeTelegramClient(latency=latency)
+        limiter = AsyncTokenBucket(rate)
+        await asyncio.gather(*(
+            tg_parser(username, client, rate_limiter=limiter)
+            for username in usernames
+        ))
+        return client
+
+    async def bounded():
+        client = FakeTelegramClient(latency=latency)
+        limiter = AsyncTokenBucket(rate)
+        async for _ in parse_many(usernames, client, concurrency,
+                                  rate_limiter=limiter):
+            pass
+        return client
+
+    runs = (
+        ('sequential', sequential),
+        ('concurrent', concurrent),
+        ('parse_many', bounded),
+    )
+    for name, runner in runs:
+        started = time.perf_counter()
+        client = asyncio.run(runner())
+        elapsed = time.perf_counter() - started
+        print(
+            f'{name:>10}: {channels} channels in {elapsed:.2f} s, '
+            f'{client.calls / elapsed:.1f} req/s (limit {rate}), '
+            f'max in flight {client.max_in_flight}'
+        )
+
+
+def bench_sharded(channels: int = 200, latency: float = 0.05,
+                  rate: float = 20.0, max_accounts: int = 4) -> None:
+    """Sweep throughput with 1..N accounts, each paced at `rate` req/s."""
+    targets = {i: f'channel_{i}' for i in range(channels)}
+    for accounts in range(1, max_accounts + 1):
+        clients = {
+            f'bench_{i}': FakeTelegramClient(latency=latency)
+            for i in range(accounts)
+        }
+        for account in clients:
+            _limiters[account] = AsyncTokenBucket(rate)
+
+        async def sweep():
+            async for _ in parse_sharded(targets, clients, concurrency=10):
+                pass
+
+        started = time.perf_counter()
+        asyncio.run(sweep())
+        elapsed = time.perf_counter() - started
+        print(
+            f'{accounts} account(s): {channels} channels in {elapsed:.2f} s, '
+            f'{channels / elapsed:.1f} channels/s'
+        )
+
+
+def bench_last_stat(rows: int = 10_000_000, channels: int = 10_000,
+                    lookups: int = 1000) -> None:
+    """`TelegramChannel.last_stat()` with and without the stats index.
+
+    Runs on a throwaway test database (created and destroyed here, the
+    configured database is never touched) filled with `rows` stats spread
+    over `channels` channels, one row per channel per day.
+    """
+    test_db = connection.creation.create_test_db(verbosity=0)
+    try:
+        TelegramChannel.objects.bulk_create(
+            TelegramChannel(channel_id=i, title=f'Channel {i}')
+            for i in range(channels)
+        )
+        pks = list(TelegramChannel.objects.values_list('pk', flat=True))
+
+        started = time.perf_counter()
+        now = timezone.now()
+        table = ChannelStats._meta.db_table
+        sql = (
+            f'INSERT INTO {table} '
+            f'(channel_id, participants_count, daily_growth, parsed_at) '
+            f'VALUES (%s, %s, %s, %s)'
+        )
+        chunk = 100_000
+        for offset in range(0, rows, chunk):
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, [
+                    (pks[i % channels], i, 1,
+                     now - timedelta(days=i // channels))
+                    for i in range(offset, min(offset + chunk, rows))
+                ])
+        print(f'{rows} stats inserted in {time.perf_counter() - started:.0f} s')
+
+        sample = random.sample(
+            list(TelegramChannel.objects.all()), min(lookups, channels)
+        )
+        index = next(
+            index for index in ChannelStats._meta.indexes
+            if index.name == 'channelstats_channel_date_idx'
+        )
+
+        def lookup(name):
+            started = time.perf_counter()
+            for channel in sample:
+                channel.last_stat()
+            elapsed = time.perf_counter() - started
+            print(
+                f'{name:>13}: {len(sample)} last_stat() calls in '
+                f'{elapsed:.2f} s, {elapsed / len(sample) * 1000:.2f} ms each'
+            )
+
+        lookup('with index')
+        with connection.schema_editor() as editor:
+            editor.remove_index(ChannelStats, index)
+        lookup('without index')
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+
+def bench_metrics(channels: int = 5000, posts: int = 10) -> None:
+    """Engagement metrics stage over a batch of parsed channels."""
+    now = timezone.now()
+    batch = [
+        {
+            'participants_count': random.randint(0, 100_000),
+            'average_views': random.randint(0, 10_000),
+            'last_messages': [
+                {
+                    'post_views': random.randint(0, 10_000),
+                    'post_date': (
+                        now - timedelta(hours=random.uniform(0, 240))
+                    ).isoformat(),
+                }
+                for _ in range(posts)
+            ],
+        }
+        for _ in range(channels)
+    ]
+    started = time.perf_counter()
+    channel_metrics(batch, now)
+    elapsed = time.perf_counter() - started
+    print(
+        f'{channels} channels x {posts} posts: {elapsed * 1000:.0f} ms, '
+        f'{elapsed / channels * 1e6:.1f} us per channel'
+    )
+
+
+def bench_dispatch(requests: int = 5000) -> None:
+    """Dispatch of a view behind `UserAuthenticationCheckMixin`.
+
+    Compares the previous anonymous check (the Guardian anonymous user
+    fetched on every dispatch) with the per-process cached pk, for an
+    anonymous and an authenticated user, on a throwaway test database.
+    """
+
+    class FetchingMixin(UserAuthenticationCheckMixin):
+        def is_anonymous(self):
+            user = self.request.user
+            return user == get_anonymous_user() or not user.is_authenticated
+
+    class Cached(UserAuthenticationCheckMixin, View):
+        def get(self, request):
+            return HttpResponse()
+
+    class Fetching(FetchingMixin, View):
+        def get(self, request):
+            return HttpResponse()
+
+    test_db = connection.creation.create_test_db(verbosity=0)
+    try:
+        user = User.objects.create_user(
+            username='bench', email='bench@example.com', password='bench'
+        )
+        factory = RequestFactory()
+        for name, view in (('fetching', Fetching), ('cached pk', Cached)):
+            view = view.as_view()
+            for label, who in (('anonymous', AnonymousUser()), ('user', user)):
+                request = factory.get('/')
+                request.user = who
+                # the anonymous user is redirected with a message
+                request._messages = CookieStorage(request)
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as queries:
+                    for _ in range(requests):
+                        view(request)
+                elapsed = time.perf_counter() - started
+                print(
+                    f'{name:>9} {label:>9}: '
+                    f'{elapsed / requests * 1e6:.0f} us per dispatch, '
+                    f'{len(queries) / requests:.2f} queries'
+                )
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run project benchmarks')
+    commands = parser.add_subparsers(dest='name', required=True)
+
+    command = commands.add_parser('parser', help='tg_parser on one loop')
+    command.add_argument('--channels', type=int, default=50)
+    command.add_argument('--latency', type=float, default=0.2)
+    command.add_argument('--rate', type=float, default=30.0)
+    command.add_argument('--concurrency', type=int, default=20)
+    command.set_defaults(run=lambda args: bench_parser(
+        args.channels, args.latency, args.rate, args.concurrency
+    ))
+
+    command = commands.add_parser('sharded', help='sweep over N accounts')
+    command.add_argument('--channels', type=int, default=200)
+    command.add_argument('--latency', type=float, default=0.05)
+    command.add_argument('--rate', type=float, default=20.0)
+    command.add_argument('--accounts', type=int, default=4)
+    command.set_defaults(run=lambda args: bench_sharded(
+        args.channels, args.latency, args.rate, args.accounts
+    ))
+
+    command = commands.add_parser('last_stat', help='last_stat() at scale')
+    command.add_argument('--rows', type=int, default=10_000_000)
+    command.add_argument('--channels', type=int, default=10_000)
+    command.add_argument('--lookups', type=int, default=1000)
+    command.set_defaults(run=lambda args: bench_last_stat(
+        args.rows, args.channels, args.lookups
+    ))
+
+    command = commands.add_parser('metrics', help='engagement metrics stage')
+    command.add_argument('--channels', type=int, default=5000)
+    command.add_argument('--posts', type=int, default=10)
+    command.set_defaults(run=lambda args: bench_metrics(
+        args.channels, args.posts
+    ))
+
+    command = commands.add_parser('dispatch', help='view dispatch overhead')
+    command.add_argument('--requests', type=int, default=5000)
+    command.set_defaults(run=lambda args: bench_dispatch(args.requests))
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+In-memory stand-ins for Telethon objects.
+
+FakeTelegramClient answers the calls `tg_parser` makes (`get_entity`,
+`get_messages`, `GetFullChannelRequest`) with generated data after an
+`asyncio.sleep(latency)`, imitating the network round trip. It is used by
+the parser tests and by `tests/benchmarks.py`.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+
+class FakeTelegramClient:
+    def __init__(self, latency: float = 0.05, posts: int = 30):
+        self.latency = latency
+        self.posts = posts
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connects = 0
+        self.connected = False
+
+    async def _round_trip(self):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+    async def connect(self):
+        self.connects += 1
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def disconnect(self):
+        self.connected = False
+
+    async def get_me(self):
+        await self._round_trip()
+        return SimpleNamespace(id=1, username='parser')
+
+    @staticmethod
+    def channel_id(username: str) -> int:
+        return sum(ord(char) for char in username) * 1000 + len(username)
+
+    async def get_entity(self, url: str):
+        await self._round_trip()
+        username = url.rsplit('/', 1)[-1].lstrip('@')
+        return SimpleNamespace(
+            id=self.channel_id(username),
+            title=f'Channel {username}',
+            username=username,
+            verified=False,
+            date=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        )
+
+    async def get_messages(self, channel, limit=None, ids=None, min_id=0,
+                           **kwargs):
+        await self._round_trip()
+        now = datetime.now(timezone.utc)
+        if ids is not None:
+            return SimpleNamespace(id=ids, message='Pinned post')
+        # Like Telegram, `min_id` leaves out this post and older ones
+        limit = min(limit or self.posts, self.posts - min(min_id, self.posts))
+        return [
+            SimpleNamespace(
+                id=self.posts - i,
+                text=f'Post {self.posts - i}',
+                message=f'Post {self.posts - i}',
+                views=1000 - i * 10,
+                date=now - timedelta(hours=i * 6),
+            )
+            for i in range(limit)
+        ]
+
+    async def __call__(self, request):
+        await self._round_trip()
+        return SimpleNamespace(full_chat=SimpleNamespace(
+            participants_count=5000,
+            about='Channel description',
+            pinned_msg_id=1,
+        ))